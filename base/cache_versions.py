@@ -0,0 +1,43 @@
+"""
+Version stamps for invalidating cached entries.
+
+An entry records the versions of the keys it depends on when it is built, and
+is only served while they are unchanged. Writes bump the versions instead of
+deleting entries, so a write racing a rebuild is never cached as fresh as long
+as the versions are read before the rebuild queries.
+"""
+import time
+
+from django.core.cache import cache
+
+INITIAL_VERSION = 0
+
+
+def get_version(key) -> int:
+    return cache.get(key, INITIAL_VERSION)
+
+
+def bump_version(key) -> None:
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Missing (or evicted) version: start from a value no entry can have recorded.
+        cache.set(key, time.time_ns(), None)
+
+
+def get_entry(entry_key, version_keys):
+    """
+    Returns (data, versions) from one cache round trip. data is None on a miss
+    or when any of `version_keys` changed since the entry was stored; versions
+    must be passed to set_entry() when storing the rebuilt data.
+    """
+    found = cache.get_many([entry_key, *version_keys])
+    versions = {key: found.get(key, INITIAL_VERSION) for key in version_keys}
+    entry = found.get(entry_key)
+    if entry is not None and entry.get("versions") == versions:
+        return entry.get("data"), versions
+    return None, versions
+
+
+def set_entry(entry_key, versions, data, ttl) -> None:
+    cache.set(entry_key, {"versions": versions, "data": data}, ttl)
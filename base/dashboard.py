@@ -0,0 +1,127 @@
+"""
+Aggregated user dashboard.
+
+build_user_dashboard() collects every count the dashboard screen shows with a
+few conditional aggregates (one per table) plus the recent items. The result
+is cached per user; writes that change a user's dashboard bump the user's
+version (invalidate_user_dashboards), which turns the cached entry into a miss.
+The version is read before the queries, so a write racing a rebuild is never
+cached as fresh.
+"""
+from django.conf import settings
+from django.db.models import Count, Q
+
+from .cache_versions import bump_version, get_entry, set_entry
+from .models import BidJob, ContactRequest, JobPost, STATUS_CHOICES, TeacherSearchIndex
+
+CACHE_PREFIX = "user-dashboard"
+RECENT_ITEMS = 5
+REQUEST_STATUSES = [code for code, _ in STATUS_CHOICES]
+
+
+def get_ttl():
+    return getattr(settings, "USER_DASHBOARD_CACHE_TTL", 300)
+
+
+def _entry_key(user_id):
+    return f"{CACHE_PREFIX}:entry:{user_id}"
+
+
+def _version_key(user_id):
+    return f"{CACHE_PREFIX}:v:{user_id}"
+
+
+def _per_status(totals, prefix):
+    return {code: totals[f"{prefix}_{code}"] for code in REQUEST_STATUSES}
+
+
+def build_user_dashboard(user) -> dict:
+    """
+    The dashboard of `user`, from three conditional aggregates, the rating
+    summary and three short recent-item queries.
+    """
+    jobs = JobPost.objects.filter(posted_by=user).aggregate(
+        open=Count('id', filter=Q(status='open')),
+        closed=Count('id', filter=Q(status='closed')),
+    )
+
+    received = Q(job__posted_by=user)
+    placed = Q(tutor__user=user)
+    bids = BidJob.objects.filter(received | placed).aggregate(
+        **{f"received_{code}": Count('id', filter=received & Q(status=code)) for code in REQUEST_STATUSES},
+        **{f"placed_{code}": Count('id', filter=placed & Q(status=code)) for code in REQUEST_STATUSES},
+    )
+
+    sent = Q(student=user)
+    incoming = Q(teacher__user=user)
+    requests = ContactRequest.objects.filter(sent | incoming).aggregate(
+        **{f"sent_{code}": Count('id', filter=sent & Q(status=code)) for code in REQUEST_STATUSES},
+        **{f"received_{code}": Count('id', filter=incoming & Q(status=code)) for code in REQUEST_STATUSES},
+    )
+    requests_sent = _per_status(requests, "sent")
+    requests_received = _per_status(requests, "received")
+
+    rating = (
+        TeacherSearchIndex.objects.filter(teacher__user=user)
+        .values('rating_average', 'rating_count')
+        .first()
+    )
+
+    recent_jobs = list(
+        JobPost.objects.filter(posted_by=user)
+        .order_by('-created_at', '-id')
+        .values('id', 'title', 'status', 'bids_count', 'created_at')[:RECENT_ITEMS]
+    )
+    recent_bids = [
+        {
+            "id": bid.id,
+            "job": bid.job_id,
+            "job_title": bid.job.title,
+            "tutor_name": bid.tutor.user.get_full_name(),
+            "proposed_salary": bid.proposed_salary,
+            "status": bid.status,
+            "created_at": bid.created_at,
+        }
+        for bid in BidJob.objects.filter(received).select_related('job', 'tutor__user')
+        .order_by('-created_at', '-id')[:RECENT_ITEMS]
+    ]
+    recent_requests = list(
+        ContactRequest.objects.filter(sent | incoming)
+        .order_by('-created_at', '-id')
+        .values('id', 'student_id', 'teacher_id', 'student_name', 'status', 'created_at')[:RECENT_ITEMS]
+    )
+
+    return {
+        # Kept for existing clients; equal to the reconciled UserDashboard counters.
+        "total_contact_requests_sent": sum(requests_sent.values()),
+        "total_contact_requests_received": sum(requests_received.values()),
+        "total_pending_requests": requests_sent["pending"],
+        "jobs": jobs,
+        "bids_received": _per_status(bids, "received"),
+        "bids_placed": _per_status(bids, "placed"),
+        "contact_requests": {"sent": requests_sent, "received": requests_received},
+        "rating": {
+            "average": round(rating["rating_average"], 2) if rating and rating["rating_count"] else None,
+            "count": rating["rating_count"] if rating else 0,
+        },
+        "recent_jobs": recent_jobs,
+        "recent_bids_received": recent_bids,
+        "recent_contact_requests": recent_requests,
+    }
+
+
+def get_user_dashboard(user) -> dict:
+    """
+    build_user_dashboard() served from the per-user cache.
+    """
+    entry_key = _entry_key(user.pk)
+    data, versions = get_entry(entry_key, [_version_key(user.pk)])
+    if data is None:
+        data = build_user_dashboard(user)
+        set_entry(entry_key, versions, data, get_ttl())
+    return data
+
+
+def invalidate_user_dashboards(user_ids) -> None:
+    for user_id in {user_id for user_id in user_ids if user_id}:
+        bump_version(_version_key(user_id))
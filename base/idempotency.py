@@ -0,0 +1,98 @@
+"""
+Idempotency-Key support for unsafe API calls.
+
+A client that may retry a request (mobile taps, flaky networks) sends the same
+Idempotency-Key header with every attempt. The first response is stored in the
+cache for IDEMPOTENCY_KEY_TTL seconds and replayed for the retries, which never
+reach the view again. A key reused with a different payload is rejected, and a
+retry arriving while the first attempt is still running gets a 409. Both the
+stored responses and the in-flight locks must be seen by every worker, so
+outside DEBUG a request carrying the header fails with ImproperlyConfigured
+unless settings.SHARED_CACHE is set.
+"""
+import hashlib
+import json
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import status
+from rest_framework.response import Response
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+CACHE_PREFIX = "idempotency"
+# Longest a first attempt may run before a retry is allowed to run again.
+LOCK_SECONDS = 30
+
+
+def get_ttl():
+    return getattr(settings, "IDEMPOTENCY_KEY_TTL", 24 * 3600)
+
+
+def require_shared_cache():
+    if not settings.DEBUG and not getattr(settings, "SHARED_CACHE", False):
+        raise ImproperlyConfigured(
+            f"{IDEMPOTENCY_HEADER} support needs a cache shared by every worker; set REDIS_URL."
+        )
+
+
+def _fingerprint(request) -> str:
+    return hashlib.sha256(json.dumps(request.data, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def idempotent(view_method):
+    """
+    Decorates a viewset method (e.g. create) so requests carrying an
+    Idempotency-Key header are executed at most once per user and key.
+    Responses with a 5xx status are not stored, so those can be retried.
+    """
+    @wraps(view_method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if not key:
+            return view_method(self, request, *args, **kwargs)
+        if len(key) > 255:
+            return Response({"detail": f"{IDEMPOTENCY_HEADER} must be at most 255 characters."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        require_shared_cache()
+
+        digest = hashlib.sha256(f"{request.user.pk}:{request.method}:{request.path}:{key}".encode()).hexdigest()
+        response_key = f"{CACHE_PREFIX}:response:{digest}"
+        lock_key = f"{CACHE_PREFIX}:lock:{digest}"
+        fingerprint = _fingerprint(request)
+
+        stored = cache.get(response_key)
+        if stored is not None:
+            return _replay(stored, fingerprint)
+        if not cache.add(lock_key, True, LOCK_SECONDS):
+            return Response({"detail": "A request with this Idempotency-Key is already in progress."},
+                            status=status.HTTP_409_CONFLICT)
+        try:
+            # The first attempt may have finished between the read and the lock.
+            stored = cache.get(response_key)
+            if stored is not None:
+                return _replay(stored, fingerprint)
+            try:
+                response = view_method(self, request, *args, **kwargs)
+            except Exception as exc:
+                # Store the error response of the first attempt too (e.g. a duplicate bid).
+                response = self.handle_exception(exc)
+            if response.status_code < 500:
+                cache.set(response_key, {
+                    "fingerprint": fingerprint,
+                    "status": response.status_code,
+                    "data": response.data,
+                }, get_ttl())
+            return response
+        finally:
+            cache.delete(lock_key)
+
+    return wrapper
+
+
+def _replay(stored, fingerprint):
+    if stored["fingerprint"] != fingerprint:
+        return Response({"detail": f"{IDEMPOTENCY_HEADER} was already used with a different payload."},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY)
+    return Response(stored["data"], status=stored["status"], headers={"Idempotent-Replayed": "true"})
@@ -0,0 +1,42 @@
+import random
+import time
+
+from django.contrib.gis.geos import Point
+from django.core.management.base import BaseCommand
+
+from base.utils import calculate_distance, calculate_distances
+
+
+class Command(BaseCommand):
+    help = "Benchmarks calculate_distances (vectorized haversine) against per-pair geodesic calculate_distance."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+        parser.add_argument('--radius', type=float, default=0.5,
+                            help="Spread of the random points around the origin, in degrees.")
+        parser.add_argument('--seed', type=int, default=7)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        origin = Point(90.4125, 23.8103, srid=4326)  # Dhaka
+        spread = options['radius']
+
+        self.stdout.write(f"{'points':>8} {'geodesic ms':>12} {'batch ms':>10} {'speedup':>8} {'max err %':>10}")
+        for size in options['sizes']:
+            points = [
+                Point(origin.x + rng.uniform(-spread, spread), origin.y + rng.uniform(-spread, spread), srid=4326)
+                for _ in range(size)
+            ]
+
+            started = time.perf_counter()
+            exact = [calculate_distance(origin, point) for point in points]
+            geodesic_ms = (time.perf_counter() - started) * 1000
+
+            started = time.perf_counter()
+            batch = calculate_distances(origin, points)
+            batch_ms = (time.perf_counter() - started) * 1000
+
+            max_error = max(abs(b - e) / e for b, e in zip(batch, exact) if e)
+            self.stdout.write(
+                f"{size:>8} {geodesic_ms:>12.1f} {batch_ms:>10.2f} {geodesic_ms / batch_ms:>7.0f}x {max_error * 100:>10.3f}"
+            )
@@ -0,0 +1,111 @@
+import time
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.contrib.gis.geos import Point
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from base.matching import candidate_queryset, load_candidates, score_candidates, top_matches
+from base.models import TeacherProfile, TeacherSearchIndex
+from base.utils import SLOTS_PER_DAY
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks the full matching path on synthetic tutors: the indexed SQL "
+        "candidate fetch (candidate_queryset + load_candidates), then score_candidates "
+        "for every job. The tutors are inserted in a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--jobs', type=int, default=1000)
+        parser.add_argument('--tutors', type=int, default=50000)
+        parser.add_argument('--subjects', type=int, default=120)
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=7)
+
+    def handle(self, *args, **options):
+        rng = np.random.default_rng(options['seed'])
+        with transaction.atomic():
+            self.make_tutors(rng, options['tutors'], options['subjects'])
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {TeacherSearchIndex._meta.db_table}")
+            self.run(rng, options)
+            transaction.set_rollback(True)
+
+    def run(self, rng, options):
+        fetch_seconds = score_seconds = 0.0
+        candidates_total = 0
+        origin_lon, origin_lat = 90.4125, 23.8103
+        for _ in range(options['jobs']):
+            schedule = np.zeros(7, dtype=np.int64)
+            for day in rng.choice(7, size=3, replace=False):
+                start = int(rng.integers(28, SLOTS_PER_DAY - 4))
+                schedule[day] = ((1 << 4) - 1) << start
+            features = {
+                "posted_by_id": None,
+                "subject_ids": rng.choice(options['subjects'], size=rng.integers(1, 4), replace=False).tolist(),
+                "grade_id": None,
+                "medium_id": None,
+                "gender": '',
+                "teaching_mode": 'offline',
+                "minimum_qualification": '',
+                "budget": float(rng.integers(3, 20) * 1000),
+                "location": Point(origin_lon + rng.uniform(-0.5, 0.5), origin_lat + rng.uniform(-0.5, 0.5), srid=4326),
+                "schedule_mask": schedule,
+            }
+
+            started = time.perf_counter()
+            candidates = load_candidates(candidate_queryset(features))
+            fetch_seconds += time.perf_counter() - started
+
+            started = time.perf_counter()
+            scores, distances = score_candidates(features, candidates)
+            top_matches(candidates["teacher_id"], scores, distances, options['limit'])
+            score_seconds += time.perf_counter() - started
+            candidates_total += len(candidates["teacher_id"])
+
+        jobs = options['jobs']
+        self.stdout.write(f"jobs={jobs} tutors={options['tutors']} avg candidates/job={candidates_total / jobs:.0f}")
+        self.stdout.write(f"SQL fetch: {fetch_seconds:.2f}s total, {fetch_seconds / jobs * 1000:.3f} ms/job")
+        self.stdout.write(f"scoring:   {score_seconds:.2f}s total, {score_seconds / jobs * 1000:.3f} ms/job")
+
+    def make_tutors(self, rng, count, subjects):
+        """
+        Inserts `count` tutors with bulk writes. Signals are not sent, so the
+        search index rows are written directly.
+        """
+        users = get_user_model().objects.bulk_create(
+            [get_user_model()(username=f"bench-tutor-{index}", password="!", is_teacher=True) for index in range(count)],
+            batch_size=5000,
+        )
+        masks = np.zeros((count, 7), dtype=np.int64)
+        for day in range(7):
+            start = rng.integers(16, SLOTS_PER_DAY - 12, size=count)
+            width = rng.integers(4, 12, size=count)
+            masks[:, day] = ((np.int64(1) << width) - 1) << start
+        teachers = TeacherProfile.objects.bulk_create(
+            [TeacherProfile(user=user, availability_mask=mask.tolist()) for user, mask in zip(users, masks)],
+            batch_size=5000,
+        )
+
+        subject_matrix = rng.random((count, subjects)) < 3 / subjects
+        min_salary = rng.integers(2, 25, size=count) * 1000
+        rating_average = rng.uniform(0, 5, size=count)
+        rating_count = rng.integers(0, 40, size=count)
+        experience_years = rng.integers(0, 15, size=count)
+        verified = rng.random(count) < 0.4
+        preferred_distance = rng.choice([0, 5, 10, 20], size=count)
+        lon = 90.4125 + rng.uniform(-0.6, 0.6, size=count)
+        lat = 23.8103 + rng.uniform(-0.6, 0.6, size=count)
+        TeacherSearchIndex.objects.bulk_create([
+            TeacherSearchIndex(
+                teacher=teacher, subject_ids=np.flatnonzero(subject_matrix[index]).tolist(),
+                min_salary=int(min_salary[index]), rating_average=float(rating_average[index]),
+                rating_count=int(rating_count[index]), experience_years=int(experience_years[index]),
+                verified=bool(verified[index]), preferred_distance=int(preferred_distance[index]),
+                location=Point(float(lon[index]), float(lat[index]), srid=4326),
+            )
+            for index, teacher in enumerate(teachers)
+        ], batch_size=5000)
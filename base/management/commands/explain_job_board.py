@@ -0,0 +1,58 @@
+import re
+
+from django.contrib.gis.geos import Point
+from django.core.management.base import BaseCommand
+
+from base.models import Grade, JobPost, Medium, Subject
+from base.utils import apply_job_filters
+
+INDEX_PATTERN = re.compile(r"(?:Index Scan|Index Only Scan|Bitmap Index Scan) (?:Backward )?(?:using|on) (\w+)")
+SEQ_SCAN_PATTERN = re.compile(r"Seq Scan on (\w+)")
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs EXPLAIN on the job board query for every filter combination and reports the indexes "
+        "the planner picks. Run it against a production sized database; on a few rows the planner "
+        "prefers sequential scans whatever the indexes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--analyze', action='store_true', help="Use EXPLAIN ANALYZE (executes the queries).")
+        parser.add_argument('--page-size', type=int, default=20)
+        parser.add_argument('--lon', type=float, default=90.4125)
+        parser.add_argument('--lat', type=float, default=23.8103)
+        parser.add_argument('--distance', type=float, default=5, help="Radius filter in km.")
+
+    def combinations(self, options):
+        grade = Grade.objects.values_list('id', flat=True).first()
+        medium = Medium.objects.values_list('id', flat=True).first()
+        subject = Subject.objects.values_list('id', flat=True).first()
+        distance = str(options['distance'])
+        return [
+            ("no filter", {}),
+            ("status", {'status': 'open'}),
+            ("closed", {'status': 'closed'}),
+            ("status+subject", {'status': 'open', 'subject': str(subject)}),
+            ("status+grade", {'status': 'open', 'grade': str(grade)}),
+            ("status+medium", {'status': 'open', 'medium': str(medium)}),
+            ("status+budget", {'status': 'open', 'budget_min': '3000', 'budget_max': '8000'}),
+            ("status+distance", {'status': 'open', 'distance': distance}),
+            ("status+mode+gender", {'status': 'open', 'teaching_mode': 'offline', 'gender': 'female'}),
+            ("all", {'status': 'open', 'subject': str(subject), 'grade': str(grade), 'medium': str(medium),
+                     'budget_min': '3000', 'teaching_mode': 'offline', 'distance': distance}),
+        ]
+
+    def handle(self, *args, **options):
+        location = Point(options['lon'], options['lat'], srid=4326)
+        page = options['page_size'] + 1
+        self.stdout.write(f"{'filters':<20} {'seq scan':<9} indexes")
+        for label, params in self.combinations(options):
+            queryset = apply_job_filters(JobPost.objects.all(), params, location).order_by('-created_at', '-id')
+            plan = queryset[:page].explain(analyze=options['analyze'])
+            indexes = sorted(set(INDEX_PATTERN.findall(plan)))
+            seq_scan = JobPost._meta.db_table in SEQ_SCAN_PATTERN.findall(plan)
+            line = f"{label:<20} {'yes' if seq_scan else 'no':<9} {', '.join(indexes) or '-'}"
+            self.stdout.write(self.style.WARNING(line) if seq_scan else line)
+            if options['verbosity'] > 1:
+                self.stdout.write(plan + "\n")
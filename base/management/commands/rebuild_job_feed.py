@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from base.matching import refresh_job_feed
+from base.models import JobFeedEntry, JobPost
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the precomputed teacher job feeds from the open job posts."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200, help="Jobs matched per transaction.")
+
+    def handle(self, *args, **options):
+        JobFeedEntry.objects.exclude(job__status='open').delete()
+        job_ids = list(JobPost.objects.filter(status='open').order_by('id').values_list('id', flat=True))
+        batch_size = options['batch_size']
+        for start in range(0, len(job_ids), batch_size):
+            refresh_job_feed(job_ids[start:start + batch_size])
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt the feed entries of {len(job_ids)} jobs."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from base.utils import refresh_teacher_search_index
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the denormalized TeacherSearchIndex from the teacher profiles."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500, help="Rows upserted per statement.")
+
+    def handle(self, *args, **options):
+        written = refresh_teacher_search_index(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f"Indexed {written} teachers."))
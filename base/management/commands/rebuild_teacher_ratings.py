@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from base.utils import rebuild_teacher_ratings, refresh_teacher_search_index
+
+
+class Command(BaseCommand):
+    help = "Recomputes the rating summary of the teacher profiles from their reviews and re-indexes them."
+
+    def add_arguments(self, parser):
+        parser.add_argument('teacher_ids', nargs='*', type=int, help="Teacher profile ids (all teachers when omitted).")
+
+    def handle(self, *args, **options):
+        teacher_ids = options['teacher_ids'] or None
+        updated = rebuild_teacher_ratings(teacher_ids)
+        refresh_teacher_search_index(teacher_ids)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt the rating summary of {updated} teachers."))
@@ -0,0 +1,83 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, IntegerField, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from base.models import ContactRequest, UserDashboard
+from base.utils import DASHBOARD_COUNTERS
+
+
+def _count(requests, user_field, user_ref):
+    """
+    Number of `requests` whose `user_field` is the outer row's `user_ref`, as a correlated subquery.
+    """
+    counts = (requests.filter(**{user_field: OuterRef(user_ref)}).order_by()
+              .values(user_field).annotate(total=Count('id')).values('total'))
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+
+def expected_counters(user_ref='user_id') -> dict:
+    """
+    The dashboard counters recomputed from the contact requests, as expressions
+    correlated to the user id column `user_ref` of the outer query.
+    """
+    return {
+        'total_requests_sent': _count(ContactRequest.objects.all(), 'student_id', user_ref),
+        'total_requests_received': _count(ContactRequest.objects.all(), 'teacher__user_id', user_ref),
+        'total_pending_requests': _count(ContactRequest.objects.filter(status='pending'), 'student_id', user_ref),
+    }
+
+
+def drifted_dashboards():
+    drift = Q()
+    for field, expected in expected_counters().items():
+        drift |= ~Q(**{field: expected})
+    return UserDashboard.objects.filter(drift)
+
+
+class Command(BaseCommand):
+    help = (
+        "Recomputes the UserDashboard counters from the contact requests and fixes any drift. "
+        "Safe to run periodically (e.g. from cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Dashboards locked and fixed per transaction.")
+        parser.add_argument('--dry-run', action='store_true', help="Only report the drifted dashboards.")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        # Users with requests but no dashboard row yet.
+        missing = [
+            UserDashboard(user_id=row.pop('id'), **row)
+            for row in (get_user_model().objects.filter(request_manager__isnull=True)
+                        .annotate(**expected_counters('id'))
+                        .filter(Q(total_requests_sent__gt=0) | Q(total_requests_received__gt=0))
+                        .values('id', *DASHBOARD_COUNTERS))
+        ]
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(
+                f"Found {drifted_dashboards().count()} drifted dashboards and {len(missing)} missing ones."
+            ))
+            return
+
+        fixed, last_id = 0, 0
+        while True:
+            with transaction.atomic():
+                # Lock the drifted rows first: the F() bumps of concurrent request
+                # writes wait for the lock, and the UPDATE below (a new statement,
+                # so a new snapshot) counts every request committed before it.
+                ids = list(
+                    drifted_dashboards().filter(id__gt=last_id).order_by('id')
+                    .select_for_update().values_list('id', flat=True)[:batch_size]
+                )
+                if not ids:
+                    break
+                fixed += UserDashboard.objects.filter(id__in=ids).update(**expected_counters())
+            last_id = ids[-1]
+        UserDashboard.objects.bulk_create(missing, batch_size=batch_size, ignore_conflicts=True)
+        self.stdout.write(self.style.SUCCESS(
+            f"Fixed {fixed} drifted dashboards and {len(missing)} missing ones."
+        ))
@@ -0,0 +1,54 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max, OuterRef, Subquery
+
+from base.models import BidJob, JobPost
+
+
+class Command(BaseCommand):
+    help = "Recomputes JobPost.bids_count, last_bid_at and accepted_bid from the bids and fixes any drift."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help="Job posts locked and fixed per transaction.")
+        parser.add_argument('--dry-run', action='store_true', help="Only report the drifted jobs.")
+
+    def handle(self, *args, **options):
+        batch_size, dry_run = options['batch_size'], options['dry_run']
+        fixed, last_id = 0, 0
+        while True:
+            with transaction.atomic():
+                # Lock the batch first: the F() bumps of concurrent bid writes wait
+                # for the lock, and the recount below (a new statement, so a new
+                # snapshot) sees every bid committed before it.
+                jobs = JobPost.objects.filter(id__gt=last_id).order_by('id')
+                if not dry_run:
+                    jobs = jobs.select_for_update()
+                ids = list(jobs.values_list('id', flat=True)[:batch_size])
+                if not ids:
+                    break
+                drifted = self.drifted(ids)
+                if drifted and not dry_run:
+                    JobPost.objects.bulk_update(drifted, ['bids_count', 'last_bid_at', 'accepted_bid'])
+                fixed += len(drifted)
+            last_id = ids[-1]
+
+        verb = "Found" if dry_run else "Fixed"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {fixed} job posts with drifted bid counters."))
+
+    def drifted(self, ids):
+        """
+        The jobs among `ids` whose counters differ from their bids, carrying the recomputed values.
+        """
+        accepted = BidJob.objects.filter(job=OuterRef('pk'), status='accepted').order_by('-created_at', '-id')
+        jobs = (
+            JobPost.objects.filter(id__in=ids)
+            .annotate(actual_count=Count('bids'), actual_last=Max('bids__created_at'),
+                      actual_accepted=Subquery(accepted.values('id')[:1]))
+            .values_list('id', 'bids_count', 'last_bid_at', 'accepted_bid_id',
+                         'actual_count', 'actual_last', 'actual_accepted')
+        )
+        return [
+            JobPost(id=job_id, bids_count=actual_count, last_bid_at=actual_last, accepted_bid_id=actual_accepted)
+            for job_id, count, last, accepted_id, actual_count, actual_last, actual_accepted in jobs
+            if (count, last, accepted_id) != (actual_count, actual_last, actual_accepted)
+        ]
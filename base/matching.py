@@ -0,0 +1,356 @@
+"""
+Job-to-tutor matching.
+
+match_tutors() prefilters tutors in SQL against the indexed TeacherSearchIndex
+(GIN id arrays, GiST location) and then scores every surviving candidate in a
+single vectorized NumPy pass (score_candidates), so the cost per job is one
+query plus array arithmetic instead of per-row Python scoring.
+"""
+import math
+
+import numpy as np
+from django.contrib.gis.db.models.functions import GeometryDistance
+from django.contrib.gis.measure import D
+from django.db import transaction
+from django.db.models import Case, F, FloatField, Q, Value, When
+
+from .models import (JobPost, JobFeedEntry, TeacherSearchIndex, QUALIFICATION_CHOICES,
+                     RATING_PRIOR_MEAN, RATING_PRIOR_WEIGHT)
+from .utils import haversine_km
+
+QUALIFICATION_RANK = {code: rank for rank, (code, _) in enumerate(QUALIFICATION_CHOICES)}
+
+# Relative weight of every score component, summing to 1.
+MATCH_WEIGHTS = {
+    "subjects": 0.30,
+    "salary": 0.20,
+    "distance": 0.15,
+    "schedule": 0.15,
+    "rating": 0.10,
+    "experience": 0.05,
+    "verified": 0.05,
+}
+# Tutors asking up to this much above the budget are still candidates, with a lower salary score.
+SALARY_TOLERANCE = 0.2
+# Matching radius of tutors who did not set a preferred_distance. A tutor's
+# radius bounds the offline jobs they match, and the distance score reaches 0 at it.
+DEFAULT_MATCH_DISTANCE_KM = 30
+EXPERIENCE_CAP_YEARS = 10
+# Upper bound of candidates scored per job, keeps a match bounded on dense areas.
+CANDIDATE_LIMIT = 5000
+
+CANDIDATE_FIELDS = (
+    'teacher_id', 'subject_ids', 'min_salary', 'rating_average', 'rating_count',
+    'experience_years', 'verified', 'preferred_distance', 'location', 'teacher__availability_mask',
+)
+
+
+def tutor_radius_km(preferred_distance):
+    """
+    Matching radius of tutors (scalar or array): their preferred_distance, or
+    DEFAULT_MATCH_DISTANCE_KM when it is unset (0).
+    """
+    preferred = np.asarray(preferred_distance, dtype=float)
+    return np.where(preferred > 0, preferred, DEFAULT_MATCH_DISTANCE_KM)
+
+
+def tutor_radius_meters():
+    """
+    tutor_radius_km() of TeacherSearchIndex rows as an SQL expression, in the
+    meters dwithin expects on a geography column.
+    """
+    return Case(
+        When(preferred_distance__gt=0, then=F('preferred_distance')),
+        default=Value(float(DEFAULT_MATCH_DISTANCE_KM)),
+        output_field=FloatField(),
+    ) * Value(1000.0)
+
+
+def job_features(job: JobPost) -> dict:
+    """
+    The attributes of a job the matching depends on.
+    """
+    location = job.posted_by.location
+    return {
+        "posted_by_id": job.posted_by_id,
+        "subject_ids": [subject.id for subject in job.subject_list.all()],
+        "grade_id": job.grade_id,
+        "medium_id": job.medium_id,
+        "gender": job.gender,
+        "teaching_mode": job.teaching_mode,
+        "minimum_qualification": job.minimum_qualification,
+        "budget": job.budget_salary,
+        "location": location,
+        "schedule_mask": np.asarray(job.schedule_mask or [0] * 7, dtype=np.int64),
+    }
+
+
+def candidate_queryset(features: dict):
+    """
+    SQL prefilter: hard requirements of the job, each served by an index of
+    TeacherSearchIndex. Soft preferences are left to score_candidates.
+    candidate_jobs applies the same rules from the tutor's side.
+    """
+    queryset = TeacherSearchIndex.objects.all()
+    if features.get("posted_by_id"):
+        # Never match a poster with their own teacher profile.
+        queryset = queryset.exclude(teacher__user_id=features["posted_by_id"])
+    if features["subject_ids"]:
+        queryset = queryset.filter(subject_ids__overlap=features["subject_ids"])
+    if features["grade_id"]:
+        queryset = queryset.filter(grade_ids__contains=[features["grade_id"]])
+    if features["medium_id"]:
+        queryset = queryset.filter(medium_ids__contains=[features["medium_id"]])
+    if features["gender"] in ('male', 'female'):
+        queryset = queryset.filter(gender=features["gender"])
+    if features["teaching_mode"] in ('online', 'offline'):
+        queryset = queryset.filter(teaching_mode__in=[features["teaching_mode"], 'any', ''])
+    if features["minimum_qualification"] in QUALIFICATION_RANK:
+        required = QUALIFICATION_RANK[features["minimum_qualification"]]
+        queryset = queryset.filter(
+            highest_qualification__in=[code for code, rank in QUALIFICATION_RANK.items() if rank >= required]
+        )
+    if features["budget"]:
+        queryset = queryset.filter(min_salary__lte=int(features["budget"] * (1 + SALARY_TOLERANCE)))
+
+    location = features["location"]
+    if features["teaching_mode"] != 'online':
+        # Offline jobs need both locations, within each tutor's own radius. The
+        # KNN ordering walks the GiST index nearest first.
+        if location is None:
+            return queryset.none()
+        queryset = queryset.filter(location__dwithin=(location, tutor_radius_meters()))
+        return queryset.order_by(GeometryDistance('location', location))
+    return queryset.order_by('-rating_score', '-rating_count', 'teacher_id')
+
+
+def load_candidates(queryset) -> dict:
+    """
+    Loads the prefiltered candidates into column arrays for score_candidates.
+    """
+    rows = list(queryset.values_list(*CANDIDATE_FIELDS)[:CANDIDATE_LIMIT])
+    count = len(rows)
+    subject_lengths = np.fromiter((len(row[1]) for row in rows), dtype=np.int64, count=count)
+    return {
+        "teacher_id": np.fromiter((row[0] for row in rows), dtype=np.int64, count=count),
+        # Subject ids of all candidates back to back; subject_lengths[i] belong to candidate i.
+        "subject_ids": np.fromiter((i for row in rows for i in row[1]), dtype=np.int64, count=int(subject_lengths.sum())),
+        "subject_lengths": subject_lengths,
+        "min_salary": np.fromiter((row[2] for row in rows), dtype=float, count=count),
+        "rating_average": np.fromiter((row[3] for row in rows), dtype=float, count=count),
+        "rating_count": np.fromiter((row[4] for row in rows), dtype=float, count=count),
+        "experience_years": np.fromiter((row[5] for row in rows), dtype=float, count=count),
+        "verified": np.fromiter((row[6] for row in rows), dtype=float, count=count),
+        "preferred_distance": np.fromiter((row[7] for row in rows), dtype=float, count=count),
+        "lon": np.fromiter((row[8].x if row[8] else np.nan for row in rows), dtype=float, count=count),
+        "lat": np.fromiter((row[8].y if row[8] else np.nan for row in rows), dtype=float, count=count),
+        "availability_mask": np.asarray([row[9] for row in rows], dtype=np.int64).reshape(count, 7),
+    }
+
+
+def score_candidates(features: dict, candidates: dict):
+    """
+    Scores all candidates of one job at once. Returns (scores, distances_km); a
+    score of 0 means the candidate breaks a hard constraint (e.g. the job is
+    outside the tutor's radius).
+    """
+    count = len(candidates["teacher_id"])
+
+    # Share of the job's subjects the tutor teaches.
+    job_subjects = np.asarray(features["subject_ids"], dtype=np.int64)
+    if len(job_subjects) and count:
+        owners = np.repeat(np.arange(count), candidates["subject_lengths"])
+        hits = np.bincount(owners[np.isin(candidates["subject_ids"], job_subjects)], minlength=count)
+        subjects = hits / len(job_subjects)
+    else:
+        subjects = np.ones(count)
+
+    location = features["location"]
+    job = {
+        "budget": float(features["budget"] or 0),
+        "online": features["teaching_mode"] == 'online',
+        "lon": location.x if location is not None else np.nan,
+        "lat": location.y if location is not None else np.nan,
+        "schedule_mask": features["schedule_mask"],
+    }
+    return combine_scores(job, candidates, subjects)
+
+
+def job_columns(features_list) -> dict:
+    """
+    The features of several jobs as column arrays, for score_jobs.
+    """
+    count = len(features_list)
+    subject_lengths = np.fromiter((len(features["subject_ids"]) for features in features_list), dtype=np.int64, count=count)
+    return {
+        "subject_ids": np.fromiter((i for features in features_list for i in features["subject_ids"]),
+                                   dtype=np.int64, count=int(subject_lengths.sum())),
+        "subject_lengths": subject_lengths,
+        "budget": np.fromiter((features["budget"] or 0 for features in features_list), dtype=float, count=count),
+        "online": np.fromiter((features["teaching_mode"] == 'online' for features in features_list), dtype=bool, count=count),
+        "lon": np.fromiter((features["location"].x if features["location"] is not None else np.nan
+                            for features in features_list), dtype=float, count=count),
+        "lat": np.fromiter((features["location"].y if features["location"] is not None else np.nan
+                            for features in features_list), dtype=float, count=count),
+        "schedule_mask": np.asarray([features["schedule_mask"] for features in features_list],
+                                    dtype=np.int64).reshape(count, 7),
+    }
+
+
+def score_jobs(jobs: dict, candidate: dict):
+    """
+    Scores one tutor (load_candidates() of a single row) against many jobs
+    (job_columns()) at once, with the rules of score_candidates.
+    Returns (scores, distances_km), one entry per job.
+    """
+    count = len(jobs["budget"])
+    lengths = jobs["subject_lengths"]
+    owners = np.repeat(np.arange(count), lengths)
+    hits = np.bincount(owners[np.isin(jobs["subject_ids"], candidate["subject_ids"])], minlength=count)
+    subjects = np.where(lengths > 0, hits / np.maximum(lengths, 1), 1.0)
+    return combine_scores(jobs, candidate, subjects)
+
+
+def combine_scores(job: dict, candidates: dict, subjects):
+    """
+    Weighted score of job/tutor pairs. The job columns and the candidate
+    columns are scalars or arrays that broadcast against each other, so the
+    same rules score one job against many tutors or one tutor against many jobs.
+    """
+    budget = np.asarray(job["budget"], dtype=float)
+    over = np.maximum(candidates["min_salary"] - budget, 0) / np.where(budget > 0, budget * SALARY_TOLERANCE, 1.0)
+    salary = np.where(budget > 0, np.clip(1 - over, 0, 1), 1.0)
+
+    distances = haversine_km(job["lon"], job["lat"], candidates["lon"], candidates["lat"])
+    radius = tutor_radius_km(candidates["preferred_distance"])
+    online = np.asarray(job["online"], dtype=bool)
+    # Offline jobs need a known distance within the tutor's radius (NaN compares False).
+    eligible = online | (distances <= radius)
+    distance = np.where(online, 1.0, np.nan_to_num(np.clip(1 - distances / radius, 0, 1)))
+
+    schedule_mask = np.asarray(job["schedule_mask"], dtype=np.int64)
+    required_slots = np.bitwise_count(schedule_mask).sum(axis=-1)
+    covered = np.bitwise_count(candidates["availability_mask"] & schedule_mask).sum(axis=-1)
+    schedule = np.where(required_slots > 0, covered / np.maximum(required_slots, 1), 1.0)
+
+    # The Bayesian average of TeacherProfile.rating_score, so few reviews pull towards the prior.
+    reviews = candidates["rating_count"]
+    rating = (candidates["rating_average"] * reviews + RATING_PRIOR_MEAN * RATING_PRIOR_WEIGHT) / (reviews + RATING_PRIOR_WEIGHT) / 5
+    experience = np.minimum(candidates["experience_years"], EXPERIENCE_CAP_YEARS) / EXPERIENCE_CAP_YEARS
+
+    scores = (
+        MATCH_WEIGHTS["subjects"] * subjects
+        + MATCH_WEIGHTS["salary"] * salary
+        + MATCH_WEIGHTS["distance"] * distance
+        + MATCH_WEIGHTS["schedule"] * schedule
+        + MATCH_WEIGHTS["rating"] * rating
+        + MATCH_WEIGHTS["experience"] * experience
+        + MATCH_WEIGHTS["verified"] * candidates["verified"]
+    )
+    return np.where(eligible, scores, 0.0), distances
+
+
+def top_matches(teacher_ids, scores, distances, limit: int) -> list[tuple]:
+    """
+    The best `limit` eligible candidates as (teacher_id, score, distance_km), best first.
+    """
+    eligible = np.flatnonzero(scores > 0)
+    if len(eligible) > limit:
+        eligible = eligible[np.argpartition(-scores[eligible], limit - 1)[:limit]]
+    ordered = eligible[np.lexsort((teacher_ids[eligible], -scores[eligible]))]
+    return [
+        (int(teacher_ids[index]), round(float(scores[index]), 4),
+         None if np.isnan(distances[index]) else round(float(distances[index]), 2))
+        for index in ordered
+    ]
+
+
+def match_tutors(job: JobPost, limit: int = 20) -> list[tuple]:
+    """
+    Ranked candidate tutors for a job as (teacher_id, score, distance_km).
+    """
+    features = job_features(job)
+    candidates = load_candidates(candidate_queryset(features))
+    scores, distances = score_candidates(features, candidates)
+    return top_matches(candidates["teacher_id"], scores, distances, limit)
+
+
+# --------------------------------------------------
+# TEACHER JOB FEED
+# --------------------------------------------------
+# A job posted this much later than another gains 1.0 rank, the whole score range.
+FEED_RECENCY_SECONDS = 7 * 24 * 3600
+# Most tutors a single job is pushed to, and most jobs considered for one tutor.
+FEED_FANOUT_LIMIT = 1000
+FEED_JOB_LIMIT = 500
+
+
+def feed_rank(score: float, job: JobPost) -> float:
+    return score + job.created_at.timestamp() / FEED_RECENCY_SECONDS
+
+
+def refresh_job_feed(job_ids) -> None:
+    """
+    Recomputes the feed entries of the given jobs: open jobs are pushed to their
+    best matching tutors, closed or deleted jobs leave every feed.
+    """
+    jobs = (
+        JobPost.objects.filter(id__in=list(job_ids), status='open')
+        .select_related('posted_by').prefetch_related('subject_list')
+    )
+    with transaction.atomic():
+        JobFeedEntry.objects.filter(job_id__in=list(job_ids)).delete()
+        entries = []
+        for job in jobs:
+            for teacher_id, score, _ in match_tutors(job, limit=FEED_FANOUT_LIMIT):
+                entries.append(JobFeedEntry(teacher_id=teacher_id, job=job, score=score, rank=feed_rank(score, job)))
+        JobFeedEntry.objects.bulk_create(entries, batch_size=1000)
+
+
+def candidate_jobs(entry: TeacherSearchIndex):
+    """
+    SQL prefilter of the open jobs a tutor can match, the mirror image of candidate_queryset.
+    """
+    tutor_rank = QUALIFICATION_RANK.get(entry.highest_qualification, -1)
+    queryset = (
+        JobPost.objects.filter(status='open')
+        .exclude(posted_by__teacher_profile__id=entry.teacher_id)
+        .filter(Q(subject_list__isnull=True) | Q(subject_list__in=entry.subject_ids))
+        .filter(Q(grade__isnull=True) | Q(grade_id__in=entry.grade_ids))
+        .filter(Q(medium__isnull=True) | Q(medium_id__in=entry.medium_ids))
+        .exclude(gender__in={'male', 'female'} - {entry.gender})
+        .exclude(minimum_qualification__in=[code for code, rank in QUALIFICATION_RANK.items() if rank > tutor_rank])
+        .filter(Q(budget_salary=0) | Q(budget_salary__gte=math.ceil(entry.min_salary / (1 + SALARY_TOLERANCE))))
+    )
+    if entry.teaching_mode in ('online', 'offline'):
+        queryset = queryset.exclude(teaching_mode__in={'online', 'offline'} - {entry.teaching_mode})
+    if entry.location is not None:
+        radius = float(tutor_radius_km(entry.preferred_distance))
+        queryset = queryset.filter(
+            Q(teaching_mode='online') | Q(posted_by__location__dwithin=(entry.location, D(km=radius)))
+        )
+    else:
+        queryset = queryset.filter(teaching_mode='online')
+    return queryset.distinct().order_by('-created_at')
+
+
+def refresh_teacher_feed(teacher_ids) -> None:
+    """
+    Recomputes the whole feed of the given tutors after their profile changed.
+    """
+    for entry in TeacherSearchIndex.objects.filter(teacher_id__in=list(teacher_ids)):
+        candidate = load_candidates(TeacherSearchIndex.objects.filter(teacher_id=entry.teacher_id))
+        jobs = list(
+            candidate_jobs(entry)
+            .select_related('posted_by').prefetch_related('subject_list')[:FEED_JOB_LIMIT]
+        )
+        # Every job scored in one vectorized pass.
+        scores, _ = score_jobs(job_columns([job_features(job) for job in jobs]), candidate)
+        entries = []
+        for job, score in zip(jobs, scores):
+            if score > 0:
+                score = round(float(score), 4)
+                entries.append(JobFeedEntry(teacher_id=entry.teacher_id, job=job, score=score, rank=feed_rank(score, job)))
+        with transaction.atomic():
+            JobFeedEntry.objects.filter(teacher_id=entry.teacher_id).delete()
+            JobFeedEntry.objects.bulk_create(entries, batch_size=1000)
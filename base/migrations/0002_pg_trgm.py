@@ -0,0 +1,16 @@
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Enables pg_trgm, required by the gin_trgm_ops indexes of the teacher search.
+    """
+
+    dependencies = [
+        ('base', '0001_initial'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+    ]
@@ -0,0 +1,199 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:13
+
+import base.models
+import django.contrib.gis.db.models.fields
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0002_pg_trgm'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Medium',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='banned',
+            field=models.BooleanField(default=False, help_text='Indicates if the user is banned from the platform.'),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='location',
+            field=django.contrib.gis.db.models.fields.PointField(blank=True, geography=True, help_text='The geographical location of the user.', null=True, srid=4326),
+        ),
+        migrations.CreateModel(
+            name='Grade',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text="The name of the grade (e.g., '10th', '12th ')", max_length=50, unique=True)),
+                ('sequence', models.PositiveIntegerField(help_text="The sequence number of the grade (e.g., 10 for '10th Grade', 12 for '12th Grade')", unique=True)),
+                ('medium', models.ManyToManyField(blank=True, related_name='mediums', to='base.medium')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Subject',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('description', models.TextField(blank=True, help_text='A brief description of the subject.', null=True)),
+                ('subject_code', models.CharField(blank=True, help_text="A unique code for the subject (e.g., 'MATH101', 'PHY202')", max_length=20, null=True, unique=True)),
+                ('grade', models.ForeignKey(blank=True, help_text='The grade level for which this subject is applicable.', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='subjects', to='base.grade')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='JobPost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('open', 'Open'), ('closed', 'Closed')], default='open', max_length=10)),
+                ('title', models.CharField(max_length=255)),
+                ('phone', models.CharField(blank=True, help_text='Contact phone number for the job post.', max_length=20, null=True)),
+                ('description', models.TextField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('budget_salary', models.PositiveIntegerField(default=0, help_text='Minimum expected salary for the job post.')),
+                ('gender', models.CharField(blank=True, choices=[('male', 'Male'), ('female', 'Female'), ('any', 'Any')], max_length=20)),
+                ('teaching_mode', models.CharField(blank=True, choices=[('online', 'Online'), ('offline', 'Offline'), ('any', 'Any')], max_length=20)),
+                ('minimum_qualification', models.CharField(blank=True, choices=[('ssc', 'SSC'), ('hsc', 'HSC'), ('degree', 'Degree'), ('honours', 'Honours'), ('master', 'Master'), ('phd', 'PhD')], help_text='The highest educational qualification required for the job.', max_length=50)),
+                ('grade', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='job_posts', to='base.grade')),
+                ('posted_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='job_posts', to=settings.AUTH_USER_MODEL)),
+                ('medium', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='job_posts', to='base.medium')),
+                ('subject_list', models.ManyToManyField(blank=True, related_name='job_posts', to='base.subject')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TeacherProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('verified', models.BooleanField(default=False, help_text="Indicates if the teacher's profile has been verified by an admin.")),
+                ('bio', models.TextField(blank=True, help_text='A brief biography of the teacher.', null=True)),
+                ('phone', models.CharField(blank=True, help_text='Contact phone number of the teacher.', max_length=20, null=True)),
+                ('highest_qualification', models.CharField(blank=True, choices=[('ssc', 'SSC'), ('hsc', 'HSC'), ('degree', 'Degree'), ('honours', 'Honours'), ('master', 'Master'), ('phd', 'PhD')], help_text='The highest educational qualification of the teacher.', max_length=50)),
+                ('min_salary', models.PositiveIntegerField(default=0)),
+                ('experience_years', models.PositiveIntegerField(default=0)),
+                ('gender', models.CharField(blank=True, choices=[('male', 'Male'), ('female', 'Female'), ('any', 'Any')], max_length=20)),
+                ('teaching_mode', models.CharField(blank=True, choices=[('online', 'Online'), ('offline', 'Offline'), ('any', 'Any')], max_length=20)),
+                ('preferred_distance', models.DecimalField(decimal_places=2, default=0, help_text='Preferred distance for teaching in kilometers', max_digits=5)),
+                ('profile_picture', models.ImageField(blank=True, help_text='Profile picture of the teacher.', null=True, upload_to=base.models.profile_picture_upload_to)),
+                ('grade_list', models.ManyToManyField(blank=True, help_text='The grades this tutor can teach.', related_name='tutors', to='base.grade')),
+                ('medium_list', models.ManyToManyField(blank=True, related_name='teacher_profiles', to='base.medium')),
+                ('subject_list', models.ManyToManyField(blank=True, help_text='The subjects this tutor can teach.', related_name='tutors', to='base.subject')),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='teacher_profile', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Qualification',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('organization', models.CharField(blank=True, max_length=255)),
+                ('skill', models.CharField(max_length=100)),
+                ('year', models.PositiveIntegerField(blank=True, null=True)),
+                ('results', models.TextField(blank=True, null=True)),
+                ('certificates', models.FileField(blank=True, null=True, upload_to=base.models.certificate_upload_to)),
+                ('validated', models.BooleanField(default=False)),
+                ('teacher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='qualifications', to='base.teacherprofile')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ContactRequest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('student_name', models.CharField(max_length=100)),
+                ('student_phone', models.CharField(max_length=20)),
+                ('message', models.TextField(blank=True)),
+                ('fee_budget', models.PositiveIntegerField(default=0, help_text='Approximate budget for tuition')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('seen', 'Seen'), ('accepted', 'Accepted'), ('rejected', 'Rejected'), ('contacted', 'Contacted'), ('closed', 'Closed')], default='pending', max_length=20)),
+                ('email_opened_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='sent_requests', to=settings.AUTH_USER_MODEL)),
+                ('teacher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='received_requests', to='base.teacherprofile')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='BidJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('proposed_salary', models.PositiveIntegerField(help_text='The salary proposed by the tutor for the   job.')),
+                ('message', models.TextField(blank=True, help_text='An optional message from the tutor.', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('seen', 'Seen'), ('accepted', 'Accepted'), ('rejected', 'Rejected'), ('contacted', 'Contacted'), ('closed', 'Closed')], default='pending', max_length=20)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bids', to='base.jobpost')),
+                ('tutor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='bids', to='base.teacherprofile')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='AcademicProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('institution', models.CharField(max_length=250)),
+                ('degree', models.CharField(max_length=100)),
+                ('graduation_year', models.PositiveIntegerField()),
+                ('results', models.TextField(blank=True)),
+                ('certificates', models.FileField(blank=True, null=True, upload_to=base.models.certificate_upload_to)),
+                ('validated', models.BooleanField(default=False, help_text='Indicates if the academic profile has been validated by an admin.')),
+                ('teacher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='academic_profile', to='base.teacherprofile')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TeacherReview',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rating', models.PositiveIntegerField(help_text='Rating given by the student (1-5).')),
+                ('comment', models.TextField(blank=True, help_text='Optional comment about the teacher.', null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('contact_request', models.OneToOneField(help_text='The contact request associated with this review.', on_delete=django.db.models.deletion.CASCADE, related_name='teacher_review', to='base.contactrequest')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UserDashboard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('total_requests_sent', models.PositiveIntegerField(default=0)),
+                ('total_requests_received', models.PositiveIntegerField(default=0)),
+                ('total_pending_requests', models.PositiveIntegerField(default=0)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='request_manager', to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='JobPostAvailability',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_time', models.TimeField(help_text='The start time of the availability slot.')),
+                ('end_time', models.TimeField(help_text='The end time of the availability slot.')),
+                ('days_of_week', models.CharField(choices=[('MO', 'Monday'), ('TU', 'Tuesday'), ('WE', 'Wednesday'), ('TH', 'Thursday'), ('FR', 'Friday'), ('SA', 'Saturday'), ('SU', 'Sunday')], help_text='The day of the week for this availability slot.', max_length=3)),
+                ('job_post', models.ForeignKey(help_text='The job post associated with this availability slot.', on_delete=django.db.models.deletion.CASCADE, related_name='availabilities', to='base.jobpost')),
+            ],
+            options={
+                'verbose_name': 'Job Post Availability Slot',
+                'verbose_name_plural': 'Job Post Availability Slots',
+                'ordering': ['job_post__title', 'start_time'],
+                'unique_together': {('job_post', 'start_time', 'end_time', 'days_of_week')},
+            },
+        ),
+        migrations.CreateModel(
+            name='Availability',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_time', models.TimeField(help_text='The start time of the availability slot.')),
+                ('end_time', models.TimeField(help_text='The end time of the availability slot.')),
+                ('days_of_week', models.CharField(choices=[('MO', 'Monday'), ('TU', 'Tuesday'), ('WE', 'Wednesday'), ('TH', 'Thursday'), ('FR', 'Friday'), ('SA', 'Saturday'), ('SU', 'Sunday')], help_text='The day of the week for this availability slot.', max_length=3)),
+                ('tutor', models.ForeignKey(help_text='The tutor associated with this availability slot.', on_delete=django.db.models.deletion.CASCADE, related_name='availabilities', to='base.teacherprofile')),
+            ],
+            options={
+                'verbose_name': 'Availability Slot',
+                'verbose_name_plural': 'Availability Slots',
+                'ordering': ['tutor__user__username', 'start_time'],
+                'unique_together': {('tutor', 'start_time', 'end_time', 'days_of_week')},
+            },
+        ),
+    ]
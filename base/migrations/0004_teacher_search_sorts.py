@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0003_baseline_schema'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='teacherprofile',
+            index=models.Index(fields=['min_salary', 'id'], name='teacher_salary_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teacherprofile',
+            index=models.Index(fields=['-experience_years', 'id'], name='teacher_experience_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:13
+
+import django.contrib.gis.db.models.fields
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0004_teacher_search_sorts'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TeacherSearchIndex',
+            fields=[
+                ('teacher', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_index', serialize=False, to='base.teacherprofile')),
+                ('name', models.CharField(blank=True, max_length=300)),
+                ('location', django.contrib.gis.db.models.fields.PointField(blank=True, geography=True, null=True, srid=4326)),
+                ('gender', models.CharField(blank=True, choices=[('male', 'Male'), ('female', 'Female'), ('any', 'Any')], max_length=20)),
+                ('teaching_mode', models.CharField(blank=True, choices=[('online', 'Online'), ('offline', 'Offline'), ('any', 'Any')], max_length=20)),
+                ('highest_qualification', models.CharField(blank=True, choices=[('ssc', 'SSC'), ('hsc', 'HSC'), ('degree', 'Degree'), ('honours', 'Honours'), ('master', 'Master'), ('phd', 'PhD')], max_length=50)),
+                ('min_salary', models.PositiveIntegerField(default=0)),
+                ('experience_years', models.PositiveIntegerField(default=0)),
+                ('preferred_distance', models.DecimalField(decimal_places=2, default=0, max_digits=5)),
+                ('verified', models.BooleanField(default=False)),
+                ('grade_ids', django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), blank=True, default=list, size=None)),
+                ('subject_ids', django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), blank=True, default=list, size=None)),
+                ('medium_ids', django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), blank=True, default=list, size=None)),
+                ('maximum_grade', models.CharField(blank=True, max_length=50)),
+                ('maximum_grade_sequence', models.PositiveIntegerField(blank=True, null=True)),
+                ('medium_names', models.TextField(blank=True)),
+                ('rating_average', models.FloatField(default=0, help_text='Average review rating, 0 when the tutor has no reviews.')),
+                ('rating_count', models.PositiveIntegerField(default=0)),
+                ('profile_picture', models.CharField(blank=True, max_length=500)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RemoveIndex(
+            model_name='teacherprofile',
+            name='teacher_salary_keyset_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='teacherprofile',
+            name='teacher_experience_keyset_idx',
+        ),
+        migrations.AddIndex(
+            model_name='teachersearchindex',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['grade_ids'], name='search_grade_ids_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='teachersearchindex',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['subject_ids'], name='search_subject_ids_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='teachersearchindex',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['medium_ids'], name='search_medium_ids_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='teachersearchindex',
+            index=models.Index(fields=['min_salary', 'teacher'], name='search_salary_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teachersearchindex',
+            index=models.Index(fields=['-experience_years', 'teacher'], name='search_experience_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teachersearchindex',
+            index=models.Index(fields=['-rating_average', '-rating_count', 'teacher'], name='search_rating_keyset_idx'),
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:13
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0005_teacher_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='teachersearchindex',
+            name='bio',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name='teachersearchindex',
+            name='credentials',
+            field=models.TextField(blank=True, help_text='Academic degrees/institutions and qualification skills/organizations.'),
+        ),
+        migrations.AddField(
+            model_name='teachersearchindex',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='teachersearchindex',
+            name='subject_details',
+            field=models.TextField(blank=True, help_text='Subject descriptions and codes.'),
+        ),
+        migrations.AddField(
+            model_name='teachersearchindex',
+            name='subject_names',
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddIndex(
+            model_name='subject',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='subject_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='teachersearchindex',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='search_vector_gin'),
+        ),
+        migrations.AddIndex(
+            model_name='teachersearchindex',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['name'], name='search_name_trgm', opclasses=['gin_trgm_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='teachersearchindex',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['subject_names'], name='search_subject_names_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:13
+
+import base.models
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+SLOT_MINUTES = 30
+DAYS = ['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU']
+
+
+def range_mask(start_time, end_time, cover):
+    # Frozen copy of base.utils.time_range_mask.
+    start = start_time.hour * 60 + start_time.minute
+    end = end_time.hour * 60 + end_time.minute
+    if end_time.second or end_time.microsecond:
+        end += 1
+    if cover:
+        first, last = -(-start // SLOT_MINUTES), end // SLOT_MINUTES
+    else:
+        first, last = start // SLOT_MINUTES, -(-end // SLOT_MINUTES)
+    return ((1 << (last - first)) - 1) << first if last > first else 0
+
+
+def backfill(Owner, Slot, owner_field, mask_field, cover):
+    masks = {}
+    for owner_id, day, start_time, end_time in Slot.objects.values_list(
+            f'{owner_field}_id', 'days_of_week', 'start_time', 'end_time').iterator():
+        if day in DAYS:
+            mask = masks.setdefault(owner_id, [0] * 7)
+            mask[DAYS.index(day)] |= range_mask(start_time, end_time, cover)
+    Owner.objects.bulk_update([Owner(id=owner_id, **{mask_field: mask}) for owner_id, mask in masks.items()],
+                              [mask_field], batch_size=1000)
+
+
+def backfill_masks(apps, schema_editor):
+    backfill(apps.get_model('base', 'TeacherProfile'), apps.get_model('base', 'Availability'),
+             'tutor', 'availability_mask', cover=True)
+    backfill(apps.get_model('base', 'JobPost'), apps.get_model('base', 'JobPostAvailability'),
+             'job_post', 'schedule_mask', cover=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0006_teacher_text_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobpost',
+            name='schedule_mask',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), default=base.models.empty_week_mask, editable=False, help_text='Weekly schedule bitmap derived from the JobPostAvailability rows.', size=7),
+        ),
+        migrations.AddField(
+            model_name='teacherprofile',
+            name='availability_mask',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), default=base.models.empty_week_mask, editable=False, help_text='Weekly availability bitmap derived from the Availability rows.', size=7),
+        ),
+        migrations.RunPython(backfill_masks, migrations.RunPython.noop),
+    ]
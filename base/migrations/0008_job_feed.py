@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0007_availability_masks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobFeedEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(help_text='Match quality between 0 and 1.')),
+                ('rank', models.FloatField(help_text="Match score plus a recency term that grows with the job's creation time.")),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='base.jobpost')),
+                ('teacher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feed_entries', to='base.teacherprofile')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['teacher', '-rank', '-job'], name='feed_rank_keyset_idx')],
+                'constraints': [models.UniqueConstraint(fields=('teacher', 'job'), name='unique_feed_entry')],
+            },
+        ),
+    ]
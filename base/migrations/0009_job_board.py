@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:13
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0008_job_feed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobpost',
+            name='subject_ids',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), blank=True, default=list, editable=False, help_text='Ids of subject_list, kept in sync by the m2m signal handlers for GIN filtering.', size=None),
+        ),
+        migrations.RunSQL(
+            """
+            UPDATE base_jobpost AS j
+            SET subject_ids = s.ids
+            FROM (
+                SELECT jobpost_id, array_agg(subject_id ORDER BY subject_id) AS ids
+                FROM base_jobpost_subject_list
+                GROUP BY jobpost_id
+            ) AS s
+            WHERE j.id = s.jobpost_id
+            """,
+            migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='jobpost',
+            index=models.Index(condition=models.Q(('status', 'open')), fields=['-created_at', '-id'], name='job_open_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobpost',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='job_status_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobpost',
+            index=models.Index(condition=models.Q(('status', 'open')), fields=['budget_salary'], name='job_open_budget_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobpost',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['subject_ids'], name='job_subject_ids_gin'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:13
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0009_job_board'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobpost',
+            name='accepted_bid',
+            field=models.ForeignKey(blank=True, editable=False, help_text='The bid accepted by the job owner.', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='base.bidjob'),
+        ),
+        migrations.AddField(
+            model_name='jobpost',
+            name='bids_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of bids on the job post.'),
+        ),
+        migrations.AddField(
+            model_name='jobpost',
+            name='last_bid_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='When the latest bid was placed.', null=True),
+        ),
+        migrations.RunSQL(
+            """
+            UPDATE base_jobpost AS j
+            SET bids_count = b.total, last_bid_at = b.last_at, accepted_bid_id = b.accepted_id
+            FROM (
+                SELECT job_id, COUNT(*) AS total, MAX(created_at) AS last_at,
+                       (ARRAY_AGG(id ORDER BY created_at DESC, id DESC) FILTER (WHERE status = 'accepted'))[1] AS accepted_id
+                FROM base_bidjob
+                GROUP BY job_id
+            ) AS b
+            WHERE j.id = b.job_id
+            """,
+            migrations.RunSQL.noop,
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0010_job_bid_counters'),
+    ]
+
+    operations = [
+        # Bids placed twice by the old exists()-then-insert race: keep the accepted
+        # one, else the earliest, and recount the jobs that lost a bid.
+        migrations.RunSQL(
+            [
+                """
+                CREATE TEMPORARY TABLE duplicate_bids ON COMMIT DROP AS
+                SELECT id, job_id, first_value(id) OVER w AS keep_id, row_number() OVER w AS position
+                FROM base_bidjob
+                WINDOW w AS (PARTITION BY job_id, tutor_id ORDER BY status = 'accepted' DESC, created_at, id)
+                """,
+                "DELETE FROM duplicate_bids WHERE position = 1",
+                """
+                UPDATE base_jobpost AS j SET accepted_bid_id = d.keep_id
+                FROM duplicate_bids AS d WHERE j.accepted_bid_id = d.id
+                """,
+                "DELETE FROM base_bidjob WHERE id IN (SELECT id FROM duplicate_bids)",
+                """
+                UPDATE base_jobpost AS j
+                SET bids_count = (SELECT COUNT(*) FROM base_bidjob AS b WHERE b.job_id = j.id)
+                WHERE j.id IN (SELECT job_id FROM duplicate_bids)
+                """,
+            ],
+            migrations.RunSQL.noop,
+        ),
+        migrations.AddConstraint(
+            model_name='bidjob',
+            constraint=models.UniqueConstraint(fields=('job', 'tutor'), name='unique_bid_per_tutor'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0011_unique_bid_per_tutor'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bidjob',
+            index=models.Index(fields=['job', 'proposed_salary', 'id'], name='bid_job_salary_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bidjob',
+            index=models.Index(fields=['job', '-created_at', '-id'], name='bid_job_recent_keyset_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bidjob',
+            index=models.Index(fields=['tutor', '-created_at', '-id'], name='bid_tutor_recent_keyset_idx'),
+        ),
+    ]
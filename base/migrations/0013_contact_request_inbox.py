@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0012_bid_listing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='contactrequest',
+            index=models.Index(fields=['student', '-created_at', '-id'], name='contact_sent_inbox_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contactrequest',
+            index=models.Index(fields=['teacher', 'status', '-created_at', '-id'], name='contact_received_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='contactrequest',
+            index=models.Index(fields=['teacher', '-created_at', '-id'], name='contact_received_inbox_idx'),
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:13
+
+from django.db import migrations, models
+
+from base.models import RATING_PRIOR_MEAN, RATING_PRIOR_WEIGHT
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0013_contact_request_inbox'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='teachersearchindex',
+            name='search_rating_keyset_idx',
+        ),
+        migrations.AddField(
+            model_name='teacherprofile',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='teacherprofile',
+            name='rating_score',
+            field=models.FloatField(default=3.5, editable=False, help_text='Bayesian-weighted average rating, used to rank tutors.'),
+        ),
+        migrations.AddField(
+            model_name='teacherprofile',
+            name='rating_sum',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='teachersearchindex',
+            name='rating_score',
+            field=models.FloatField(default=3.5),
+        ),
+        migrations.RunSQL(
+            [
+                (
+                    """
+                    UPDATE base_teacherprofile AS t
+                    SET rating_sum = r.total, rating_count = r.reviews,
+                        rating_score = (r.total + %s * %s) / (r.reviews + %s)
+                    FROM (
+                        SELECT c.teacher_id, SUM(v.rating) AS total, COUNT(*) AS reviews
+                        FROM base_teacherreview AS v
+                        JOIN base_contactrequest AS c ON c.id = v.contact_request_id
+                        GROUP BY c.teacher_id
+                    ) AS r
+                    WHERE t.id = r.teacher_id
+                    """,
+                    [RATING_PRIOR_MEAN, RATING_PRIOR_WEIGHT, RATING_PRIOR_WEIGHT],
+                ),
+                """
+                UPDATE base_teachersearchindex AS s SET rating_score = t.rating_score
+                FROM base_teacherprofile AS t WHERE s.teacher_id = t.id
+                """,
+            ],
+            migrations.RunSQL.noop,
+        ),
+        migrations.AddIndex(
+            model_name='teachersearchindex',
+            index=models.Index(fields=['-rating_score', '-rating_count', 'teacher'], name='search_rating_keyset_idx'),
+        ),
+    ]
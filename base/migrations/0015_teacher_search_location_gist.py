@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-18 02:16
+
+import django.contrib.gis.db.models.fields
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('base', '0014_teacher_rating_summary'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='teachersearchindex',
+            name='location',
+            field=django.contrib.gis.db.models.fields.PointField(blank=True, geography=True, null=True, spatial_index=False, srid=4326),
+        ),
+        migrations.AddIndex(
+            model_name='teachersearchindex',
+            index=django.contrib.postgres.indexes.GistIndex(fields=['location'], name='search_location_gist'),
+        ),
+    ]
@@ -3,13 +3,37 @@ from django.contrib.auth.models import AbstractUser
 from django.core.exceptions import ValidationError
 from django.utils.translation import gettext_lazy as _
 from django.contrib.gis.db import models as geomodels
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex, GistIndex
+from django.contrib.postgres.search import SearchVectorField
  
 
 class CustomUser(AbstractUser):
     is_teacher = models.BooleanField(default=False)
-    location = geomodels.PointField(null=True, blank=True,geography=True, help_text="The geographical location of the user.")
+    location = geomodels.PointField(null=True, blank=True,geography=True, spatial_index=True, help_text="The geographical location of the user.")
     banned = models.BooleanField(default=False, help_text="Indicates if the user is banned from the platform.")
 
+    # Copied into the teacher search index and used by the job feeds (see base.signals.user_saved).
+    SEARCH_FIELDS = ('first_name', 'last_name', 'location')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_search_fields = {
+            name: value for name, value in zip(field_names, values) if name in cls.SEARCH_FIELDS
+        }
+        return instance
+
+    def search_fields_changed(self, update_fields=None) -> bool:
+        """
+        Whether a save changed any of SEARCH_FIELDS, from update_fields when given,
+        else by comparing with the values loaded from the database.
+        """
+        if update_fields is not None:
+            return bool(set(update_fields) & set(self.SEARCH_FIELDS))
+        loaded = getattr(self, '_loaded_search_fields', {})
+        return any(name not in loaded or loaded[name] != getattr(self, name) for name in self.SEARCH_FIELDS)
+
 def certificate_upload_to(instance, filename):
     return f"certificates/{instance.teacher.user.username}/{instance.degree if type(instance)==AcademicProfile else instance.skill}/{filename}"
 
@@ -39,6 +63,12 @@ class Subject(models.Model):
     description = models.TextField(blank=True, null=True, help_text="A brief description of the subject.")
     subject_code = models.CharField(max_length=20, unique=True, help_text="A unique code for the subject (e.g., 'MATH101', 'PHY202')", blank=True, null=True)
     grade = models.ForeignKey(Grade, on_delete=models.CASCADE, related_name='subjects', blank=True, null=True, help_text="The grade level for which this subject is applicable.")
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['name'], name='subject_name_trgm', opclasses=['gin_trgm_ops']),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -103,7 +133,41 @@ QUALIFICATION_CHOICES = [
     ('phd', 'PhD')
 ]
 
-class TeacherProfile(models.Model):
+# Bayesian prior of TeacherProfile.rating_score: every tutor starts with
+# RATING_PRIOR_WEIGHT virtual reviews of RATING_PRIOR_MEAN stars, so a single
+# 5-star review does not outrank a long record of 4.8s.
+RATING_PRIOR_MEAN = 3.5
+RATING_PRIOR_WEIGHT = 5
+
+
+def empty_week_mask():
+    """
+    Default for the weekly availability bitmaps: one bigint per day (Monday first),
+    bit i set when the 30-minute slot starting at i * 30 minutes is covered.
+    See base.utils.week_mask.
+    """
+    return [0] * 7
+
+
+class MaintainedFieldsMixin:
+    """
+    Keeps the columns listed in `maintained_fields` out of regular saves of an
+    existing row. They are written only by single-statement updates from the
+    signal handlers, and a save of an instance loaded earlier would otherwise
+    write its stale copies back over changes committed in the meantime.
+    """
+    maintained_fields = ()
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding and kwargs.get('update_fields') is None and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.maintained_fields
+            ]
+        super().save(*args, **kwargs)
+
+
+class TeacherProfile(MaintainedFieldsMixin, models.Model):
     user = models.OneToOneField('CustomUser', on_delete=models.CASCADE, related_name='teacher_profile')
     verified = models.BooleanField(default=False, help_text="Indicates if the teacher's profile has been verified by an admin.")
     bio = models.TextField(blank=True, null=True, help_text="A brief biography of the teacher.")
@@ -129,6 +193,13 @@ class TeacherProfile(models.Model):
     teaching_mode = models.CharField(max_length=20, choices=TEACHING_CHOICES, blank=True)
     preferred_distance = models.DecimalField(max_digits=5, decimal_places=2, default=0, help_text="Preferred distance for teaching in kilometers")
     profile_picture = models.ImageField(upload_to=profile_picture_upload_to, blank=True, null=True, help_text="Profile picture of the teacher.")
+    availability_mask = ArrayField(models.BigIntegerField(), size=7, default=empty_week_mask, editable=False, help_text="Weekly availability bitmap derived from the Availability rows.")
+    # Review summary, kept in step by the TeacherReview signal handlers (see base.utils.bump_teacher_rating).
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_score = models.FloatField(default=RATING_PRIOR_MEAN, editable=False, help_text="Bayesian-weighted average rating, used to rank tutors.")
+
+    maintained_fields = ('availability_mask', 'rating_sum', 'rating_count', 'rating_score')
 
 
     def __str__(self):
@@ -198,7 +269,7 @@ class Availability(models.Model):
         return f"{self.tutor.user.username} - ({self.start_time.strftime('%I:%M %p')} - {self.end_time.strftime('%I:%M %p')})"
 
 
-class JobPost(models.Model):
+class JobPost(MaintainedFieldsMixin, models.Model):
     JOB_STATUS_CHOICES = [
         ('open', 'Open'),
         ('closed', 'Closed'),
@@ -218,6 +289,23 @@ class JobPost(models.Model):
     gender = models.CharField(max_length=20, choices=GENDER_CHOICES, blank=True)
     teaching_mode = models.CharField(max_length=20, choices=TEACHING_CHOICES, blank=True)
     minimum_qualification = models.CharField(max_length=50, choices=QUALIFICATION_CHOICES, blank=True, help_text="The highest educational qualification required for the job.")
+    schedule_mask = ArrayField(models.BigIntegerField(), size=7, default=empty_week_mask, editable=False, help_text="Weekly schedule bitmap derived from the JobPostAvailability rows.")
+    subject_ids = ArrayField(models.BigIntegerField(), default=list, blank=True, editable=False, help_text="Ids of subject_list, kept in sync by the m2m signal handlers for GIN filtering.")
+    # Bid counters, maintained by the BidJob signal handlers (see reconcile_job_counters).
+    bids_count = models.PositiveIntegerField(default=0, editable=False, help_text="Number of bids on the job post.")
+    last_bid_at = models.DateTimeField(null=True, blank=True, editable=False, help_text="When the latest bid was placed.")
+    accepted_bid = models.ForeignKey('BidJob', on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name='+', help_text="The bid accepted by the job owner.")
+
+    maintained_fields = ('schedule_mask', 'subject_ids', 'bids_count', 'last_bid_at', 'accepted_bid')
+
+    class Meta:
+        indexes = [
+            # Job board: newest open jobs first, the default listing.
+            models.Index(fields=['-created_at', '-id'], condition=models.Q(status='open'), name='job_open_recent_idx'),
+            models.Index(fields=['status', '-created_at', '-id'], name='job_status_recent_idx'),
+            models.Index(fields=['budget_salary'], condition=models.Q(status='open'), name='job_open_budget_idx'),
+            GinIndex(fields=['subject_ids'], name='job_subject_ids_gin'),
+        ]
 
     def clean(self):
         if self.budget_salary and self.budget_salary < 0:
@@ -283,6 +371,18 @@ class BidJob(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
 
+    class Meta:
+        constraints = [
+            # One bid per tutor and job; concurrent placements conflict here, not in Python.
+            models.UniqueConstraint(fields=['job', 'tutor'], name='unique_bid_per_tutor'),
+        ]
+        indexes = [
+            # Keyset orders of the bid listing: per job for owners, per tutor for bidders.
+            models.Index(fields=['job', 'proposed_salary', 'id'], name='bid_job_salary_keyset_idx'),
+            models.Index(fields=['job', '-created_at', '-id'], name='bid_job_recent_keyset_idx'),
+            models.Index(fields=['tutor', '-created_at', '-id'], name='bid_tutor_recent_keyset_idx'),
+        ]
+
 
 class ContactRequest(models.Model):
     
@@ -301,6 +401,14 @@ class ContactRequest(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Inbox tabs, newest first: sent by a student, received by a teacher (optionally per status).
+            models.Index(fields=['student', '-created_at', '-id'], name='contact_sent_inbox_idx'),
+            models.Index(fields=['teacher', 'status', '-created_at', '-id'], name='contact_received_status_idx'),
+            models.Index(fields=['teacher', '-created_at', '-id'], name='contact_received_inbox_idx'),
+        ]
+
 class UserDashboard(models.Model):
     user = models.OneToOneField(CustomUser, on_delete=models.CASCADE, related_name='request_manager')
     total_requests_sent = models.PositiveIntegerField(default=0)
@@ -320,4 +428,85 @@ class TeacherReview(models.Model):
    
 
     def __str__(self):
-        return f"Review of {self.teacher.user.username} by {self.student.username}"
\ No newline at end of file
+        return f"Review of {self.teacher.user.username} by {self.student.username}"
+
+
+class TeacherSearchIndex(models.Model):
+    """
+    Flattened, one-row-per-tutor read model for teacher search.
+    Kept current by the handlers in base.signals and rebuilt in full with
+    `python manage.py rebuild_search_index`. Never edit rows by hand.
+    """
+    teacher = models.OneToOneField(TeacherProfile, on_delete=models.CASCADE, primary_key=True, related_name='search_index')
+    name = models.CharField(max_length=300, blank=True)
+    # Indexed by search_location_gist below rather than through spatial_index.
+    location = geomodels.PointField(null=True, blank=True, geography=True, spatial_index=False)
+    gender = models.CharField(max_length=20, choices=GENDER_CHOICES, blank=True)
+    teaching_mode = models.CharField(max_length=20, choices=TEACHING_CHOICES, blank=True)
+    highest_qualification = models.CharField(max_length=50, choices=QUALIFICATION_CHOICES, blank=True)
+    min_salary = models.PositiveIntegerField(default=0)
+    experience_years = models.PositiveIntegerField(default=0)
+    preferred_distance = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    verified = models.BooleanField(default=False)
+    grade_ids = ArrayField(models.BigIntegerField(), default=list, blank=True)
+    subject_ids = ArrayField(models.BigIntegerField(), default=list, blank=True)
+    medium_ids = ArrayField(models.BigIntegerField(), default=list, blank=True)
+    maximum_grade = models.CharField(max_length=50, blank=True)
+    maximum_grade_sequence = models.PositiveIntegerField(null=True, blank=True)
+    medium_names = models.TextField(blank=True)
+    rating_average = models.FloatField(default=0, help_text="Average review rating, 0 when the tutor has no reviews.")
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_score = models.FloatField(default=RATING_PRIOR_MEAN)
+    profile_picture = models.CharField(max_length=500, blank=True)
+    # Free-text search sources, combined into the weighted search_vector.
+    bio = models.TextField(blank=True)
+    subject_names = models.TextField(blank=True)
+    subject_details = models.TextField(blank=True, help_text="Subject descriptions and codes.")
+    credentials = models.TextField(blank=True, help_text="Academic degrees/institutions and qualification skills/organizations.")
+    search_vector = SearchVectorField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['grade_ids'], name='search_grade_ids_gin'),
+            GinIndex(fields=['subject_ids'], name='search_subject_ids_gin'),
+            GinIndex(fields=['medium_ids'], name='search_medium_ids_gin'),
+            # Serves the distance filters (ST_DWithin) and the KNN (`<->`) ordering of nearest_teachers.
+            GistIndex(fields=['location'], name='search_location_gist'),
+            # Keyset sort keys for the paginated teacher search.
+            models.Index(fields=['min_salary', 'teacher'], name='search_salary_keyset_idx'),
+            models.Index(fields=['-experience_years', 'teacher'], name='search_experience_keyset_idx'),
+            models.Index(fields=['-rating_score', '-rating_count', 'teacher'], name='search_rating_keyset_idx'),
+            GinIndex(fields=['search_vector'], name='search_vector_gin'),
+            # Trigram indexes (pg_trgm, migration 0002) for typo-tolerant matching and autocomplete.
+            GinIndex(fields=['name'], name='search_name_trgm', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['subject_names'], name='search_subject_names_trgm', opclasses=['gin_trgm_ops']),
+        ]
+
+    def __str__(self):
+        return f"Search index for {self.name or self.teacher_id}"
+
+
+class JobFeedEntry(models.Model):
+    """
+    Precomputed entry of a teacher's job feed: an open job that matches the
+    teacher, with its match score. Maintained by base.matching.refresh_job_feed
+    and refresh_teacher_feed from the signal handlers.
+    """
+    teacher = models.ForeignKey(TeacherProfile, on_delete=models.CASCADE, related_name='feed_entries')
+    job = models.ForeignKey(JobPost, on_delete=models.CASCADE, related_name='feed_entries')
+    score = models.FloatField(help_text="Match quality between 0 and 1.")
+    rank = models.FloatField(help_text="Match score plus a recency term that grows with the job's creation time.")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['teacher', 'job'], name='unique_feed_entry'),
+        ]
+        indexes = [
+            # Keyset order of the feed.
+            models.Index(fields=['teacher', '-rank', '-job'], name='feed_rank_keyset_idx'),
+        ]
+
+    def __str__(self):
+        return f"Feed entry of job {self.job_id} for teacher {self.teacher_id}"
@@ -0,0 +1,166 @@
+"""
+Write-behind tracking of contact request email opens.
+
+The tracking pixel only records the open in a per-process buffer keyed by
+contact request, so repeated opens of the same email coalesce into one entry
+that keeps the first open time. A background thread flushes the buffer every
+EMAIL_OPEN_FLUSH_SECONDS with a single UPDATE ... FROM (VALUES ...) per batch,
+which only fills email_opened_at where it is still empty.
+
+The buffer is not durable. A clean worker exit flushes it (atexit), but a
+SIGKILL, a gunicorn worker recycle past its graceful timeout, an OOM kill or a
+dyno restart drops the opens of up to one interval. Open tracking is a
+best-effort signal; do not build anything on it that needs every open.
+"""
+import atexit
+import base64
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.db import DatabaseError, connection
+from django.urls import reverse
+from django.utils import timezone
+
+from .models import ContactRequest
+
+logger = logging.getLogger(__name__)
+
+PIXEL_GIF = base64.b64decode("R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7")
+TOKEN_SALT = "contact-request-open"
+FLUSH_BATCH_SIZE = 1000
+# Requests already flushed by this worker; later opens are dropped without buffering.
+MAX_FLUSHED_IDS = 100_000
+
+_lock = threading.Lock()
+_pending = {}
+_flushed = set()
+_flusher = None
+
+
+def get_flush_interval():
+    return getattr(settings, "EMAIL_OPEN_FLUSH_SECONDS", 5)
+
+
+def make_open_token(contact_request_id) -> str:
+    return signing.Signer(salt=TOKEN_SALT).sign(str(contact_request_id))
+
+
+def read_open_token(token):
+    """
+    Returns the contact request id of a pixel token, or None when it was tampered with.
+    """
+    try:
+        return int(signing.Signer(salt=TOKEN_SALT).unsign(token))
+    except (signing.BadSignature, ValueError):
+        return None
+
+
+def email_open_pixel_url(contact_request, request=None) -> str:
+    """
+    URL of the tracking pixel to embed in the emails sent for a contact request.
+    """
+    url = reverse("base:email_open_pixel", args=[make_open_token(contact_request.id)])
+    return request.build_absolute_uri(url) if request is not None else url
+
+
+def record_email_open(contact_request_id, opened_at=None):
+    """
+    Buffers an open. Only the first open of a request is kept until the next flush.
+    """
+    opened_at = opened_at or timezone.now()
+    with _lock:
+        if contact_request_id in _flushed or contact_request_id in _pending:
+            return
+        _pending[contact_request_id] = opened_at
+    _start_flusher()
+
+
+def flush_email_opens() -> int:
+    """
+    Writes the buffered opens to the database and returns the number of rows
+    updated. Entries that fail to write go back to the buffer.
+    """
+    global _pending
+    with _lock:
+        batch, _pending = _pending, {}
+    if not batch:
+        return 0
+
+    items = list(batch.items())
+    updated = 0
+    for start in range(0, len(items), FLUSH_BATCH_SIZE):
+        chunk = items[start:start + FLUSH_BATCH_SIZE]
+        try:
+            updated += _write_opens(chunk)
+        except DatabaseError:
+            logger.exception("Failed to flush %d email opens", len(items) - start)
+            _requeue(items[start:])
+            break
+        _mark_flushed(request_id for request_id, _ in chunk)
+    return updated
+
+
+def _write_opens(chunk) -> int:
+    table = connection.ops.quote_name(ContactRequest._meta.db_table)
+    values = ", ".join(["(%s::bigint, %s::timestamptz)"] * len(chunk))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {table} AS c SET email_opened_at = v.opened_at "
+            f"FROM (VALUES {values}) AS v(id, opened_at) "
+            f"WHERE c.id = v.id AND c.email_opened_at IS NULL",
+            [value for item in chunk for value in item],
+        )
+        return cursor.rowcount
+
+
+def _requeue(items):
+    with _lock:
+        for request_id, opened_at in items:
+            if request_id not in _pending or opened_at < _pending[request_id]:
+                _pending[request_id] = opened_at
+
+
+def _mark_flushed(request_ids):
+    with _lock:
+        if len(_flushed) > MAX_FLUSHED_IDS:
+            _flushed.clear()
+        _flushed.update(request_ids)
+
+
+def _flush_loop(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            flush_email_opens()
+        except Exception:
+            logger.exception("Failed to flush email opens")
+        finally:
+            # The thread outlives any request; never keep a connection open between flushes.
+            connection.close()
+
+
+def _start_flusher():
+    """
+    Starts the background flush thread of this worker on the first open.
+    A zero interval disables it, leaving the flushing to explicit calls.
+    """
+    global _flusher
+    interval = get_flush_interval()
+    if _flusher is not None or not interval:
+        return
+    with _lock:
+        if _flusher is not None:
+            return
+        _flusher = threading.Thread(target=_flush_loop, args=(interval,), name="email-open-flusher", daemon=True)
+        _flusher.start()
+    atexit.register(_flush_at_exit)
+
+
+def _flush_at_exit():
+    try:
+        flush_email_opens()
+    except Exception:
+        logger.exception("Failed to flush email opens at exit")
@@ -0,0 +1,178 @@
+import base64
+import json
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+
+from django.contrib.gis.measure import D, Distance
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+    Seek (keyset) pagination over a stable ordering.
+
+    The cursor stores the ordering values of the last row of the page, and the
+    next page is fetched with a WHERE clause on those values instead of an
+    OFFSET, so deep pages cost the same as the first one. The last ordering
+    field must be unique (usually "id") to break ties. Tokens are bound to the
+    ordering they were issued for, and any token that does not fit it is
+    answered with a 400.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    max_page_size = 100
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+
+    def __init__(self, ordering=None, page_size=None):
+        if ordering is not None:
+            self.ordering = tuple(ordering)
+        if page_size is not None:
+            self.page_size = page_size
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            size = self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(*self.ordering)
+        token = request.query_params.get(self.cursor_query_param)
+        if token:
+            values = decode_cursor(token, self.ordering)
+            try:
+                rows = list(queryset.filter(self.seek_filter(values))[:page_size + 1])
+            except (DjangoValidationError, TypeError, ValueError):
+                # A well-formed token whose values do not convert to the ordering fields.
+                raise ValidationError({"cursor": "Invalid cursor."})
+        else:
+            rows = list(queryset[:page_size + 1])
+
+        self.has_next = len(rows) > page_size
+        rows = rows[:page_size]
+        self.next_cursor = encode_cursor(self.row_values(rows[-1]), self.ordering) if self.has_next else None
+        return rows
+
+    def seek_filter(self, values):
+        """
+        Expands (f1, f2, ..) > (v1, v2, ..) into OR-ed prefix comparisons, honouring
+        the direction of every ordering field. The first field is also bounded on
+        its own so the planner can use an index range on it.
+        """
+        fields = [(field.lstrip('-'), field.startswith('-')) for field in self.ordering]
+        condition = Q()
+        for index, (name, descending) in enumerate(fields):
+            term = Q(**{f"{name}__{'lt' if descending else 'gt'}": values[index]})
+            for previous in range(index):
+                term &= Q(**{fields[previous][0]: values[previous]})
+            condition |= term
+        first_name, first_descending = fields[0]
+        return Q(**{f"{first_name}__{'lte' if first_descending else 'gte'}": values[0]}) & condition
+
+    def row_values(self, row):
+        return [getattr(row, field.lstrip('-')) for field in self.ordering]
+
+    def get_next_link(self):
+        if not self.next_cursor:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "cursor": self.next_cursor,
+            "results": data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "cursor": {"type": "string", "nullable": True},
+                "results": schema,
+            },
+        }
+
+
+def _encode_value(value):
+    if isinstance(value, Distance):
+        return {"m": value.m}
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"dec": str(value)}
+    return value
+
+
+def _decode_value(value):
+    """
+    Reverses _encode_value. Raises ValueError on anything encode_cursor cannot have produced.
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if not isinstance(value, dict) or len(value) != 1:
+        raise ValueError("Unexpected cursor value.")
+    (kind, raw), = value.items()
+    if kind == "m" and isinstance(raw, (int, float)) and not isinstance(raw, bool):
+        return D(m=raw)
+    if kind == "dt" and isinstance(raw, str) and (parsed := parse_datetime(raw)) is not None:
+        return parsed
+    if kind == "d" and isinstance(raw, str):
+        return date.fromisoformat(raw)
+    if kind == "dec" and isinstance(raw, str):
+        try:
+            return Decimal(raw)
+        except InvalidOperation:
+            pass
+    raise ValueError("Unexpected cursor value.")
+
+
+def ordering_signature(ordering) -> str:
+    return ",".join(ordering)
+
+
+def encode_cursor(values, ordering) -> str:
+    """
+    Encodes the ordering values of a row into an opaque url-safe token, bound to `ordering`.
+    """
+    payload = json.dumps(
+        {"o": ordering_signature(ordering), "v": [_encode_value(value) for value in values]},
+        separators=(',', ':'),
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token: str, ordering) -> list:
+    """
+    Decodes a token produced by encode_cursor for the same ordering. Raises
+    ValidationError on tampered or stale tokens (e.g. a cursor from another sort order).
+    """
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        if (
+            not isinstance(payload, dict)
+            or payload.get("o") != ordering_signature(ordering)
+            or not isinstance(payload.get("v"), list)
+            or len(payload["v"]) != len(ordering)
+        ):
+            raise ValueError("Cursor does not match the ordering.")
+        return [_decode_value(value) for value in payload["v"]]
+    except (ValueError, TypeError):
+        raise ValidationError({"cursor": "Invalid cursor."})
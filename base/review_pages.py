@@ -0,0 +1,92 @@
+"""
+Per-tutor review pages.
+
+A tutor's reviews are listed newest first with keyset pagination. The first
+page and the rating histogram are what every profile view asks for, so both
+are cached per tutor. Review writes bump the tutor's version
+(invalidate_tutor_reviews), which turns the cached entries into misses. The
+version is read before the queries, so a write racing a rebuild is never
+cached as fresh. Later pages are read from the database.
+"""
+from django.conf import settings
+from django.db.models import Count
+
+from .cache_versions import bump_version, get_entry, set_entry
+from .models import TeacherReview
+from .pagination import encode_cursor
+from .serializer import TeacherReviewSerializer
+
+CACHE_PREFIX = "tutor-reviews"
+REVIEW_ORDERING = ('-created_at', '-id')
+REVIEW_PAGE_SIZE = 10
+RATING_VALUES = range(1, 6)
+
+
+def get_ttl():
+    return getattr(settings, "TUTOR_REVIEWS_CACHE_TTL", 300)
+
+
+def _entry_key(teacher_id, name):
+    return f"{CACHE_PREFIX}:{name}:{teacher_id}"
+
+
+def _version_key(teacher_id):
+    return f"{CACHE_PREFIX}:v:{teacher_id}"
+
+
+def tutor_reviews(teacher_id):
+    return (
+        TeacherReview.objects
+        .filter(contact_request__teacher_id=teacher_id)
+        .select_related('contact_request__student')
+    )
+
+
+def build_first_review_page(teacher_id) -> dict:
+    """
+    The newest REVIEW_PAGE_SIZE reviews of a tutor, serialized, with the cursor of the next page.
+    """
+    rows = list(tutor_reviews(teacher_id).order_by(*REVIEW_ORDERING)[:REVIEW_PAGE_SIZE + 1])
+    cursor = None
+    if len(rows) > REVIEW_PAGE_SIZE:
+        rows = rows[:REVIEW_PAGE_SIZE]
+        cursor = encode_cursor([getattr(rows[-1], field.lstrip('-')) for field in REVIEW_ORDERING], REVIEW_ORDERING)
+    return {"results": list(TeacherReviewSerializer(rows, many=True).data), "cursor": cursor}
+
+
+def build_review_histogram(teacher_id) -> dict:
+    """
+    Number of reviews per rating, from one grouped query.
+    """
+    histogram = dict.fromkeys(RATING_VALUES, 0)
+    counts = (
+        TeacherReview.objects
+        .filter(contact_request__teacher_id=teacher_id)
+        .order_by()
+        .values_list('rating')
+        .annotate(total=Count('id'))
+    )
+    histogram.update(counts)
+    return histogram
+
+
+def _cached(teacher_id, name, build):
+    entry_key = _entry_key(teacher_id, name)
+    data, versions = get_entry(entry_key, [_version_key(teacher_id)])
+    if data is None:
+        data = build(teacher_id)
+        set_entry(entry_key, versions, data, get_ttl())
+    return data
+
+
+def get_first_review_page(teacher_id) -> dict:
+    return _cached(teacher_id, "page", build_first_review_page)
+
+
+def get_review_histogram(teacher_id) -> dict:
+    return _cached(teacher_id, "histogram", build_review_histogram)
+
+
+def invalidate_tutor_reviews(teacher_ids) -> None:
+    for teacher_id in {teacher_id for teacher_id in teacher_ids if teacher_id}:
+        bump_version(_version_key(teacher_id))
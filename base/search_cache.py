@@ -0,0 +1,137 @@
+"""
+Geo-cell keyed cache for the teacher search.
+
+Searches are keyed by the searcher's location snapped to a small grid cell plus
+the normalized filter set, and store the candidate teachers of that cell so the
+exact distance of each searcher can be recomputed cheaply from the cached rows.
+
+Every entry records the versions of the coarse invalidation cells its search
+radius covers. Changing a teacher bumps the versions of the cells around its
+old and new location, which turns every entry covering those cells into a miss.
+Searches without a radius depend on a single global version instead.
+"""
+import hashlib
+import json
+import math
+
+from django.conf import settings
+
+from .cache_versions import bump_version, get_entry, set_entry
+
+CACHE_PREFIX = "teacher-search"
+# ~1.1 km: searchers in the same cell share an entry.
+SEARCH_CELL_DEGREES = 0.01
+# ~11 km: granularity of invalidation.
+INVALIDATION_CELL_DEGREES = 0.1
+# Radius searches covering more cells than this fall back to the global version.
+MAX_INVALIDATION_CELLS = 64
+KM_PER_DEGREE = 111.32
+
+SEARCH_FILTER_PARAMS = ('feeRange', 'gender', 'grade', 'subject', 'medium', 'distance', 'tuitionType')
+
+EPOCH_KEY = f"{CACHE_PREFIX}:v:epoch"
+GLOBAL_KEY = f"{CACHE_PREFIX}:v:global"
+
+
+def get_ttl():
+    return getattr(settings, "TEACHER_SEARCH_CACHE_TTL", 300)
+
+
+def normalize_filters(params) -> dict:
+    """
+    Returns the search filters that affect the result, with empty values dropped
+    and values canonicalized so equivalent queries share a cache entry.
+    """
+    filters = {}
+    for name in SEARCH_FILTER_PARAMS:
+        value = (params.get(name) or "").strip().lower()
+        if not value:
+            continue
+        try:
+            filters[name] = float(value) if name == 'distance' else value
+        except ValueError:
+            continue
+    return filters
+
+
+def snap_to_cell(location, size=SEARCH_CELL_DEGREES):
+    return math.floor(location.x / size), math.floor(location.y / size)
+
+
+def cell_center(cell, size=SEARCH_CELL_DEGREES):
+    return (cell[0] + 0.5) * size, (cell[1] + 0.5) * size
+
+
+def cell_half_diagonal_km(cell, size=SEARCH_CELL_DEGREES) -> float:
+    """
+    Upper bound of the distance between any point of the cell and its center.
+    """
+    _, latitude = cell_center(cell, size)
+    half_height = size / 2 * KM_PER_DEGREE
+    half_width = size / 2 * KM_PER_DEGREE * math.cos(math.radians(latitude))
+    return math.hypot(half_height, half_width)
+
+
+def covered_cells(cell, radius_km):
+    """
+    Invalidation cells intersecting the search cell grown by radius_km, or None
+    when the search is unbounded (or too wide to track per cell).
+    """
+    if radius_km is None:
+        return None
+    center_lon, center_lat = cell_center(cell)
+    reach = radius_km + cell_half_diagonal_km(cell)
+    lat_span = reach / KM_PER_DEGREE
+    lon_span = reach / (KM_PER_DEGREE * max(math.cos(math.radians(center_lat)), 0.01))
+
+    x_range = range(math.floor((center_lon - lon_span) / INVALIDATION_CELL_DEGREES),
+                    math.floor((center_lon + lon_span) / INVALIDATION_CELL_DEGREES) + 1)
+    y_range = range(math.floor((center_lat - lat_span) / INVALIDATION_CELL_DEGREES),
+                    math.floor((center_lat + lat_span) / INVALIDATION_CELL_DEGREES) + 1)
+    if len(x_range) * len(y_range) > MAX_INVALIDATION_CELLS:
+        return None
+    return [(x, y) for x in x_range for y in y_range]
+
+
+def _cell_version_key(cell):
+    return f"{CACHE_PREFIX}:v:{cell[0]}:{cell[1]}"
+
+
+def _entry_key(cell, filters):
+    digest = hashlib.md5(json.dumps(filters, sort_keys=True).encode()).hexdigest()
+    return f"{CACHE_PREFIX}:entry:{cell[0] if cell else 'none'}:{cell[1] if cell else 'none'}:{digest}"
+
+
+def _version_keys(cell, filters):
+    cells = covered_cells(cell, filters.get('distance')) if cell else None
+    if cells is None:
+        return [EPOCH_KEY, GLOBAL_KEY]
+    return [EPOCH_KEY] + [_cell_version_key(covered) for covered in cells]
+
+
+def get_cached_search(cell, filters):
+    """
+    Returns (rows, versions). rows is None on a miss or when any covered cell
+    changed since the entry was stored. versions must be passed to
+    set_cached_search on a miss; it is read before the caller queries the
+    database, so a concurrent change can never be cached as fresh.
+    """
+    return get_entry(_entry_key(cell, filters), _version_keys(cell, filters))
+
+
+def set_cached_search(cell, filters, rows, versions):
+    set_entry(_entry_key(cell, filters), versions, rows, get_ttl())
+
+
+def invalidate_search_cache(locations=None):
+    """
+    Invalidates the cached searches that may contain a teacher at any of the
+    given locations. With no locations every cached search is invalidated.
+    """
+    if locations is None:
+        bump_version(EPOCH_KEY)
+        return
+    bump_version(GLOBAL_KEY)
+    cells = {snap_to_cell(location, INVALIDATION_CELL_DEGREES) for location in locations if location is not None}
+    for cell in cells:
+        bump_version(_cell_version_key(cell))
@@ -1,6 +1,6 @@
 from .models import (TeacherProfile, AcademicProfile, Qualification,
      Availability, Grade, Subject, JobPost, BidJob, JobPostAvailability
-     , ContactRequest, TeacherReview, Medium)
+     , ContactRequest, TeacherReview, Medium, STATUS_CHOICES)
 from rest_framework import serializers
 from drf_spectacular.utils import extend_schema_serializer, OpenApiExample
 from .utils import calculate_distance
@@ -41,6 +41,28 @@ class AvailabilitySerializer(serializers.ModelSerializer):
 
 
 
+class AvailabilityScheduleEntrySerializer(serializers.Serializer):
+    """
+    One entry of a weekly schedule payload: a time range repeated on several days.
+    Validates the shape only; the slots are written in bulk by the view.
+    """
+    start = serializers.TimeField()
+    end = serializers.TimeField()
+    days = serializers.ListField(child=serializers.ChoiceField(choices=Availability.DAY_CHOICES), allow_empty=True)
+
+    def validate(self, data):
+        if data['start'] >= data['end']:
+            raise serializers.ValidationError({"end": "End time must be after the start time."})
+        return data
+
+
+class JobPostScheduleEntrySerializer(AvailabilityScheduleEntrySerializer):
+    """
+    One entry of a job post schedule payload; entries of the same job_post are merged.
+    """
+    job_post = serializers.IntegerField(min_value=1)
+
+
 @extend_schema_serializer(
     examples = [
          OpenApiExample(
@@ -88,7 +110,8 @@ class TeacherProfileSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = TeacherProfile
-        fields = '__all__'
+        # The availability bitmap is a matching index; the API exposes the Availability rows.
+        exclude = ('availability_mask',)
         extra_kwargs = {
             'verified': {'read_only': True},
             'user': {'read_only': True},
@@ -203,7 +226,6 @@ class JobPostSerializer(serializers.ModelSerializer):
     grade = GradeSerializer(read_only=True)
     subject_list = SubjectSerializer(read_only=True, many=True)
     medium = MediumSerializer(read_only=True)
-    bids_count = serializers.IntegerField(read_only=True)
     editable = serializers.SerializerMethodField()
     distance = serializers.SerializerMethodField()
     posted_by_name = serializers.SerializerMethodField()
@@ -229,12 +251,16 @@ class JobPostSerializer(serializers.ModelSerializer):
         write_only=True,
         required=False
     )
+
     class Meta:
         model = JobPost
-        fields = '__all__'
+        # The schedule bitmap is a matching index; the API exposes the availability rows.
+        exclude = ('schedule_mask',)
         extra_kwargs = {
             'id': {'read_only': True},
             'posted_by': {'read_only': True},
+            # Jobs are closed by the award action; an edit must never reopen one.
+            'status': {'read_only': True},
         }
     
     def validate(self, data):
@@ -253,21 +279,44 @@ class JobPostSerializer(serializers.ModelSerializer):
 
         return data
 
+    def update(self, instance, validated_data):
+        # Write only the fields sent in the request, so an edit never reverts a
+        # status change (e.g. an award) committed while it was in flight.
+        subjects = validated_data.pop("subject_list", None)
+        for name, value in validated_data.items():
+            setattr(instance, name, value)
+        instance.save(update_fields=[*validated_data, "updated_at"])
+        if subjects is not None:
+            instance.subject_list.set(subjects)
+        return instance
+
+    # The viewer-dependent fields read the annotations of
+    # base.utils.annotate_job_viewer_fields, and are computed per row only for
+    # instances that were not loaded through it (e.g. the create response).
     def get_editable(self, obj):
+        if hasattr(obj, "viewer_editable"):
+            return obj.viewer_editable
         return obj.posted_by == self.context["request"].user
 
 
     def get_posted_by_name(self, obj):
+        if hasattr(obj, "posted_by_name"):
+            return obj.posted_by_name
         return obj.posted_by.get_full_name()
 
 
     def get_distance(self, obj):
+        if hasattr(obj, "viewer_distance"):
+            return round(obj.viewer_distance.km, 2) if obj.viewer_distance is not None else None
         user = self.context["request"].user
         if user.location and obj.posted_by.location:
             return calculate_distance(user.location, obj.posted_by.location)
         return None
 
     def get_is_biddable(self, obj):
+        if hasattr(obj, "viewer_is_biddable"):
+            return obj.viewer_is_biddable
+
         request = self.context.get("request")
         user = request.user if request else None
 
@@ -300,6 +349,12 @@ class BidJobSerializer(serializers.ModelSerializer):
             "tutor": {"read_only": True},
         }
 
+    def validate_status(self, value):
+        # A bid is only ever accepted by the job owner's award, never placed as accepted.
+        if self.instance is None and value != "pending":
+            raise serializers.ValidationError("New bids are always pending.")
+        return value
+
     def validate(self, attrs):
         request = self.context["request"]
         tutor = getattr(request.user, "teacher_profile", None)
@@ -319,11 +374,7 @@ class BidJobSerializer(serializers.ModelSerializer):
                 {"detail": "Only teachers can place bids."}
             )
 
-        if BidJob.objects.filter(job=job, tutor=tutor).exists():
-            raise serializers.ValidationError(
-                {"detail": "You have already placed a bid on this job."}
-            )
-
+        # Duplicate bids are rejected by the unique_bid_per_tutor constraint on insert.
         return attrs
 
     def to_representation(self, instance):
@@ -331,6 +382,13 @@ class BidJobSerializer(serializers.ModelSerializer):
         representation["teacher_phone"] = (
             instance.tutor.phone if instance.tutor else None
         )
+        # Tutor name and rating summary come from the joined user and profile rows.
+        tutor = instance.tutor
+        representation["tutor_name"] = tutor.user.get_full_name() if tutor else None
+        representation["reviews_average"] = (
+            round(tutor.rating_sum / tutor.rating_count, 2) if tutor and tutor.rating_count else None
+        )
+        representation["reviews_count"] = tutor.rating_count if tutor else 0
         return representation
 
     
@@ -360,6 +418,7 @@ class ContactRequestSerializer(serializers.ModelSerializer):
             'created_at': {'read_only': True},
             'updated_at': {'read_only': True},
             'student': {'read_only': True},
+            'email_opened_at': {'read_only': True},
         }
     
     def to_representation(self, instance):
@@ -405,6 +464,26 @@ class ContactRequestSerializer(serializers.ModelSerializer):
         return representation
 
 
+class ContactRequestBulkStatusSerializer(serializers.Serializer):
+    """
+    Payload of a bulk status transition: the new status and either explicit ids
+    or every request created before older_than (optionally only in from_status).
+    """
+    BULK_STATUSES = ('seen', 'accepted', 'rejected', 'contacted')
+    MAX_IDS = 500
+
+    status = serializers.ChoiceField(choices=BULK_STATUSES)
+    ids = serializers.ListField(child=serializers.IntegerField(min_value=1), required=False,
+                                allow_empty=False, max_length=MAX_IDS)
+    older_than = serializers.DateTimeField(required=False)
+    from_status = serializers.MultipleChoiceField(choices=STATUS_CHOICES, required=False)
+
+    def validate(self, data):
+        if ('ids' in data) == ('older_than' in data):
+            raise serializers.ValidationError({"detail": "Send either ids or older_than."})
+        return data
+
+
 class TeacherReviewSerializer(serializers.ModelSerializer):
     class Meta:
         model = TeacherReview
@@ -419,7 +498,7 @@ class TeacherReviewSerializer(serializers.ModelSerializer):
             contact_obj.student.get_full_name() if contact_obj and contact_obj.student else ""
         )
         representation['tutor_id'] = (
-            contact_obj.teacher.id if contact_obj and contact_obj.teacher else ""
+            contact_obj.teacher_id if contact_obj and contact_obj.teacher_id else ""
         )
         return representation
    
\ No newline at end of file
@@ -0,0 +1,316 @@
+from django.db import transaction
+from django.db.models import F, OuterRef, Subquery, Value
+from django.db.models.functions import Greatest
+from django.db.models.signals import pre_save, post_save, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from .dashboard import invalidate_user_dashboards
+from .matching import refresh_job_feed, refresh_teacher_feed
+from .review_pages import invalidate_tutor_reviews
+from .models import (CustomUser, TeacherProfile, TeacherReview, Grade, Medium, Subject, TeacherSearchIndex,
+                     AcademicProfile, Qualification, Availability, JobPost, JobPostAvailability, BidJob,
+                     ContactRequest)
+from .search_cache import invalidate_search_cache
+from .utils import (refresh_teacher_search_index, sync_availability_masks, sync_schedule_masks, sync_job_subject_ids,
+                    bump_teacher_rating)
+
+
+def on_commit_once(key, func):
+    """
+    transaction.on_commit() that skips func when a callback with the same key is
+    already pending in the current transaction. Queryset deletes send one
+    post_delete per row, and this keeps them to a single refresh.
+    """
+    connection = transaction.get_connection()
+    if connection.in_atomic_block:
+        if any(getattr(callback, 'commit_key', None) == key for _, callback, _ in connection.run_on_commit):
+            return
+    func.commit_key = key
+    transaction.on_commit(func)
+
+
+# --------------------------------------------------
+# TEACHER SEARCH INDEX
+# --------------------------------------------------
+def schedule_search_index_refresh(teacher_ids):
+    """
+    Refreshes the search index rows of the given teachers once the current
+    transaction commits, so a profile saved together with its m2m lists is
+    indexed in its final state.
+    """
+    teacher_ids = {teacher_id for teacher_id in teacher_ids if teacher_id}
+    if teacher_ids:
+        on_commit_once(('search-index', frozenset(teacher_ids)), lambda: refresh_teacher_search_index(teacher_ids))
+
+
+def schedule_feed_refresh(teacher_ids):
+    """
+    Rebuilds the job feed of the given teachers after commit. Registered after
+    the search index refresh, so the feed is computed from the fresh rows.
+    """
+    teacher_ids = {teacher_id for teacher_id in teacher_ids if teacher_id}
+    if teacher_ids:
+        on_commit_once(('teacher-feed', frozenset(teacher_ids)), lambda: refresh_teacher_feed(teacher_ids))
+
+
+@receiver(post_save, sender=TeacherProfile)
+def teacher_profile_saved(sender, instance, **kwargs):
+    schedule_search_index_refresh([instance.id])
+    schedule_feed_refresh([instance.id])
+
+
+@receiver(post_save, sender=CustomUser)
+def user_saved(sender, instance, created, update_fields=None, **kwargs):
+    # Name and location live on the user; other saves (e.g. last_login) change nothing indexed.
+    if created or not instance.search_fields_changed(update_fields):
+        return
+    instance._loaded_search_fields = {name: getattr(instance, name) for name in CustomUser.SEARCH_FIELDS}
+    teacher_ids = list(TeacherProfile.objects.filter(user=instance).values_list('id', flat=True))
+    schedule_search_index_refresh(teacher_ids)
+    schedule_feed_refresh(teacher_ids)
+    # Jobs are matched against the poster's location.
+    schedule_job_feed_refresh(JobPost.objects.filter(posted_by=instance, status='open').values_list('id', flat=True))
+
+
+@receiver(m2m_changed, sender=TeacherProfile.subject_list.through)
+@receiver(m2m_changed, sender=TeacherProfile.grade_list.through)
+@receiver(m2m_changed, sender=TeacherProfile.medium_list.through)
+def teacher_lists_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            schedule_search_index_refresh([instance.id])
+            schedule_feed_refresh([instance.id])
+    elif action in ('post_add', 'post_remove'):
+        schedule_search_index_refresh(pk_set)
+    elif action == 'pre_clear':
+        # Reverse clear (e.g. grade.tutors.clear()): collect the tutors before the links go.
+        schedule_search_index_refresh(
+            sender.objects.filter(**{instance._meta.model_name: instance}).values_list('teacherprofile_id', flat=True)
+        )
+
+
+@receiver(post_save, sender=TeacherReview)
+@receiver(post_delete, sender=TeacherReview)
+def teacher_review_changed(sender, instance, **kwargs):
+    schedule_search_index_refresh([instance.contact_request.teacher_id])
+
+
+@receiver(post_save, sender=AcademicProfile)
+@receiver(post_delete, sender=AcademicProfile)
+@receiver(post_save, sender=Qualification)
+@receiver(post_delete, sender=Qualification)
+def credentials_changed(sender, instance, **kwargs):
+    # Degrees, institutions and skills feed the full-text search document.
+    schedule_search_index_refresh([instance.teacher_id])
+
+
+@receiver(post_save, sender=Subject)
+def subject_saved(sender, instance, created, **kwargs):
+    if not created:
+        schedule_search_index_refresh(instance.tutors.values_list('id', flat=True))
+
+
+@receiver(post_save, sender=Grade)
+def grade_saved(sender, instance, created, **kwargs):
+    # Grade names and sequences are copied into the index as maximum_grade.
+    if not created:
+        schedule_search_index_refresh(instance.tutors.values_list('id', flat=True))
+
+
+@receiver(post_save, sender=Medium)
+def medium_saved(sender, instance, created, **kwargs):
+    if not created:
+        schedule_search_index_refresh(instance.teacher_profiles.values_list('id', flat=True))
+
+
+@receiver(post_delete, sender=TeacherSearchIndex)
+def search_index_deleted(sender, instance, **kwargs):
+    # The row goes away with its teacher; drop the cached searches around it.
+    transaction.on_commit(lambda: invalidate_search_cache([instance.location]))
+
+
+# --------------------------------------------------
+# AVAILABILITY BITMAPS
+# --------------------------------------------------
+def schedule_availability_refresh(teacher_ids):
+    """
+    Recomputes the availability bitmaps of the given teachers after commit, then
+    their job feeds. Also called by writes that bypass the signals (bulk_create).
+    """
+    teacher_ids = {teacher_id for teacher_id in teacher_ids if teacher_id}
+    if teacher_ids:
+        on_commit_once(('availability', frozenset(teacher_ids)), lambda: sync_availability_masks(teacher_ids))
+        schedule_feed_refresh(teacher_ids)
+
+
+def schedule_job_schedule_refresh(job_ids):
+    """
+    Recomputes the schedule bitmaps of the given jobs after commit, then re-pushes them to the feeds.
+    """
+    job_ids = {job_id for job_id in job_ids if job_id}
+    if job_ids:
+        on_commit_once(('job-schedule', frozenset(job_ids)), lambda: sync_schedule_masks(job_ids))
+        schedule_job_feed_refresh(job_ids)
+
+
+@receiver(post_save, sender=Availability)
+@receiver(post_delete, sender=Availability)
+def availability_changed(sender, instance, **kwargs):
+    schedule_availability_refresh([instance.tutor_id])
+
+
+@receiver(post_save, sender=JobPostAvailability)
+@receiver(post_delete, sender=JobPostAvailability)
+def job_post_availability_changed(sender, instance, **kwargs):
+    schedule_job_schedule_refresh([instance.job_post_id])
+
+
+# --------------------------------------------------
+# TEACHER JOB FEED
+# --------------------------------------------------
+def schedule_job_feed_refresh(job_ids):
+    """
+    Pushes the given jobs to (or removes them from) the matching teachers' feeds after commit.
+    """
+    job_ids = {job_id for job_id in job_ids if job_id}
+    if job_ids:
+        on_commit_once(('job-feed', frozenset(job_ids)), lambda: refresh_job_feed(job_ids))
+
+
+@receiver(post_save, sender=JobPost)
+def job_post_saved(sender, instance, **kwargs):
+    # Also covers closing a job, which drops it from every feed.
+    schedule_job_feed_refresh([instance.id])
+
+
+@receiver(m2m_changed, sender=JobPost.subject_list.through)
+def job_post_subjects_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    # JobPost.subject_ids mirrors the links right away, within the same transaction.
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            sync_job_subject_ids([instance.id])
+            schedule_job_feed_refresh([instance.id])
+    elif action in ('post_add', 'post_remove'):
+        sync_job_subject_ids(pk_set)
+        schedule_job_feed_refresh(pk_set)
+    elif action == 'pre_clear':
+        instance._cleared_job_ids = list(sender.objects.filter(subject=instance).values_list('jobpost_id', flat=True))
+    elif action == 'post_clear':
+        job_ids = getattr(instance, '_cleared_job_ids', [])
+        sync_job_subject_ids(job_ids)
+        schedule_job_feed_refresh(job_ids)
+
+
+@receiver(post_delete, sender=Subject)
+def subject_deleted(sender, instance, **kwargs):
+    # The links went with the subject, without m2m_changed.
+    sync_job_subject_ids(JobPost.objects.filter(subject_ids__contains=[instance.id]).values_list('id', flat=True))
+
+
+# --------------------------------------------------
+# JOB POST BID COUNTERS
+# --------------------------------------------------
+# Single-statement F() updates, so concurrent bids never lose an increment.
+@receiver(post_save, sender=BidJob)
+def bid_saved(sender, instance, created, **kwargs):
+    # accepted_bid is only ever set by the award action, never from a bid's status.
+    if not created:
+        return
+    # GREATEST ignores NULL, so the first bid sets last_bid_at.
+    JobPost.objects.filter(id=instance.job_id).update(
+        bids_count=F('bids_count') + 1,
+        last_bid_at=Greatest('last_bid_at', Value(instance.created_at)),
+    )
+
+
+@receiver(post_delete, sender=BidJob)
+def bid_deleted(sender, instance, **kwargs):
+    # accepted_bid is cleared by its on_delete=SET_NULL.
+    JobPost.objects.filter(id=instance.job_id).update(
+        bids_count=Greatest(F('bids_count') - 1, 0),
+        last_bid_at=Subquery(
+            BidJob.objects.filter(job=OuterRef('pk')).order_by('-created_at').values('created_at')[:1]
+        ),
+    )
+
+
+# --------------------------------------------------
+# TEACHER RATING SUMMARY
+# --------------------------------------------------
+@receiver(pre_save, sender=TeacherReview)
+def teacher_review_saving(sender, instance, **kwargs):
+    # Edits move the summary by the difference to the stored review.
+    instance._stored_rating = (
+        TeacherReview.objects.filter(pk=instance.pk).values_list('rating', 'contact_request__teacher_id').first()
+        if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=TeacherReview)
+def teacher_review_rated(sender, instance, **kwargs):
+    teacher_id = instance.contact_request.teacher_id
+    stored = getattr(instance, '_stored_rating', None)
+    if stored is None:
+        bump_teacher_rating(teacher_id, instance.rating, 1)
+    elif stored[1] == teacher_id:
+        bump_teacher_rating(teacher_id, instance.rating - stored[0], 0)
+    else:
+        bump_teacher_rating(stored[1], -stored[0], -1)
+        bump_teacher_rating(teacher_id, instance.rating, 1)
+
+
+@receiver(post_delete, sender=TeacherReview)
+def teacher_review_unrated(sender, instance, **kwargs):
+    bump_teacher_rating(instance.contact_request.teacher_id, -instance.rating, -1)
+
+
+# --------------------------------------------------
+# TUTOR REVIEW PAGES CACHE
+# --------------------------------------------------
+@receiver(post_save, sender=TeacherReview)
+@receiver(post_delete, sender=TeacherReview)
+def teacher_review_pages_changed(sender, instance, **kwargs):
+    # An edit may move the review to another tutor (see teacher_review_saving).
+    stored = getattr(instance, '_stored_rating', None)
+    teacher_ids = {instance.contact_request.teacher_id, stored[1] if stored else None} - {None}
+    on_commit_once(('tutor-reviews', frozenset(teacher_ids)), lambda: invalidate_tutor_reviews(teacher_ids))
+
+
+# --------------------------------------------------
+# USER DASHBOARD CACHE
+# --------------------------------------------------
+def schedule_dashboard_invalidation(user_ids):
+    """
+    Invalidates the cached dashboards of the given users once the write commits.
+    """
+    user_ids = {user_id for user_id in user_ids if user_id}
+    if user_ids:
+        on_commit_once(('dashboard', frozenset(user_ids)), lambda: invalidate_user_dashboards(user_ids))
+
+
+@receiver(post_save, sender=JobPost)
+@receiver(post_delete, sender=JobPost)
+def job_post_dashboard_changed(sender, instance, **kwargs):
+    schedule_dashboard_invalidation([instance.posted_by_id])
+
+
+@receiver(post_save, sender=BidJob)
+@receiver(post_delete, sender=BidJob)
+def bid_dashboard_changed(sender, instance, **kwargs):
+    # The bidder's placed bids and the job owner's received bids.
+    schedule_dashboard_invalidation([instance.tutor.user_id, instance.job.posted_by_id])
+
+
+@receiver(post_save, sender=ContactRequest)
+@receiver(post_delete, sender=ContactRequest)
+def contact_request_dashboard_changed(sender, instance, **kwargs):
+    schedule_dashboard_invalidation([instance.student_id, instance.teacher.user_id])
+
+
+@receiver(post_save, sender=TeacherReview)
+@receiver(post_delete, sender=TeacherReview)
+def review_dashboard_changed(sender, instance, **kwargs):
+    # The rating summary is read from the search index, refreshed on commit before this runs.
+    schedule_dashboard_invalidation(
+        ContactRequest.objects.filter(id=instance.contact_request_id).values_list('teacher__user_id', flat=True)
+    )
@@ -1,8 +1,55 @@
-from django.test import TestCase
-from django.contrib.auth import get_user_model
+import base64
+import threading
 from datetime import time
-from .models import TeacherProfile, Availability # Import your models
-from .utils import find_available_tutors # Import the function to be tested
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.contrib.gis.geos import Point
+from django.contrib.gis.measure import D
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient, APIRequestFactory
+
+from .cache_versions import bump_version, get_entry, get_version, set_entry
+from .matching import MATCH_WEIGHTS, refresh_teacher_feed, score_candidates
+from .models import (Availability, BidJob, ContactRequest, Grade, JobPost, JobPostAvailability, Medium, Subject,
+                     TeacherProfile, TeacherReview, UserDashboard, RATING_PRIOR_MEAN, RATING_PRIOR_WEIGHT)
+from .open_tracking import PIXEL_GIF, email_open_pixel_url, flush_email_opens, make_open_token
+from .pagination import decode_cursor, encode_cursor
+from .review_pages import REVIEW_PAGE_SIZE
+from .serializer import JobPostSerializer
+from .utils import (calculate_distance, calculate_distances, find_available_tutors, get_average_review,
+                    time_range_mask, week_mask)
+
+def make_user(username, **extra):
+    return get_user_model().objects.create_user(username=username, email=f"{username}@gmail.com", **extra)
+
+
+def make_teacher(username="tutor", **extra):
+    return TeacherProfile.objects.create(user=make_user(username, **extra))
+
+
+def make_job(posted_by, title="Math tutor", description="Class 6 math", **extra):
+    return JobPost.objects.create(title=title, description=description, posted_by=posted_by, **extra)
+
+
+def make_contact_request(student, teacher, **extra):
+    return ContactRequest.objects.create(student=student, teacher=teacher, student_name="Student",
+                                         student_phone="0123", **extra)
+
+
+def api_client(user=None):
+    client = APIClient()
+    if user is not None:
+        client.force_authenticate(user=user)
+    return client
+
 
 class FindAvailableTutorsTestCase(TestCase):
     """
@@ -13,41 +60,39 @@ class FindAvailableTutorsTestCase(TestCase):
         """
         Set up test data (tutors and their availabilities) before each test method.
         """
-        User = get_user_model()
-        # Create User instances
-        user1 = User.objects.create_user(username="junaid", email="junaid@gmail.com")
-        user2 = User.objects.create_user(username="tarikul", email="tarikul@gmail.com")
-        user3 = User.objects.create_user(username="tasmin", email="tasmin@gmail.com")
-        user4 = User.objects.create_user(username="243000522e", email="243000522e@gmail.com")
-
         # Create TeacherProfile instances
-        self.tutor1 = TeacherProfile.objects.create(user=user1)
-        self.tutor2 = TeacherProfile.objects.create(user=user2)
-        self.tutor3 = TeacherProfile.objects.create(user=user3)
-        self.tutor4 = TeacherProfile.objects.create(user=user4)
+        self.tutor1 = make_teacher("junaid")
+        self.tutor2 = make_teacher("tarikul")
+        self.tutor3 = make_teacher("tasmin")
+        self.tutor4 = make_teacher("243000522e")
 
+        # Availability writes sync the tutors' bitmaps on commit.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_availabilities()
+
+    def create_availabilities(self):
         # Create Availability instances for Tutor 1 (Alice)
-        Availability.objects.create(tutor=self.tutor1, day_of_week='MON',
+        Availability.objects.create(tutor=self.tutor1, days_of_week='MO',
                                    start_time=time(9, 0), end_time=time(12, 0))
-        Availability.objects.create(tutor=self.tutor1, day_of_week='MON',
+        Availability.objects.create(tutor=self.tutor1, days_of_week='MO',
                                    start_time=time(14, 0), end_time=time(17, 0))
-        Availability.objects.create(tutor=self.tutor1, day_of_week='TUE',
+        Availability.objects.create(tutor=self.tutor1, days_of_week='TU',
                                    start_time=time(10, 0), end_time=time(13, 0))
 
         # Create Availability instances for Tutor 2 (Bob)
-        Availability.objects.create(tutor=self.tutor2, day_of_week='MON',
+        Availability.objects.create(tutor=self.tutor2, days_of_week='MO',
                                    start_time=time(10, 0), end_time=time(13, 0))
-        Availability.objects.create(tutor=self.tutor2, day_of_week='WED',
+        Availability.objects.create(tutor=self.tutor2, days_of_week='WE',
                                    start_time=time(9, 0), end_time=time(12, 0))
 
         # Create Availability instances for Tutor 3 (Charlie)
-        Availability.objects.create(tutor=self.tutor3, day_of_week='MON',
+        Availability.objects.create(tutor=self.tutor3, days_of_week='MO',
                                    start_time=time(9, 30), end_time=time(11, 30))
-        Availability.objects.create(tutor=self.tutor3, day_of_week='MON',
+        Availability.objects.create(tutor=self.tutor3, days_of_week='MO',
                                    start_time=time(15, 0), end_time=time(16, 0))
 
         # Create Availability instances for Tutor 4 (Diana) - No Monday availability
-        Availability.objects.create(tutor=self.tutor4, day_of_week='TUE',
+        Availability.objects.create(tutor=self.tutor4, days_of_week='TU',
                                    start_time=time(9, 0), end_time=time(17, 0))
 
 
@@ -55,7 +100,7 @@ class FindAvailableTutorsTestCase(TestCase):
         """
         Test finding tutors for a time slot that exactly matches an availability.
         """
-        desired_day = 'MON'
+        desired_day = 'MO'
         desired_start = time(9, 0)
         desired_end = time(12, 0)
         found_tutors = find_available_tutors(desired_day, desired_start, desired_end)
@@ -66,7 +111,7 @@ class FindAvailableTutorsTestCase(TestCase):
         """
         Test finding tutors for a time slot that is completely within a larger availability.
         """
-        desired_day = 'MON'
+        desired_day = 'MO'
         desired_start = time(10, 0)
         desired_end = time(11, 0)
         found_tutors = find_available_tutors(desired_day, desired_start, desired_end)
@@ -79,7 +124,7 @@ class FindAvailableTutorsTestCase(TestCase):
         """
         Test finding multiple tutors available for the same specific slot.
         """
-        desired_day = 'MON'
+        desired_day = 'MO'
         desired_start = time(10, 30)
         desired_end = time(11, 0)
         found_tutors = find_available_tutors(desired_day, desired_start, desired_end)
@@ -92,7 +137,7 @@ class FindAvailableTutorsTestCase(TestCase):
         """
         Test case where no tutors are available for the desired slot.
         """
-        desired_day = 'MON'
+        desired_day = 'MO'
         desired_start = time(12, 30) # Between Alice's two slots, and after Bob's first slot
         desired_end = time(13, 30)
         found_tutors = find_available_tutors(desired_day, desired_start, desired_end)
@@ -107,7 +152,7 @@ class FindAvailableTutorsTestCase(TestCase):
         # Alice: 9-12 (overlaps, but ends too early)
         # Bob: 10-13 (overlaps, but starts too late if desired_start was earlier)
         # Charlie: 9:30-11:30 (overlaps, but ends too early)
-        desired_day = 'MON'
+        desired_day = 'MO'
         desired_start = time(11, 0)
         desired_end = time(13, 0)
         found_tutors = find_available_tutors(desired_day, desired_start, desired_end)
@@ -118,7 +163,7 @@ class FindAvailableTutorsTestCase(TestCase):
         """
         Test finding tutors on a different day.
         """
-        desired_day = 'TUE'
+        desired_day = 'TU'
         desired_start = time(10, 30)
         desired_end = time(12, 0)
         found_tutors = find_available_tutors(desired_day, desired_start, desired_end)
@@ -131,7 +176,7 @@ class FindAvailableTutorsTestCase(TestCase):
         Test with an invalid desired time range (end time before start time).
         Should return an empty list.
         """
-        desired_day = 'MON'
+        desired_day = 'MO'
         desired_start = time(15, 0)
         desired_end = time(14, 0) # Invalid range
         found_tutors = find_available_tutors(desired_day, desired_start, desired_end)
@@ -142,7 +187,7 @@ class FindAvailableTutorsTestCase(TestCase):
         Test with desired start time equal to desired end time.
         Should return an empty list.
         """
-        desired_day = 'MON'
+        desired_day = 'MO'
         desired_start = time(10, 0)
         desired_end = time(10, 0)
         found_tutors = find_available_tutors(desired_day, desired_start, desired_end)
@@ -152,19 +197,1186 @@ class FindAvailableTutorsTestCase(TestCase):
         """
         Test a scenario where a tutor has multiple slots, and one of them covers the desired time.
         """
-        desired_day = 'MON'
+        desired_day = 'MO'
         desired_start = time(14, 30)
         desired_end = time(16, 30)
         found_tutors = find_available_tutors(desired_day, desired_start, desired_end)
         self.assertIn(self.tutor1, found_tutors) # Alice's 2-5 PM slot covers this
         self.assertEqual(len(found_tutors), 1)
 
+    def test_off_grid_window_matches_same_availability(self):
+        """
+        Windows off the 30-minute grid are rounded like stored availability.
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            Availability.objects.create(tutor=self.tutor2, days_of_week='TH',
+                                       start_time=time(9, 15), end_time=time(10, 15))
+        found_tutors = find_available_tutors('TH', time(9, 15), time(10, 15))
+        self.assertEqual(found_tutors, [self.tutor2])
+
     def test_no_availability_for_day(self):
         """
         Test a day for which no tutors have availability.
         """
-        desired_day = 'FRI' # No tutor has Friday availability in setUp
+        desired_day = 'FR' # No tutor has Friday availability in setUp
         desired_start = time(9, 0)
         desired_end = time(10, 0)
         found_tutors = find_available_tutors(desired_day, desired_start, desired_end)
-        self.assertEqual(len(found_tutors), 0)
\ No newline at end of file
+        self.assertEqual(len(found_tutors), 0)
+
+class FilterTeachersQueryCountTestCase(TestCase):
+    """
+    filter_teachers must build its response from a fixed number of queries,
+    reading the search index kept current by the signal handlers.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+        self.student = make_user("student", location=Point(90.4125, 23.8103, srid=4326))
+        grade = Grade.objects.create(name="Class 6th", sequence=6)
+        medium = Medium.objects.create(name="English")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.create_tutors(grade, medium)
+
+        self.client = api_client(self.student)
+
+    def create_tutors(self, grade, medium):
+        for index in range(5):
+            user = make_user(f"tutor{index}", location=Point(90.41 + index / 100, 23.81, srid=4326))
+            tutor = TeacherProfile.objects.create(user=user, min_salary=1000 * index)
+            tutor.grade_list.add(grade)
+            tutor.medium_list.add(medium)
+            TeacherReview.objects.create(contact_request=make_contact_request(self.student, tutor), rating=4)
+
+    def test_single_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/filter-teachers/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 5)
+        first = response.data[0]
+        self.assertEqual(first["reviews_count"], 1)
+        self.assertEqual(first["reviews_average"], 4)
+        self.assertEqual(first["maximum_grade"], "Class 6th")
+        self.assertEqual(first["medium_list"], "English")
+        self.assertIsNotNone(first["distance"])
+
+    def test_cached_until_teacher_changes(self):
+        self.client.get('/filter-teachers/', {'distance': 5})
+        with self.assertNumQueries(0):
+            response = self.client.get('/filter-teachers/', {'distance': 5})
+        self.assertEqual(len(response.data), 5)
+
+        tutor = TeacherProfile.objects.get(user__username="tutor0")
+        with self.captureOnCommitCallbacks(execute=True):
+            tutor.min_salary = 99999
+            tutor.save()
+        response = self.client.get('/filter-teachers/', {'distance': 5, 'feeRange': 50000})
+        self.assertEqual(len(response.data), 4)
+        response = self.client.get('/filter-teachers/', {'distance': 5})
+        self.assertIn(99999, [row["expected_salary"] for row in response.data])
+
+    def test_malformed_filter_is_rejected(self):
+        for params in ({'distance': 'abc', 'feeRange': 1000}, {'sort': 'salary', 'grade': 'x'}):
+            response = self.client.get('/filter-teachers/', params)
+            self.assertEqual(response.status_code, 400)
+        self.assertIn('distance', self.client.get('/filter-teachers/', {'distance': 'abc'}).data)
+
+
+class NearestTeachersTestCase(TestCase):
+    """
+    nearest_teachers returns the k closest tutors with a location, nearest first.
+    """
+
+    def setUp(self):
+        self.student = make_user("student", location=Point(90.40, 23.81, srid=4326))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tutors = [make_teacher(f"tutor{index}", location=Point(90.40 + offset, 23.81, srid=4326))
+                           for index, offset in enumerate((0.02, 0.01, 0.2, 0.03))]
+            make_teacher("nowhere")
+        self.client = api_client(self.student)
+
+    def nearest(self, **params):
+        response = self.client.get('/nearest-teachers/', params)
+        self.assertEqual(response.status_code, 200)
+        return [row["id"] for row in response.data]
+
+    def test_nearest_first(self):
+        tutor0, tutor1, tutor2, tutor3 = (tutor.id for tutor in self.tutors)
+        self.assertEqual(self.nearest(), [tutor1, tutor0, tutor3, tutor2])
+        self.assertEqual(self.nearest(distance=5), [tutor1, tutor0, tutor3])
+        self.assertEqual(self.nearest(k=2), [tutor1, tutor0])
+
+    def test_k_is_clamped(self):
+        self.assertEqual(len(self.nearest(k=0)), 1)
+        self.assertEqual(len(self.nearest(k=1000)), 4)
+
+    def test_invalid_requests_are_rejected(self):
+        self.assertEqual(self.client.get('/nearest-teachers/', {'k': 'abc'}).status_code, 400)
+        self.assertEqual(self.client.get('/nearest-teachers/', {'distance': 'far'}).status_code, 400)
+        response = api_client(make_user("homeless")).get('/nearest-teachers/')
+        self.assertEqual(response.status_code, 400)
+
+
+class TeacherTextSearchTestCase(TestCase):
+    """
+    search_teachers ranks the search index by full-text and trigram matches;
+    autocomplete_teachers suggests subject and teacher names.
+    """
+
+    def setUp(self):
+        self.student = make_user("student")
+        math = Subject.objects.create(name="Mathematics")
+        with self.captureOnCommitCallbacks(execute=True):
+            self.math_tutor = make_teacher("rahim", first_name="Rahim", last_name="Uddin")
+            self.math_tutor.subject_list.add(math)
+            self.physics_tutor = make_teacher("karim", first_name="Karim", last_name="Hasan",
+                                              bio="Physics olympiad coach")
+            make_teacher("nadia", first_name="Nadia", last_name="Islam", bio="Bangla literature")
+        self.client = api_client(self.student)
+
+    def search(self, **params):
+        response = self.client.get('/search-teachers/', params)
+        self.assertEqual(response.status_code, 200)
+        return [row["id"] for row in response.data["results"]]
+
+    def test_matches_bio_and_misspelled_subject(self):
+        self.assertEqual(self.search(q="olympiad"), [self.physics_tutor.id])
+        self.assertEqual(self.search(q="Mathmatics"), [self.math_tutor.id])
+
+    def test_name_match_ranks_first(self):
+        self.physics_tutor.bio = "Coaches Rahim's friends in physics"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.physics_tutor.save()
+        self.assertEqual(self.search(q="Rahim"), [self.math_tutor.id, self.physics_tutor.id])
+
+    def test_pages_follow_the_cursor(self):
+        self.physics_tutor.bio = "Rahim's friend"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.physics_tutor.save()
+        first = self.client.get('/search-teachers/', {'q': "Rahim", 'page_size': 1}).data
+        self.assertEqual([row["id"] for row in first["results"]], [self.math_tutor.id])
+        self.assertEqual(self.search(q="Rahim", page_size=1, cursor=first["cursor"]), [self.physics_tutor.id])
+
+    def test_short_query_is_rejected(self):
+        self.assertEqual(self.client.get('/search-teachers/', {'q': " a "}).status_code, 400)
+        self.assertEqual(self.client.get('/search-teachers/').status_code, 400)
+
+    def test_autocomplete(self):
+        response = self.client.get('/autocomplete/', {'q': "Mathmat"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["name"] for row in response.data["subjects"]], ["Mathematics"])
+        self.assertEqual(response.data["teachers"], [])
+
+        response = self.client.get('/autocomplete/', {'q': "Rahi"})
+        self.assertEqual(response.data["teachers"], [{"id": self.math_tutor.id, "name": "Rahim Uddin"}])
+        self.assertEqual(self.client.get('/autocomplete/', {'q': "R"}).data, {"subjects": [], "teachers": []})
+
+
+class JobFeedTestCase(TestCase):
+    """
+    Open jobs are pushed to the feeds of the matching tutors within reach, and
+    leave them once closed.
+    """
+
+    def setUp(self):
+        self.student = make_user("student", location=Point(90.4125, 23.8103, srid=4326))
+        self.grade = Grade.objects.create(name="Class 6th", sequence=6)
+        self.subject = Subject.objects.create(name="Math", grade=self.grade)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.near = self.create_tutor("near", Point(90.42, 23.81, srid=4326))
+            self.far = self.create_tutor("far", Point(91.80, 22.35, srid=4326))
+
+        self.client = api_client()
+
+    def create_tutor(self, username, location):
+        tutor = TeacherProfile.objects.create(user=make_user(username, location=location), preferred_distance=10)
+        tutor.grade_list.add(self.grade)
+        tutor.subject_list.add(self.subject)
+        return tutor
+
+    def post_job(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            job = make_job(self.student, grade=self.grade, teaching_mode='offline')
+            job.subject_list.add(self.subject)
+        return job
+
+    def feed_of(self, tutor):
+        self.client.force_authenticate(user=tutor.user)
+        response = self.client.get('/job-post/feed/')
+        self.assertEqual(response.status_code, 200)
+        return [row["id"] for row in response.data["results"]]
+
+    def test_job_reaches_matching_tutors_within_distance(self):
+        job = self.post_job()
+        self.assertEqual(self.feed_of(self.near), [job.id])
+        self.assertEqual(self.feed_of(self.far), [])
+
+    def test_closed_job_leaves_feed(self):
+        job = self.post_job()
+        with self.captureOnCommitCallbacks(execute=True):
+            job.status = 'closed'
+            job.save()
+        self.assertEqual(self.feed_of(self.near), [])
+
+    def test_new_subject_pulls_existing_jobs(self):
+        physics = Subject.objects.create(name="Physics", grade=self.grade)
+        job = self.post_job()
+        with self.captureOnCommitCallbacks(execute=True):
+            job.subject_list.set([physics])
+        self.assertEqual(self.feed_of(self.near), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.near.subject_list.add(physics)
+        self.assertEqual(self.feed_of(self.near), [job.id])
+
+    def test_own_job_stays_out_of_feed_on_both_paths(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            job = make_job(self.near.user, grade=self.grade, teaching_mode='online')
+            job.subject_list.add(self.subject)
+        self.assertEqual(self.feed_of(self.near), [])
+        refresh_teacher_feed([self.near.id])
+        self.assertEqual(self.feed_of(self.near), [])
+
+    def test_preferred_distance_sets_the_radius(self):
+        job = self.post_job()
+        self.assertEqual(self.feed_of(self.far), [])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.far.preferred_distance = 250
+            self.far.save()
+        self.assertEqual(self.feed_of(self.far), [job.id])
+
+    def test_only_indexed_user_changes_refresh(self):
+        user = get_user_model().objects.get(pk=self.near.user_id)
+        with self.captureOnCommitCallbacks() as callbacks:
+            user.last_login = timezone.now()
+            user.save(update_fields=['last_login'])
+            user.email = "near@example.com"
+            user.save()
+        self.assertEqual(callbacks, [])
+
+        with self.captureOnCommitCallbacks() as callbacks:
+            user.first_name = "Karim"
+            user.save()
+        self.assertNotEqual(callbacks, [])
+
+
+class JobMatchesTestCase(TestCase):
+    """
+    /job-post/<id>/matches/ ranks the tutors that can take the job, for its owner only.
+    """
+
+    def setUp(self):
+        self.owner = make_user("owner", location=Point(90.40, 23.81, srid=4326))
+        math = Subject.objects.create(name="Mathematics")
+        physics = Subject.objects.create(name="Physics")
+        with self.captureOnCommitCallbacks(execute=True):
+            # ~1 km, ~5 km, ~100 km (outside the default radius), and near but teaching physics.
+            self.near, self.farther, far, other = [
+                make_teacher(username, location=Point(90.40 + offset, 23.81, srid=4326))
+                for username, offset in (("near", 0.01), ("farther", 0.05), ("far", 1.0), ("other", 0.01))
+            ]
+            for tutor in (self.near, self.farther, far):
+                tutor.subject_list.add(math)
+            other.subject_list.add(physics)
+            self.job = make_job(self.owner)
+            self.job.subject_list.add(math)
+        self.client = api_client(self.owner)
+
+    def test_ranked_matches(self):
+        response = self.client.get(f'/job-post/{self.job.id}/matches/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row["id"] for row in response.data], [self.near.id, self.farther.id])
+        self.assertGreater(response.data[0]["match_score"], response.data[1]["match_score"])
+        self.assertLess(response.data[0]["distance"], response.data[1]["distance"])
+
+        response = self.client.get(f'/job-post/{self.job.id}/matches/', {'limit': 1})
+        self.assertEqual([row["id"] for row in response.data], [self.near.id])
+
+    def test_owner_only_and_valid_limit(self):
+        self.assertEqual(self.client.get(f'/job-post/{self.job.id}/matches/', {'limit': 'x'}).status_code, 400)
+        response = api_client(self.near.user).get(f'/job-post/{self.job.id}/matches/')
+        self.assertEqual(response.status_code, 403)
+
+
+class JobPostListQueryCountTestCase(TestCase):
+    """
+    The viewer-dependent job fields come from queryset annotations, so listing
+    jobs costs the same number of queries whatever the number of jobs.
+    """
+
+    def setUp(self):
+        self.student = make_user("student", first_name="Rahim", last_name="Uddin",
+                                 location=Point(90.4125, 23.8103, srid=4326))
+        self.tutor = make_teacher("teacher", location=Point(90.42, 23.81, srid=4326))
+        self.client = api_client(self.tutor.user)
+
+    def post_jobs(self, count):
+        jobs = [make_job(self.student, title=f"Job {index}", description="Math") for index in range(count)]
+        BidJob.objects.create(job=jobs[0], tutor=self.tutor, proposed_salary=1000)
+        return jobs
+
+    def list_jobs(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/job-post/')
+        self.assertEqual(response.status_code, 200)
+        return response.data["results"], len(context.captured_queries)
+
+    def test_constant_queries(self):
+        jobs = self.post_jobs(1)
+        _, single = self.list_jobs()
+        self.post_jobs(4)
+        data, many = self.list_jobs()
+        self.assertEqual(len(data), 6)
+        self.assertEqual(single, many)
+
+        rows = {row["id"]: row for row in data}
+        self.assertFalse(rows[jobs[0].id]["is_biddable"])
+        self.assertEqual(sum(row["is_biddable"] for row in data), 4)
+        self.assertEqual(rows[jobs[0].id]["posted_by_name"], "Rahim Uddin")
+        self.assertFalse(rows[jobs[0].id]["editable"])
+        self.assertIsNotNone(rows[jobs[0].id]["distance"])
+
+
+class JobBoardTestCase(TestCase):
+    """
+    Server-side filters and cursor pagination of the job board.
+    """
+
+    def setUp(self):
+        student = make_user("student", location=Point(90.4125, 23.8103, srid=4326))
+        viewer = make_user("viewer", location=Point(90.42, 23.81, srid=4326))
+        grade = Grade.objects.create(name="Class 6th", sequence=6)
+        self.math = Subject.objects.create(name="Math", grade=grade)
+        self.physics = Subject.objects.create(name="Physics", grade=grade)
+
+        self.jobs = []
+        for index in range(5):
+            job = make_job(student, title=f"Job {index}", description="Tuition",
+                           budget_salary=1000 * (index + 1), teaching_mode='offline')
+            job.subject_list.add(self.math if index % 2 == 0 else self.physics)
+            self.jobs.append(job)
+        JobPost.objects.filter(id=self.jobs[4].id).update(status='closed')
+
+        self.client = api_client(viewer)
+
+    def ids(self, **params):
+        response = self.client.get('/job-post/', params)
+        self.assertEqual(response.status_code, 200)
+        return [row["id"] for row in response.data["results"]]
+
+    def test_filters(self):
+        ids = [job.id for job in self.jobs]
+        self.assertEqual(self.ids(status='open', subject=str(self.math.id)), [ids[2], ids[0]])
+        self.assertEqual(self.ids(subject=f"{self.math.id},{self.physics.id}", budget_max=2000), [ids[1], ids[0]])
+        self.assertEqual(self.ids(status='closed'), [ids[4]])
+        self.assertEqual(len(self.ids(distance=5, teaching_mode='offline')), 5)
+        self.assertEqual(self.ids(teaching_mode='online'), [])
+
+    def test_malformed_filter_is_rejected(self):
+        for name, value in (('grade', 'x'), ('subject', '1,x'), ('budget_min', '1.5'), ('distance', 'far')):
+            response = self.client.get('/job-post/', {name: value, 'status': 'open'})
+            self.assertEqual(response.status_code, 400)
+            self.assertIn(name, response.data)
+
+    def test_cursor_pages(self):
+        first = self.client.get('/job-post/', {'page_size': 2}).data
+        second = self.client.get('/job-post/', {'page_size': 2, 'cursor': first["cursor"]}).data
+        third = self.client.get('/job-post/', {'page_size': 2, 'cursor': second["cursor"]}).data
+        seen = [row["id"] for page in (first, second, third) for row in page["results"]]
+        self.assertEqual(seen, [job.id for job in reversed(self.jobs)])
+        self.assertIsNone(third["cursor"])
+
+
+class JobBidCountersTestCase(TestCase):
+    """
+    JobPost.bids_count, last_bid_at and accepted_bid follow the bids, and
+    reconcile_job_counters repairs them after writes that skip the signals.
+    """
+
+    def setUp(self):
+        self.job = make_job(make_user("student"))
+        self.tutors = [make_teacher(f"tutor{index}") for index in range(3)]
+
+    def bid(self, tutor):
+        return BidJob.objects.create(job=self.job, tutor=tutor, proposed_salary=1000)
+
+    def test_counters_follow_bids(self):
+        bids = [self.bid(tutor) for tutor in self.tutors]
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.bids_count, 3)
+        self.assertEqual(self.job.last_bid_at, bids[-1].created_at)
+
+        # Only the award action sets accepted_bid; a bid's own status never does.
+        bids[1].status = 'accepted'
+        bids[1].save()
+        self.job.refresh_from_db()
+        self.assertIsNone(self.job.accepted_bid_id)
+        JobPost.objects.filter(pk=self.job.pk).update(accepted_bid=bids[1])
+
+        bids[1].delete()
+        bids[2].delete()
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.bids_count, 1)
+        self.assertEqual(self.job.last_bid_at, bids[0].created_at)
+        self.assertIsNone(self.job.accepted_bid_id)
+
+    def test_stale_save_keeps_counters(self):
+        stale = JobPost.objects.get(pk=self.job.pk)
+        self.bid(self.tutors[0])
+        stale.title = "Math and physics tutor"
+        stale.save()
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.title, self.job.bids_count), ("Math and physics tutor", 1))
+        self.assertIsNotNone(self.job.last_bid_at)
+
+    def test_reconcile(self):
+        bids = [self.bid(tutor) for tutor in self.tutors]
+        BidJob.objects.filter(id=bids[0].id).update(status='accepted')
+        BidJob.objects.filter(id=bids[2].id).delete()
+        JobPost.objects.filter(id=self.job.id).update(bids_count=7)
+
+        call_command('reconcile_job_counters', verbosity=0)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.bids_count, 2)
+        self.assertEqual(self.job.last_bid_at, bids[1].created_at)
+        self.assertEqual(self.job.accepted_bid_id, bids[0].id)
+
+
+class AvailabilityScheduleReplaceTestCase(TestCase):
+    """
+    Posting a schedule replaces the stored slots through a diff, atomically.
+    """
+
+    def setUp(self):
+        self.tutor = make_teacher("tutor")
+        self.client = api_client(self.tutor.user)
+
+    def post(self, payload):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post('/availability/', payload, format='json')
+
+    def test_diff(self):
+        self.post([{"start": "09:00", "end": "10:00", "days": ["MO", "TU"]}])
+        response = self.post([
+            {"start": "09:00", "end": "10:00", "days": ["MO"]},
+            {"start": "18:00", "end": "19:00", "days": ["WE", "FR"]},
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["added"]), 2)
+        self.assertEqual(len(response.data["removed"]), 1)
+        self.assertEqual([slot["days_of_week"] for slot in response.data["kept"]], ["MO"])
+        self.assertEqual(
+            sorted(Availability.objects.filter(tutor=self.tutor).values_list('days_of_week', flat=True)),
+            ["FR", "MO", "WE"],
+        )
+        self.tutor.refresh_from_db()
+        self.assertNotEqual(self.tutor.availability_mask[2], 0)
+        self.assertEqual(self.tutor.availability_mask[1], 0)
+
+    def test_invalid_payload_keeps_schedule(self):
+        self.post([{"start": "09:00", "end": "10:00", "days": ["MO"]}])
+        response = self.post([
+            {"start": "11:00", "end": "12:00", "days": ["TU"]},
+            {"start": "15:00", "end": "14:00", "days": ["WE"]},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(Availability.objects.filter(tutor=self.tutor).values_list('days_of_week', flat=True)),
+                         ["MO"])
+
+
+class JobPostScheduleBatchTestCase(TestCase):
+    """
+    One request rewrites the schedules of several jobs; entries of the same job
+    are merged instead of overwriting each other.
+    """
+
+    def setUp(self):
+        self.poster = make_user("student")
+        self.jobs = [make_job(self.poster, title=f"Job {index}", description="Math") for index in range(2)]
+        self.foreign = make_job(make_user("other"), title="Foreign", description="Math")
+        self.client = api_client(self.poster)
+
+    def test_batch(self):
+        payload = [
+            {"job_post": self.jobs[0].id, "start": "09:00", "end": "10:00", "days": ["MO"]},
+            {"job_post": self.jobs[0].id, "start": "18:00", "end": "19:00", "days": ["TU"]},
+            {"job_post": self.jobs[1].id, "start": "09:00", "end": "10:00", "days": ["SA", "SU"]},
+        ]
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/job-post-availability/', payload, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual({row["job_post"]: len(row["availability"]) for row in response.data},
+                         {self.jobs[0].id: 2, self.jobs[1].id: 2})
+        self.assertEqual(JobPostAvailability.objects.filter(job_post=self.jobs[0]).count(), 2)
+        self.jobs[0].refresh_from_db()
+        self.assertNotEqual(self.jobs[0].schedule_mask[1], 0)
+
+    def test_replace_refreshes_each_job_once(self):
+        payload = [{"job_post": job.id, "start": "09:00", "end": "10:00", "days": ["MO", "TU"]} for job in self.jobs]
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/job-post-availability/', payload, format='json')
+        payload = [{"job_post": job.id, "start": "18:00", "end": "19:00", "days": ["WE"]} for job in self.jobs]
+        with self.captureOnCommitCallbacks() as callbacks:
+            response = self.client.post('/job-post-availability/', payload, format='json')
+        self.assertEqual(response.status_code, 201)
+        # One mask sync and one feed refresh for the whole batch.
+        self.assertEqual(len(callbacks), 2)
+        self.assertEqual(JobPostAvailability.objects.filter(job_post__in=self.jobs).count(), 2)
+
+    def test_schedule_mask_not_exposed(self):
+        response = self.client.get(f'/job-post/{self.jobs[0].id}/')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("schedule_mask", response.data)
+        self.assertIn("availability", response.data)
+
+    def test_foreign_job_rejects_whole_batch(self):
+        payload = [
+            {"job_post": self.jobs[0].id, "start": "09:00", "end": "10:00", "days": ["MO"]},
+            {"job_post": self.foreign.id, "start": "09:00", "end": "10:00", "days": ["MO"]},
+        ]
+        response = self.client.post('/job-post-availability/', payload, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(JobPostAvailability.objects.exists())
+
+
+# The test process is the only worker, so its LocMemCache counts as shared.
+@override_settings(SHARED_CACHE=True)
+class BidPlacementTestCase(TestCase):
+    """
+    Bids are unique per tutor and job, and Idempotency-Key retries replay the
+    first response without reaching the bids table.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.job = make_job(make_user("student"))
+        self.client = api_client(make_teacher().user)
+
+    def place(self, key=None, salary=1000):
+        headers = {"HTTP_IDEMPOTENCY_KEY": key} if key else {}
+        return self.client.post('/bid-job/', {"job": self.job.id, "proposed_salary": salary}, format='json',
+                                **headers)
+
+    def test_duplicate_bid_rejected(self):
+        self.assertEqual(self.place().status_code, 201)
+        self.assertEqual(self.place().status_code, 400)
+        self.assertEqual(BidJob.objects.count(), 1)
+
+    def test_idempotent_replay(self):
+        first = self.place(key="tap-1")
+        self.assertEqual(first.status_code, 201)
+        with CaptureQueriesContext(connection) as context:
+            retry = self.place(key="tap-1")
+        self.assertEqual(retry.status_code, 201)
+        self.assertEqual(retry.data["id"], first.data["id"])
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertFalse(any("base_bidjob" in query["sql"] for query in context.captured_queries))
+
+        self.assertEqual(self.place(key="tap-1", salary=2000).status_code, 422)
+
+    def test_key_needs_shared_cache(self):
+        with override_settings(SHARED_CACHE=False), self.assertRaises(ImproperlyConfigured):
+            self.place(key="tap-1")
+        self.assertEqual(self.place().status_code, 201)
+
+
+class ConcurrentBidPlacementTestCase(TransactionTestCase):
+    """
+    Many threads placing the same bid at once create exactly one row.
+    """
+    THREADS = 8
+
+    def test_same_bid_from_many_threads(self):
+        job = make_job(make_user("student"))
+        tutor_user = make_teacher().user
+
+        barrier = threading.Barrier(self.THREADS)
+        codes = []
+
+        def place():
+            client = api_client(tutor_user)
+            try:
+                barrier.wait()
+                response = client.post('/bid-job/', {"job": job.id, "proposed_salary": 1000}, format='json')
+                codes.append(response.status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=place) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(codes), [201] + [400] * (self.THREADS - 1))
+        self.assertEqual(BidJob.objects.filter(job=job).count(), 1)
+        job.refresh_from_db()
+        self.assertEqual(job.bids_count, 1)
+
+
+class AwardJobTestCase(TestCase):
+    """
+    Awarding a job settles every bid and closes the job at a constant query cost.
+    """
+
+    def setUp(self):
+        self.student = make_user("student")
+        self.job = make_job(self.student)
+        self.bids = [BidJob.objects.create(job=self.job, tutor=make_teacher(f"tutor{index}"), proposed_salary=1000)
+                     for index in range(6)]
+        self.client = api_client(self.student)
+
+    def test_award(self):
+        chosen = self.bids[2]
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(f'/job-post/{self.job.id}/award/', {"bid": chosen.id}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["rejected_bids"], 5)
+        self.assertLessEqual(len(context.captured_queries), 10)
+
+        statuses = dict(BidJob.objects.filter(job=self.job).values_list('id', 'status'))
+        self.assertEqual(statuses.pop(chosen.id), 'accepted')
+        self.assertEqual(set(statuses.values()), {'rejected'})
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, 'closed')
+        self.assertEqual(self.job.accepted_bid_id, chosen.id)
+
+        again = self.client.post(f'/job-post/{self.job.id}/award/', {"bid": self.bids[0].id}, format='json')
+        self.assertEqual(again.status_code, 400)
+
+    def test_only_owner(self):
+        self.client.force_authenticate(user=self.bids[0].tutor.user)
+        response = self.client.post(f'/job-post/{self.job.id}/award/', {"bid": self.bids[0].id}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+    def test_patch_accepted_is_refused(self):
+        response = self.client.patch(f'/bid-job/{self.bids[0].id}/', {"status": "accepted"}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("status", response.data)
+        self.assertFalse(BidJob.objects.filter(job=self.job, status="accepted").exists())
+
+    def test_bid_cannot_be_placed_accepted(self):
+        client = api_client(make_teacher("newcomer").user)
+        response = client.post('/bid-job/', {"job": self.job.id, "proposed_salary": 900, "status": "accepted"},
+                               format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("status", response.data)
+        self.job.refresh_from_db()
+        self.assertIsNone(self.job.accepted_bid_id)
+
+    def test_patch_cannot_reopen_job(self):
+        self.client.post(f'/job-post/{self.job.id}/award/', {"bid": self.bids[0].id}, format='json')
+        response = self.client.patch(f'/job-post/{self.job.id}/', {"status": "open"}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.status, "closed")
+
+    def test_edit_keeps_award(self):
+        stale = JobPost.objects.get(pk=self.job.pk)
+        self.client.post(f'/job-post/{self.job.id}/award/', {"bid": self.bids[0].id}, format='json')
+        request = APIRequestFactory().patch(f'/job-post/{self.job.id}/')
+        request.user = self.student
+        serializer = JobPostSerializer(stale, data={"title": "Physics tutor"}, partial=True, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.title, self.job.status, self.job.accepted_bid_id),
+                         ("Physics tutor", "closed", self.bids[0].id))
+
+
+class BidListingTestCase(TestCase):
+    """
+    Bids are visible to their tutor and to the job owner only, sorted and
+    paginated from a single query per page.
+    """
+
+    def setUp(self):
+        self.owner = make_user("owner")
+        self.job = make_job(self.owner)
+        other_job = make_job(make_user("stranger"), title="Physics tutor", description="Class 9")
+        self.tutors = []
+        for index, salary in enumerate([3000, 1000, 2000]):
+            tutor = make_teacher(f"tutor{index}", first_name=f"Tutor{index}")
+            BidJob.objects.create(job=self.job, tutor=tutor, proposed_salary=salary)
+            self.tutors.append(tutor)
+        BidJob.objects.create(job=other_job, tutor=self.tutors[0], proposed_salary=500)
+        self.client = api_client()
+
+    def salaries(self, user, **params):
+        self.client.force_authenticate(user=user)
+        response = self.client.get('/bid-job/', params)
+        self.assertEqual(response.status_code, 200)
+        return [row["proposed_salary"] for row in response.data["results"]], response.data
+
+    def test_scope(self):
+        owner_view, _ = self.salaries(self.owner, sort="proposed_salary")
+        self.assertEqual(owner_view, [1000, 2000, 3000])
+        tutor_view, _ = self.salaries(self.tutors[0].user, sort="proposed_salary")
+        self.assertEqual(tutor_view, [500, 3000])
+
+    def test_single_query_pages(self):
+        with CaptureQueriesContext(connection) as context:
+            first, data = self.salaries(self.owner, sort="-proposed_salary", page_size=2)
+        self.assertEqual(len(context.captured_queries), 1)
+        self.assertEqual(first, [3000, 2000])
+        self.assertEqual(data["results"][0]["tutor_name"], "Tutor0")
+        second, _ = self.salaries(self.owner, sort="-proposed_salary", page_size=2, cursor=data["cursor"])
+        self.assertEqual(second, [1000])
+
+    def test_job_filter_and_rating_summary(self):
+        TeacherProfile.objects.filter(id=self.tutors[1].id).update(rating_sum=9, rating_count=2)
+        _, data = self.salaries(self.tutors[1].user, job_id=self.job.id)
+        self.assertEqual([(row["proposed_salary"], row["reviews_average"], row["reviews_count"])
+                          for row in data["results"]], [(1000, 4.5, 2)])
+        response = self.client.get('/bid-job/', {'job_id': 'abc'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('job_id', response.data)
+
+
+class DashboardCountersTestCase(TestCase):
+    """
+    Contact request writes keep both users' dashboard counters current and
+    enforce the pending request limit.
+    """
+
+    def setUp(self):
+        self.student = make_user("student")
+        self.teachers = [make_teacher(f"tutor{index}") for index in range(3)]
+        self.client = api_client(self.student)
+
+    def request_contact(self, teacher):
+        return self.client.post('/contact-request/', {
+            "teacher": teacher.id, "student_name": "Student", "student_phone": "0123",
+        }, format='json')
+
+    def dashboard(self, user):
+        dashboard = UserDashboard.objects.get(user=user)
+        return dashboard.total_requests_sent, dashboard.total_requests_received, dashboard.total_pending_requests
+
+    def test_counters_and_limit(self):
+        first = self.request_contact(self.teachers[0])
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(self.request_contact(self.teachers[1]).status_code, 201)
+        self.assertEqual(self.request_contact(self.teachers[2]).status_code, 400)
+        self.assertEqual(self.dashboard(self.student), (2, 0, 2))
+        self.assertEqual(self.dashboard(self.teachers[0].user), (0, 1, 0))
+
+        response = self.client.patch(f'/contact-request/{first.data["id"]}/', {"status": "accepted"}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.dashboard(self.student), (2, 0, 1))
+        self.assertEqual(self.request_contact(self.teachers[2]).status_code, 201)
+
+    def test_reconcile(self):
+        self.request_contact(self.teachers[0])
+        make_contact_request(self.student, self.teachers[1], status="seen")
+        UserDashboard.objects.filter(user=self.student).update(total_pending_requests=9)
+
+        call_command('reconcile_dashboards', verbosity=0)
+        self.assertEqual(self.dashboard(self.student), (2, 0, 1))
+        self.assertEqual(self.dashboard(self.teachers[1].user), (0, 1, 0))
+
+
+class UserDashboardTestCase(TestCase):
+    """
+    The dashboard aggregates jobs, bids and contact requests per status, and is
+    served from the cache until a related write.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.student = make_user("student")
+        self.tutor = make_teacher()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.open_job = make_job(self.student, title="Math", description="Class 6")
+            make_job(self.student, title="Physics", description="Class 9", status='closed')
+            BidJob.objects.create(job=self.open_job, tutor=self.tutor, proposed_salary=1000)
+            make_contact_request(self.student, self.tutor)
+        self.client = api_client()
+
+    def dashboard(self, user):
+        self.client.force_authenticate(user=user)
+        response = self.client.get('/user/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_aggregates(self):
+        data = self.dashboard(self.student)
+        self.assertEqual(data["jobs"], {"open": 1, "closed": 1})
+        self.assertEqual(data["bids_received"]["pending"], 1)
+        self.assertEqual(data["contact_requests"]["sent"]["pending"], 1)
+        self.assertEqual(data["total_pending_requests"], 1)
+        self.assertEqual(len(data["recent_jobs"]), 2)
+        self.assertEqual(len(data["recent_bids_received"]), 1)
+
+        tutor_view = self.dashboard(self.tutor.user)
+        self.assertEqual(tutor_view["bids_placed"]["pending"], 1)
+        self.assertEqual(tutor_view["total_contact_requests_received"], 1)
+
+    def test_cached_until_write(self):
+        self.dashboard(self.student)
+        with self.assertNumQueries(0):
+            self.dashboard(self.student)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            BidJob.objects.filter(job=self.open_job).get().delete()
+        self.assertEqual(self.dashboard(self.student)["bids_received"]["pending"], 0)
+
+
+class ContactRequestInboxTestCase(TestCase):
+    """
+    Inbox tabs are paginated, carry per-status counts, and cost a fixed number
+    of queries whatever the page size.
+    """
+
+    def setUp(self):
+        self.teacher = make_teacher()
+        for index in range(5):
+            make_contact_request(make_user(f"student{index}"), self.teacher,
+                                 status="pending" if index < 3 else "seen")
+        self.client = api_client(self.teacher.user)
+
+    def test_received_tab(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/contact-request/inbox/', {'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(context.captured_queries), 3)
+        self.assertEqual(response.data["tab"], "received")
+        self.assertEqual(response.data["unread"], 3)
+        self.assertEqual(response.data["counts"]["seen"], 2)
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertEqual(response.data["results"][0]["student_email"], "student4@gmail.com")
+
+        rest = self.client.get('/contact-request/inbox/', {'page_size': 2, 'cursor': response.data["cursor"]})
+        self.assertEqual(len(rest.data["results"]), 2)
+
+    def test_status_filter_and_sent_tab(self):
+        response = self.client.get('/contact-request/inbox/', {'status': 'pending'})
+        self.assertEqual(len(response.data["results"]), 3)
+        response = self.client.get('/contact-request/inbox/', {'tab': 'sent'})
+        self.assertEqual(response.data["results"], [])
+        self.assertEqual(response.data["unread"], 3)
+
+
+class ContactRequestBulkStatusTestCase(TestCase):
+    """
+    A bulk transition updates only the teacher's own requests and moves the
+    students' pending counters in the same transaction.
+    """
+
+    def setUp(self):
+        self.teacher = make_teacher()
+        other_teacher = make_teacher("other")
+        self.students = [make_user(f"student{index}") for index in range(2)]
+        self.requests = []
+        for student in self.students:
+            UserDashboard.objects.create(user=student, total_requests_sent=2, total_pending_requests=2)
+            for teacher in (self.teacher, other_teacher):
+                self.requests.append(make_contact_request(student, teacher))
+        self.client = api_client(self.teacher.user)
+
+    def test_mark_seen_by_ids(self):
+        ids = [request.id for request in self.requests]
+        response = self.client.post('/contact-request/bulk-status/', {"status": "seen", "ids": ids}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["updated"], 2)
+        self.assertEqual(ContactRequest.objects.filter(status="seen", teacher=self.teacher).count(), 2)
+        self.assertEqual(ContactRequest.objects.filter(status="pending").count(), 2)
+        self.assertEqual(
+            list(UserDashboard.objects.order_by('user_id').values_list('total_pending_requests', flat=True)),
+            [1, 1],
+        )
+
+        again = self.client.post('/contact-request/bulk-status/', {"status": "seen", "ids": ids}, format='json')
+        self.assertEqual(again.data["updated"], 0)
+
+    def test_reject_older_than(self):
+        response = self.client.post('/contact-request/bulk-status/', {
+            "status": "rejected", "older_than": timezone.now().isoformat(), "from_status": ["pending"],
+        }, format='json')
+        self.assertEqual(response.data["updated"], 2)
+
+    def test_requires_one_selector(self):
+        response = self.client.post('/contact-request/bulk-status/', {"status": "seen"}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class EmailOpenTrackingTestCase(TestCase):
+    """
+    The pixel only buffers opens; a flush writes the first open of each request in one statement.
+    """
+
+    def setUp(self):
+        student, teacher = make_user("student"), make_teacher()
+        self.requests = [make_contact_request(student, teacher) for _ in range(2)]
+
+    def test_opens_are_buffered_and_coalesced(self):
+        first, second = self.requests
+        with override_settings(EMAIL_OPEN_FLUSH_SECONDS=0):
+            with self.assertNumQueries(0):
+                for _ in range(3):
+                    response = self.client.get(email_open_pixel_url(first))
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(response["Content-Type"], "image/gif")
+                    self.assertEqual(response.content, PIXEL_GIF)
+                self.client.get(email_open_pixel_url(second))
+            first.refresh_from_db()
+            self.assertIsNone(first.email_opened_at)
+
+            with self.assertNumQueries(1):
+                self.assertEqual(flush_email_opens(), 2)
+            self.assertEqual(ContactRequest.objects.filter(email_opened_at__isnull=False).count(), 2)
+
+            opened_at = ContactRequest.objects.get(pk=first.pk).email_opened_at
+            self.client.get(email_open_pixel_url(first))
+            self.assertEqual(flush_email_opens(), 0)
+            self.assertEqual(ContactRequest.objects.get(pk=first.pk).email_opened_at, opened_at)
+
+    def test_tampered_token_is_not_recorded(self):
+        token = make_open_token(self.requests[0].id)
+        response = self.client.get(f"/contact-request/open/{token}x.gif")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(flush_email_opens(), 0)
+
+
+class TeacherRatingSummaryTestCase(TestCase):
+    """
+    Review writes keep the tutor's rating sum, count and Bayesian score in step,
+    and the rebuild command fixes any drift.
+    """
+
+    def setUp(self):
+        self.teacher = make_teacher()
+        student = make_user("student")
+        self.contacts = [make_contact_request(student, self.teacher) for _ in range(3)]
+
+    def assertSummary(self, rating_sum, rating_count):
+        self.teacher.refresh_from_db()
+        self.assertEqual((self.teacher.rating_sum, self.teacher.rating_count), (rating_sum, rating_count))
+        self.assertAlmostEqual(
+            self.teacher.rating_score,
+            (rating_sum + RATING_PRIOR_MEAN * RATING_PRIOR_WEIGHT) / (rating_count + RATING_PRIOR_WEIGHT),
+        )
+
+    def test_create_edit_delete(self):
+        reviews = [TeacherReview.objects.create(contact_request=contact, rating=rating)
+                   for contact, rating in zip(self.contacts, (5, 4, 3))]
+        self.assertSummary(12, 3)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_average_review(self.teacher), (4, 3))
+
+        reviews[2].rating = 5
+        reviews[2].save()
+        self.assertSummary(14, 3)
+
+        reviews[0].delete()
+        self.assertSummary(9, 2)
+
+    def test_stale_profile_save_keeps_summary(self):
+        stale = TeacherProfile.objects.get(pk=self.teacher.pk)
+        TeacherReview.objects.create(contact_request=self.contacts[0], rating=5)
+        stale.bio = "Math teacher"
+        stale.save()
+        self.assertSummary(5, 1)
+        self.assertEqual(self.teacher.bio, "Math teacher")
+
+    def test_rebuild_command(self):
+        TeacherReview.objects.create(contact_request=self.contacts[0], rating=2)
+        TeacherProfile.objects.filter(id=self.teacher.id).update(rating_sum=40, rating_count=9)
+
+        call_command('rebuild_teacher_ratings', verbosity=0)
+        self.assertSummary(2, 1)
+        self.assertEqual(self.teacher.search_index.rating_score, self.teacher.rating_score)
+
+
+class TutorReviewPagesTestCase(TestCase):
+    """
+    Reviews are paged newest first; the first page and the histogram are cached
+    until a review of the tutor is written.
+    """
+
+    def setUp(self):
+        self.teacher = make_teacher()
+        self.student = make_user("student", first_name="Rahim", last_name="Uddin")
+        self.reviews = [
+            TeacherReview.objects.create(contact_request=make_contact_request(self.student, self.teacher),
+                                         rating=index % 5 + 1)
+            for index in range(REVIEW_PAGE_SIZE + 3)
+        ]
+        self.client = api_client(self.student)
+        self.url = f'/review-by-teacher/{self.teacher.id}/'
+
+    def test_pages_and_cache(self):
+        first = self.client.get(self.url, {'histogram': 'true'})
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(len(first.data["results"]), REVIEW_PAGE_SIZE)
+        self.assertEqual(first.data["results"][0]["student_name"], "Rahim Uddin")
+        self.assertEqual(sum(first.data["histogram"].values()), REVIEW_PAGE_SIZE + 3)
+        self.assertEqual(first.data["histogram"][1], 3)
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(self.url, {'histogram': 'true'})
+        self.assertEqual(cached.data["results"], first.data["results"])
+
+        second = self.client.get(self.url, {'cursor': first.data["cursor"]})
+        self.assertEqual(len(second.data["results"]), 3)
+        self.assertIsNone(second.data["cursor"])
+        seen = [row["id"] for row in first.data["results"] + second.data["results"]]
+        self.assertEqual(sorted(seen), sorted(review.id for review in self.reviews))
+
+    def test_review_write_invalidates(self):
+        self.client.get(self.url, {'histogram': 'true'})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.reviews[-1].rating = 1
+            self.reviews[-1].save()
+        response = self.client.get(self.url, {'histogram': 'true'})
+        self.assertEqual(response.data["histogram"][1], 4)
+        self.assertEqual(response.data["results"][0]["rating"], 1)
+
+
+class KeysetCursorTestCase(TestCase):
+    """
+    Cursor tokens must round-trip the ordering values of a row.
+    """
+
+    def test_round_trip(self):
+        ordering = ('distance', '-rating', 'id')
+        values = [D(m=1534.25), 4.5, 12]
+        decoded = decode_cursor(encode_cursor(values, ordering), ordering)
+        self.assertEqual(decoded[0].m, 1534.25)
+        self.assertEqual(decoded[1:], [4.5, 12])
+
+    def test_invalid_cursor(self):
+        ordering = ('-created_at', '-id')
+        with self.assertRaises(ValidationError):
+            decode_cursor("not-a-cursor", ordering)
+        with self.assertRaises(ValidationError):
+            decode_cursor(encode_cursor([1, 2, 3], ('a', 'b', 'c')), ordering)
+        # Same length, other sort order.
+        with self.assertRaises(ValidationError):
+            decode_cursor(encode_cursor([1, 2], ('-rating', 'id')), ordering)
+        # Values of a type encode_cursor never produces.
+        forged = base64.urlsafe_b64encode(b'{"o":"-created_at,-id","v":[{"dt":"soon"},[1]]}').decode()
+        with self.assertRaises(ValidationError):
+            decode_cursor(forged, ordering)
+
+    def test_unconvertible_cursor_value_is_400(self):
+        token = encode_cursor(["yesterday", "last"], ('-created_at', '-id'))
+        response = api_client(make_user("reader")).get('/job-post/', {'cursor': token})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("cursor", response.data)
+
+
+class CacheVersionsTestCase(SimpleTestCase):
+    """
+    Cached entries are served only while the versions they recorded are unchanged.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def test_bump_invalidates_entry(self):
+        data, versions = get_entry("entry", ["v:a", "v:b"])
+        self.assertIsNone(data)
+        self.assertEqual(versions, {"v:a": 0, "v:b": 0})
+        set_entry("entry", versions, {"rows": []}, 60)
+        self.assertEqual(get_entry("entry", ["v:a", "v:b"])[0], {"rows": []})
+
+        bump_version("v:b")
+        self.assertIsNone(get_entry("entry", ["v:a", "v:b"])[0])
+
+    def test_evicted_version_never_repeats(self):
+        bump_version("v:a")
+        self.assertGreater(get_version("v:a"), 1)
+        version = get_version("v:a")
+        bump_version("v:a")
+        self.assertEqual(get_version("v:a"), version + 1)
+
+
+class MatchScoringTestCase(SimpleTestCase):
+    """
+    score_candidates weighs every component and zeroes the tutors a job cannot use.
+    """
+
+    def candidates(self, **columns):
+        count = len(columns["subject_lengths"])
+        defaults = {
+            "teacher_id": np.arange(1, count + 1), "min_salary": np.zeros(count),
+            "rating_average": np.zeros(count), "rating_count": np.zeros(count),
+            "experience_years": np.zeros(count), "verified": np.zeros(count),
+            "preferred_distance": np.zeros(count), "lon": np.full(count, np.nan), "lat": np.full(count, np.nan),
+            "availability_mask": np.zeros((count, 7), dtype=np.int64),
+        }
+        defaults.update({key: np.asarray(value) for key, value in columns.items()})
+        return defaults
+
+    def job(self, **features):
+        job = {"subject_ids": [1, 2], "budget": 1000, "teaching_mode": 'online', "location": None,
+               "schedule_mask": np.zeros(7, dtype=np.int64)}
+        job.update(features)
+        return job
+
+    def test_components(self):
+        schedule = np.array([0b1111, 0, 0, 0, 0, 0, 0], dtype=np.int64)
+        candidates = self.candidates(
+            subject_ids=[1, 2, 1], subject_lengths=[2, 1],
+            min_salary=[1000, 1100], rating_average=[5, 0], rating_count=[20, 0],
+            experience_years=[20, 5], verified=[1, 0],
+            availability_mask=[[0b1111, 0, 0, 0, 0, 0, 0], [0b0011, 0, 0, 0, 0, 0, 0]],
+        )
+        scores, _ = score_candidates(self.job(schedule_mask=schedule), candidates)
+
+        rating = lambda average, count: (average * count + RATING_PRIOR_MEAN * RATING_PRIOR_WEIGHT) / (count + RATING_PRIOR_WEIGHT) / 5
+        best = 1 - MATCH_WEIGHTS["rating"] * (1 - rating(5, 20))
+        # Half the subjects, half over the salary tolerance, half the schedule, an unreviewed tutor.
+        second = (MATCH_WEIGHTS["subjects"] / 2 + MATCH_WEIGHTS["salary"] / 2 + MATCH_WEIGHTS["distance"]
+                  + MATCH_WEIGHTS["schedule"] / 2 + MATCH_WEIGHTS["rating"] * rating(0, 0)
+                  + MATCH_WEIGHTS["experience"] / 2)
+        self.assertAlmostEqual(scores[0], best)
+        self.assertAlmostEqual(scores[1], second)
+
+    def test_offline_job_needs_tutor_within_radius(self):
+        candidates = self.candidates(
+            subject_ids=[1, 1, 1], subject_lengths=[1, 1, 1], preferred_distance=[10, 10, 10],
+            lon=[90.45, 90.60, np.nan], lat=[23.81, 23.81, np.nan],
+        )
+        job = self.job(teaching_mode='offline', location=Point(90.40, 23.81, srid=4326))
+        scores, distances = score_candidates(job, candidates)
+        self.assertGreater(scores[0], 0)
+        self.assertEqual(list(scores[1:]), [0, 0])
+        self.assertAlmostEqual(distances[0], 5.1, delta=0.1)
+
+
+class CalculateDistancesTestCase(SimpleTestCase):
+    """
+    The vectorized haversine must stay within its documented bound of geodesic.
+    """
+
+    def test_matches_geodesic(self):
+        origin = Point(90.4125, 23.8103, srid=4326)
+        points = [Point(90.4125 + offset / 10, 23.8103 - offset / 20, srid=4326) for offset in range(1, 20)]
+        for batch, exact in zip(calculate_distances(origin, points), (calculate_distance(origin, p) for p in points)):
+            self.assertLessEqual(abs(batch - exact), exact * 0.0056 + 0.01)
+
+    def test_missing_locations(self):
+        origin = Point(90.4125, 23.8103, srid=4326)
+        self.assertEqual(calculate_distances(origin, [None, origin]), [None, 0.0])
+        self.assertEqual(calculate_distances(None, [origin]), [None])
+
+
+class AvailabilityMaskTestCase(SimpleTestCase):
+    """
+    Bitmap encoding of availability ranges.
+    """
+
+    def test_cover_rounds_inwards(self):
+        # 09:10-10:45 fully covers only the 09:30 and 10:00 slots (19 and 20).
+        self.assertEqual(time_range_mask(time(9, 10), time(10, 45)), 0b11 << 19)
+
+    def test_window_rounds_outwards(self):
+        self.assertEqual(time_range_mask(time(9, 10), time(10, 45), cover=False), 0b1111 << 18)
+
+    def test_week_mask(self):
+        mask = week_mask([('MO', time(0, 0), time(1, 0)), ('SU', time(23, 0), time(23, 59, 59))])
+        self.assertEqual(mask[0], 0b11)
+        self.assertEqual(mask[6], 0b11 << 46)
+        self.assertEqual(sum(mask[1:6]), 0)
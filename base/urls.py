@@ -28,7 +28,11 @@ urlpatterns = [
     path('subject-by-grade/', views.get_subjects_by_grade, name='get_subject_by_grade'),
     path('teacher/full-profile/<int:pk>/', views.get_teacher_full_profile, name='get_teacher_full_profile'),
     path('filter-teachers/', views.filter_teachers, name='filter_teachers'),
+    path('nearest-teachers/', views.nearest_teachers, name='nearest_teachers'),
+    path('search-teachers/', views.search_teachers, name='search_teachers'),
+    path('autocomplete/', views.autocomplete_teachers, name='autocomplete_teachers'),
     path('review-by-teacher/<int:pk>/', views.review_by_tutorId, name='get_reviews_by_teacher'),
     path('user/dashboard/', views.user_dashboard, name='user_dashboard'),
+    path('contact-request/open/<str:token>.gif', views.email_open_pixel, name='email_open_pixel'),
 ]
 urlpatterns += router.urls
\ No newline at end of file
@@ -1,12 +1,29 @@
 
 from datetime import time
-from .models import Availability, TeacherProfile,TeacherReview 
+from functools import reduce
+import operator
+from .models import (Availability, TeacherProfile,TeacherReview, Grade, Medium, Subject, TeacherSearchIndex,
+                     AcademicProfile, Qualification, JobPost, JobPostAvailability, BidJob, UserDashboard,
+                     RATING_PRIOR_MEAN, RATING_PRIOR_WEIGHT)
 from django.contrib.gis.geos import Point
-from django.db.models import Avg
+from django.contrib.gis.db.models.functions import Distance
+from django.contrib.gis.measure import D
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.expressions import ArraySubquery
+from django.contrib.postgres.search import SearchVector
+from django.db.models import (BooleanField, Case, Count, Exists, F, FloatField, Func, OuterRef, Q, Subquery,
+                              IntegerField, Sum, TextField, Value, When)
+from django.db.models.functions import Cast, Coalesce, Concat, Greatest, Trim
+from django.utils import timezone
 from geopy.distance import geodesic
+import numpy as np
 from rest_framework.views import exception_handler
+from .search_cache import (invalidate_search_cache, normalize_filters, snap_to_cell, cell_center,
+                           cell_half_diagonal_km, get_cached_search, set_cached_search)
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 import logging
+import math
 
 logger = logging.getLogger(__name__)
 
@@ -65,7 +82,48 @@ def calculate_distance(loc1: Point, loc2: Point) -> float:
 
 
 
-    
+
+# IUGG mean Earth radius, the sphere that minimises the haversine error against WGS84.
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(origin_lon: float, origin_lat: float, lon, lat):
+    """
+    Vectorized haversine distance (km) from one origin to arrays of longitudes
+    and latitudes in degrees. NaN coordinates give NaN distances.
+    """
+    lon, lat = np.radians(lon), np.radians(lat)
+    origin_lon, origin_lat = np.radians(origin_lon), np.radians(origin_lat)
+    a = (np.sin((lat - origin_lat) / 2) ** 2
+         + np.cos(origin_lat) * np.cos(lat) * np.sin((lon - origin_lon) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def calculate_distances(origin: Point, points) -> list:
+    """
+    Calculates the distances (km, rounded like calculate_distance) from origin to
+    every Point in points in one vectorized haversine pass.
+    Entries that are None come back as None; if origin is None every entry is None.
+
+    Accuracy: the spherical model differs from the WGS84 geodesic used by
+    calculate_distance by at most 0.56% of the distance (under 6 m per km),
+    see `python manage.py bench_distance`.
+    """
+    points = list(points)
+    if origin is None:
+        return [None] * len(points)
+    present = [index for index, point in enumerate(points) if point is not None]
+    result = [None] * len(points)
+    if not present:
+        return result
+
+    lon = np.fromiter((points[index].x for index in present), dtype=float, count=len(present))
+    lat = np.fromiter((points[index].y for index in present), dtype=float, count=len(present))
+    distances = np.round(haversine_km(origin.x, origin.y, lon, lat), 2)
+    for index, distance in zip(present, distances.tolist()):
+        result[index] = distance
+    return result
+
 
 def string_to_point(location: str) -> Point:
     """
@@ -97,12 +155,97 @@ def string_to_point(location: str) -> Point:
 
 
 
+SLOT_MINUTES = 30
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+DAY_INDEX = {code: index for index, (code, _) in enumerate(Availability.DAY_CHOICES)}
+
+
+class BitCount(Func):
+    """
+    Number of set bits of a bigint expression (PostgreSQL 14+).
+    """
+    template = 'bit_count((%(expressions)s)::bit(64))'
+    output_field = IntegerField()
+
+
+def time_range_mask(start_time: time, end_time: time, cover: bool = True) -> int:
+    """
+    Bitmap of the 30-minute slots of one day between start_time and end_time.
+    cover=True keeps only slots entirely inside the range (what stored
+    availability guarantees); cover=False keeps every slot the range touches
+    (what a requested window needs).
+    """
+    start = start_time.hour * 60 + start_time.minute
+    end = end_time.hour * 60 + end_time.minute
+    if end_time.second or end_time.microsecond:
+        end += 1
+    if cover:
+        first, last = -(-start // SLOT_MINUTES), end // SLOT_MINUTES
+    else:
+        first, last = start // SLOT_MINUTES, -(-end // SLOT_MINUTES)
+    if last <= first:
+        return 0
+    return ((1 << (last - first)) - 1) << first
+
+
+def week_mask(slots, cover: bool = True) -> list[int]:
+    """
+    Builds the seven per-day bitmaps of an iterable of (days_of_week, start_time, end_time).
+    """
+    mask = [0] * 7
+    for day, start_time, end_time in slots:
+        if day in DAY_INDEX:
+            mask[DAY_INDEX[day]] |= time_range_mask(start_time, end_time, cover)
+    return mask
+
+
+def sync_availability_masks(teacher_ids) -> None:
+    """
+    Recomputes TeacherProfile.availability_mask of the given teachers from their
+    Availability rows (one read, one bulk update).
+    """
+    teacher_ids = set(teacher_ids)
+    slots = {teacher_id: [] for teacher_id in teacher_ids}
+    for row in Availability.objects.filter(tutor_id__in=teacher_ids).values_list('tutor_id', 'days_of_week', 'start_time', 'end_time'):
+        slots[row[0]].append(row[1:])
+    TeacherProfile.objects.bulk_update(
+        [TeacherProfile(id=teacher_id, availability_mask=week_mask(rows)) for teacher_id, rows in slots.items()],
+        ['availability_mask'],
+    )
+
+
+def sync_schedule_masks(job_ids) -> None:
+    """
+    Recomputes JobPost.schedule_mask of the given jobs from their JobPostAvailability rows.
+    The job's schedule is what the tutor must cover, so partially covered slots count.
+    """
+    job_ids = set(job_ids)
+    slots = {job_id: [] for job_id in job_ids}
+    for row in JobPostAvailability.objects.filter(job_post_id__in=job_ids).values_list('job_post_id', 'days_of_week', 'start_time', 'end_time'):
+        slots[row[0]].append(row[1:])
+    JobPost.objects.bulk_update(
+        [JobPost(id=job_id, schedule_mask=week_mask(rows, cover=False)) for job_id, rows in slots.items()],
+        ['schedule_mask'],
+    )
+
+
+def covered_slots_expression(mask_field: str, mask: list[int]):
+    """
+    SQL expression counting the slots of `mask` also set in the bitmap column
+    `mask_field` (e.g. a job's schedule against availability_mask).
+    """
+    terms = [BitCount(F(f'{mask_field}__{day}').bitand(bits)) for day, bits in enumerate(mask) if bits]
+    if not terms:
+        return Value(0, output_field=IntegerField())
+    return reduce(operator.add, terms)
+
+
 def find_available_tutors(day_of_week: str, desired_start_time: time, desired_end_time: time) -> list[TeacherProfile]:
     """
     Finds tutors who are available for the entire specified time range on a given day.
 
     Args:
-        day_of_week (str): The three-letter code for the day (e.g., 'MON', 'TUE').
+        day_of_week (str): The two-letter code for the day (e.g., 'MO', 'TU').
                            Must match the choices defined in Availability.DAY_CHOICES.
         desired_start_time (datetime.time): The start time of the desired booking slot.
         desired_end_time (datetime.time): The end time of the desired booking slot.
@@ -110,32 +253,29 @@ def find_available_tutors(day_of_week: str, desired_start_time: time, desired_en
     Returns:
         list[Tutor]: A list of Tutor objects who are available for the entire
                      specified duration on the given day.
+
+    Matching runs on the 30-minute availability bitmaps in a single query. The
+    window is rounded inward to whole slots, the same way stored availability
+    is, so off-grid times (09:15-10:15 against availability 09:15-10:15) still
+    match. A window shorter than one slot falls back to the slots it touches.
     """
     # Basic validation for time range
     if desired_start_time >= desired_end_time:
-        print("Error: Desired end time must be after desired start time.")
+        logger.warning(
+            "find_available_tutors called with end time %s not after start time %s",
+            desired_end_time, desired_start_time,
+        )
+        return []
+    if day_of_week not in DAY_INDEX:
         return []
 
-    # 1. Filter Availability slots by day of the week
-    # 2. Filter for availability slots where the desired range fits entirely within
-    #    the tutor's available slot.
-    #    This means:
-    #    - The availability slot's start_time must be less than or equal to the desired_start_time.
-    #    - The availability slot's end_time must be greater than or equal to the desired_end_time.
-    available_slots = Availability.objects.filter(
-        days_of_week=day_of_week,
-        start_time__lte=desired_start_time, # Availability starts before or at desired start
-        end_time__gte=desired_end_time      # Availability ends after or at desired end
-    ).select_related('tutor') # Optimize by pre-fetching related Tutor objects
-
-    # Extract unique tutors from the filtered availability slots
-    # Using a set to ensure uniqueness of tutors
-    found_tutors = set()
-    for slot in available_slots:
-        found_tutors.add(slot.tutor)
-
-    # Convert the set back to a list for consistent return type
-    return list(found_tutors)
+    window = (time_range_mask(desired_start_time, desired_end_time)
+              or time_range_mask(desired_start_time, desired_end_time, cover=False))
+    return list(
+        TeacherProfile.objects
+        .alias(covered=F(f'availability_mask__{DAY_INDEX[day_of_week]}').bitand(window))
+        .filter(covered=window)
+    )
 
 
 
@@ -162,10 +302,441 @@ def get_availability_grouped_by_time(teacher:TeacherProfile):
     return result
 
 def get_average_review(tutor: TeacherProfile):
-    reviews = TeacherReview.objects.filter(contact_request__teacher=tutor)
-    reviews_count = reviews.count()
-    if not reviews.exists():
+    # Read from the summary columns, no query.
+    if not tutor.rating_count:
         return None, 0
-    avg_rating = reviews.aggregate(Avg('rating'))['rating__avg']
-    return round(avg_rating, 2), reviews_count
+    return round(tutor.rating_sum / tutor.rating_count, 2), tutor.rating_count
+
+
+def rating_score_expression(rating_sum, rating_count):
+    """
+    Bayesian-weighted average of a rating sum and count (expressions or values),
+    pulled towards RATING_PRIOR_MEAN while the tutor has few reviews.
+    """
+    return (
+        Cast(rating_sum, FloatField()) + Value(RATING_PRIOR_MEAN * RATING_PRIOR_WEIGHT)
+    ) / (Cast(rating_count, FloatField()) + Value(float(RATING_PRIOR_WEIGHT)))
+
+
+def bump_teacher_rating(teacher_id, rating_delta, count_delta):
+    """
+    Moves a tutor's rating summary by the given deltas in a single UPDATE. The
+    score is computed from the same pre-update row, so concurrent reviews never
+    lose a change or leave the score out of step with the sum and count.
+    """
+    if not rating_delta and not count_delta:
+        return
+    rating_sum = F('rating_sum') + rating_delta
+    rating_count = F('rating_count') + count_delta
+    TeacherProfile.objects.filter(id=teacher_id).update(
+        rating_sum=rating_sum,
+        rating_count=rating_count,
+        rating_score=rating_score_expression(rating_sum, rating_count),
+    )
+
+
+def rebuild_teacher_ratings(teacher_ids=None) -> int:
+    """
+    Recomputes the rating summary of the given teachers (all when None) from
+    their reviews in one UPDATE. Returns the number of teachers updated.
+    """
+    reviews = (
+        TeacherReview.objects
+        .filter(contact_request__teacher=OuterRef('pk'))
+        .order_by()
+        .values('contact_request__teacher')
+    )
+    rating_sum = Coalesce(Subquery(reviews.annotate(total=Sum('rating')).values('total')[:1]), 0)
+    rating_count = Coalesce(Subquery(reviews.annotate(total=Count('id')).values('total')[:1]), 0)
+    queryset = TeacherProfile.objects.all()
+    if teacher_ids is not None:
+        queryset = queryset.filter(id__in=list(teacher_ids))
+    return queryset.update(
+        rating_sum=rating_sum,
+        rating_count=rating_count,
+        rating_score=rating_score_expression(rating_sum, rating_count),
+    )
+
+
+def annotate_teacher_overview(queryset):
+    """
+    Annotates a TeacherProfile queryset with everything the search read model
+    needs (grade/subject/medium ids, highest grade and medium names) using
+    correlated subqueries, so any number of teachers is loaded with a single
+    SQL query and no join fan-out. The rating summary is read from the profile.
+    """
+    mediums = (
+        Medium.objects
+        .filter(teacher_profiles=OuterRef('pk'))
+        .order_by()
+        .values('teacher_profiles')
+    )
+    highest_grade = Grade.objects.filter(tutors=OuterRef('pk')).order_by('-sequence')
+    subjects = Subject.objects.filter(tutors=OuterRef('pk')).order_by().values('tutors')
+    subject_detail = Concat(Coalesce('subject_code', Value('')), Value(' '), Coalesce('description', Value('')),
+                            output_field=TextField())
+    academic = (
+        AcademicProfile.objects.filter(teacher=OuterRef('pk')).order_by().values('teacher')
+        .annotate(text=StringAgg(Concat('degree', Value(' '), 'institution', output_field=TextField()), ' '))
+    )
+    qualifications = (
+        Qualification.objects.filter(teacher=OuterRef('pk')).order_by().values('teacher')
+        .annotate(text=StringAgg(Concat('skill', Value(' '), 'organization', output_field=TextField()), ' '))
+    )
+    return queryset.select_related('user').annotate(
+        maximum_grade=Subquery(highest_grade.values('name')[:1]),
+        maximum_grade_sequence=Subquery(highest_grade.values('sequence')[:1]),
+        medium_names=Subquery(mediums.annotate(names=StringAgg('name', ', ')).values('names')[:1]),
+        grade_ids=ArraySubquery(Grade.objects.filter(tutors=OuterRef('pk')).order_by('id').values('id')),
+        subject_ids=ArraySubquery(Subject.objects.filter(tutors=OuterRef('pk')).order_by('id').values('id')),
+        medium_ids=ArraySubquery(Medium.objects.filter(teacher_profiles=OuterRef('pk')).order_by('id').values('id')),
+        subject_names=Subquery(subjects.annotate(names=StringAgg('name', ', ')).values('names')[:1]),
+        subject_details=Subquery(subjects.annotate(details=StringAgg(subject_detail, ' ')).values('details')[:1]),
+        academic_credentials=Subquery(academic.values('text')[:1]),
+        qualification_credentials=Subquery(qualifications.values('text')[:1]),
+    )
+
+
+SEARCH_INDEX_UPDATE_FIELDS = [
+    'name', 'location', 'gender', 'teaching_mode', 'highest_qualification', 'min_salary',
+    'experience_years', 'preferred_distance', 'verified', 'grade_ids', 'subject_ids', 'medium_ids',
+    'maximum_grade', 'maximum_grade_sequence', 'medium_names', 'rating_average', 'rating_count',
+    'rating_score', 'profile_picture', 'bio', 'subject_names', 'subject_details', 'credentials', 'updated_at',
+]
 
+# 'simple' keeps the search language agnostic (names and subjects are often Bangla).
+SEARCH_CONFIG = 'simple'
+
+
+def refresh_teacher_search_index(teacher_ids=None, batch_size=500) -> int:
+    """
+    Upserts the TeacherSearchIndex rows of the given teachers (all teachers when
+    teacher_ids is None). Each batch costs one read and one INSERT ... ON CONFLICT.
+    Returns the number of rows written.
+    """
+    queryset = annotate_teacher_overview(TeacherProfile.objects.order_by('id'))
+    if teacher_ids is not None:
+        teacher_ids = list(teacher_ids)
+        if not teacher_ids:
+            return 0
+        queryset = queryset.filter(id__in=teacher_ids)
+
+    now = timezone.now()
+    written = 0
+    rows = []
+    for teacher in queryset.iterator(chunk_size=batch_size):
+        rows.append(TeacherSearchIndex(
+            teacher_id=teacher.id,
+            name=teacher.user.get_full_name(),
+            location=teacher.user.location,
+            gender=teacher.gender,
+            teaching_mode=teacher.teaching_mode,
+            highest_qualification=teacher.highest_qualification,
+            min_salary=teacher.min_salary,
+            experience_years=teacher.experience_years,
+            preferred_distance=teacher.preferred_distance,
+            verified=teacher.verified,
+            grade_ids=teacher.grade_ids,
+            subject_ids=teacher.subject_ids,
+            medium_ids=teacher.medium_ids,
+            maximum_grade=teacher.maximum_grade or "",
+            maximum_grade_sequence=teacher.maximum_grade_sequence,
+            medium_names=teacher.medium_names or "",
+            rating_average=teacher.rating_sum / teacher.rating_count if teacher.rating_count else 0,
+            rating_count=teacher.rating_count,
+            rating_score=teacher.rating_score,
+            profile_picture=teacher.profile_picture.url if teacher.profile_picture else "",
+            bio=teacher.bio or "",
+            subject_names=teacher.subject_names or "",
+            subject_details=(teacher.subject_details or "").strip(),
+            credentials=" ".join(filter(None, [teacher.academic_credentials, teacher.qualification_credentials])),
+            updated_at=now,
+        ))
+        if len(rows) >= batch_size:
+            written += _upsert_search_rows(rows)
+            rows = []
+    if rows:
+        written += _upsert_search_rows(rows)
+    if teacher_ids is None:
+        invalidate_search_cache()
+    return written
+
+
+def _upsert_search_rows(rows) -> int:
+    previous_locations = list(
+        TeacherSearchIndex.objects.filter(teacher_id__in=[row.teacher_id for row in rows])
+        .values_list('location', flat=True)
+    )
+    TeacherSearchIndex.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['teacher'],
+        update_fields=SEARCH_INDEX_UPDATE_FIELDS,
+    )
+    # Weighted full-text document: name and subjects > bio > subject details > credentials.
+    TeacherSearchIndex.objects.filter(teacher_id__in=[row.teacher_id for row in rows]).update(
+        search_vector=(
+            SearchVector('name', 'subject_names', weight='A', config=SEARCH_CONFIG)
+            + SearchVector('bio', weight='B', config=SEARCH_CONFIG)
+            + SearchVector('subject_details', weight='C', config=SEARCH_CONFIG)
+            + SearchVector('credentials', weight='D', config=SEARCH_CONFIG)
+        )
+    )
+    invalidate_search_cache(previous_locations + [row.location for row in rows])
+    return len(rows)
+
+
+def teacher_overview_data(entry: TeacherSearchIndex) -> dict:
+    """
+    Builds the overview dict of a TeacherSearchIndex row (optionally annotated
+    with `distance`). Does not touch the database.
+    """
+    distance = getattr(entry, 'distance', None)
+    return {
+        "id": entry.teacher_id,
+        "name": entry.name,
+        "gender": entry.gender,
+        "verified": entry.verified,
+        "highest_qualification": entry.highest_qualification,
+        "medium_list": entry.medium_names,
+        "teaching_mode": entry.teaching_mode,
+        "reviews_average": round(entry.rating_average, 2) if entry.rating_count else None,
+        "reviews_count": entry.rating_count,
+        "distance": round(distance.km, 2) if distance is not None else None,
+        "expected_salary": entry.min_salary,
+        "maximum_grade": entry.maximum_grade or None,
+        "profile_picture": entry.profile_picture or None,
+    }
+
+
+def parse_number_param(params, name, cast=int):
+    """
+    Returns the numeric query parameter `name`, or None when it is absent or
+    empty. Malformed values raise a ValidationError (400) naming the parameter
+    instead of being dropped.
+    """
+    value = params.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        number = cast(value)
+    except (TypeError, ValueError):
+        number = None
+    if number is None or not math.isfinite(number):
+        raise ValidationError({name: "A valid integer is required." if cast is int else "A valid number is required."})
+    return number
+
+
+def parse_id_list_param(params, name):
+    """
+    Returns the comma separated ids of the query parameter `name` as a list of
+    ints (empty when absent). Raises ValidationError on a malformed id.
+    """
+    try:
+        return [int(value) for value in (params.get(name) or '').split(',') if value.strip()]
+    except ValueError:
+        raise ValidationError({name: "A comma separated list of integer ids is required."})
+
+
+def parse_teacher_filters(params):
+    """
+    Parses the numeric teacher search filters:
+    (feeRange, grade, subject, medium, distance), None for the absent ones.
+    """
+    return (
+        parse_number_param(params, 'feeRange'),
+        parse_number_param(params, 'grade'),
+        parse_number_param(params, 'subject'),
+        parse_number_param(params, 'medium'),
+        parse_number_param(params, 'distance', float),
+    )
+
+
+def apply_teacher_filters(queryset, params, location: Point = None):
+    """
+    Applies the teacher search filters shared by the search endpoints to a
+    TeacherSearchIndex queryset.
+    Filters: feeRange (maximum salary), gender, grade, subject, medium,
+    tuitionType and distance (km, only applied when a location is given).
+    Raises ValidationError on a malformed numeric filter.
+    """
+    max_salary, grade, subject, medium, distance = parse_teacher_filters(params)
+    gender = params.get('gender')
+    tuition_type = params.get('tuitionType')
+
+    # Only apply distance filter if user has a valid location (not None).
+    # ST_DWithin can use the GiST index on location, ST_Distance <= x cannot.
+    if distance is not None and location is not None:
+        queryset = queryset.filter(location__dwithin=(location, D(km=distance)))
+    if max_salary is not None:
+        queryset = queryset.filter(min_salary__lte=max_salary)
+    # The id arrays are GIN indexed, so containment is an index lookup.
+    if grade is not None:
+        queryset = queryset.filter(grade_ids__contains=[grade])
+    if subject is not None:
+        queryset = queryset.filter(subject_ids__contains=[subject])
+    if medium is not None:
+        queryset = queryset.filter(medium_ids__contains=[medium])
+
+    if gender and gender in ['male', 'female']:
+        queryset = queryset.filter(gender__iexact=gender)
+    if tuition_type and tuition_type in ['online', 'offline']:
+        queryset = queryset.filter(teaching_mode__iexact=tuition_type)
+    return queryset
+
+
+def apply_job_filters(queryset, params, location: Point = None):
+    """
+    Applies the job board filters to a JobPost queryset.
+    Filters: status, grade, medium, subject (comma separated ids, any of),
+    teaching_mode, gender, budget_min, budget_max and distance (km around
+    `location`, only applied when a location is given).
+    Raises ValidationError on a malformed numeric filter.
+    """
+    status = params.get('status')
+    grade = parse_number_param(params, 'grade')
+    medium = parse_number_param(params, 'medium')
+    subjects = parse_id_list_param(params, 'subject')
+    teaching_mode = params.get('teaching_mode')
+    gender = params.get('gender')
+    budget_min = parse_number_param(params, 'budget_min')
+    budget_max = parse_number_param(params, 'budget_max')
+    distance = parse_number_param(params, 'distance', float)
+
+    if status in dict(JobPost.JOB_STATUS_CHOICES):
+        queryset = queryset.filter(status=status)
+    if grade is not None:
+        queryset = queryset.filter(grade_id=grade)
+    if medium is not None:
+        queryset = queryset.filter(medium_id=medium)
+    # subject_ids mirrors subject_list and is GIN indexed.
+    if subjects:
+        queryset = queryset.filter(subject_ids__overlap=subjects)
+    if budget_min is not None:
+        queryset = queryset.filter(budget_salary__gte=budget_min)
+    if budget_max is not None:
+        queryset = queryset.filter(budget_salary__lte=budget_max)
+    if distance is not None and location is not None:
+        queryset = queryset.filter(posted_by__location__dwithin=(location, D(km=distance)))
+
+    if teaching_mode in ('online', 'offline', 'any'):
+        queryset = queryset.filter(teaching_mode=teaching_mode)
+    if gender in ('male', 'female', 'any'):
+        queryset = queryset.filter(gender=gender)
+    return queryset
+
+
+def sync_job_subject_ids(job_ids) -> None:
+    """
+    Copies subject_list of the given jobs into JobPost.subject_ids in one UPDATE.
+    """
+    links = JobPost.subject_list.through.objects.filter(jobpost_id=OuterRef('pk')).order_by('subject_id')
+    JobPost.objects.filter(id__in=list(job_ids)).update(subject_ids=ArraySubquery(links.values('subject_id')))
+
+
+def search_index_queryset(location: Point = None):
+    """
+    Base queryset of the teacher search endpoints, annotated with the distance
+    from `location` when one is given.
+    """
+    queryset = TeacherSearchIndex.objects.all()
+    if location is not None:
+        queryset = queryset.annotate(distance=Distance('location', location))
+    return queryset
+
+
+def cached_teacher_search(params, location: Point = None) -> list:
+    """
+    Teacher search served from the geo-cell cache (see base.search_cache).
+    The candidate teachers of the searcher's cell are cached once per filter set;
+    the searcher's own distances are recomputed from them in one batch.
+    """
+    # Malformed filters are rejected here, before they can reach the cache key.
+    parse_teacher_filters(params)
+    filters = normalize_filters(params)
+    cell = snap_to_cell(location) if location is not None else None
+    rows, versions = get_cached_search(cell, filters)
+    if rows is None:
+        # Query around the cell center with the radius grown by the cell size, so
+        # the candidates cover every searcher that snaps to this cell.
+        candidate_filters = dict(filters)
+        center = None
+        if cell is not None:
+            center = Point(*cell_center(cell), srid=4326)
+            if 'distance' in filters:
+                candidate_filters['distance'] = filters['distance'] + cell_half_diagonal_km(cell)
+        queryset = apply_teacher_filters(TeacherSearchIndex.objects.order_by('teacher_id'), candidate_filters, center)
+        rows = [(entry.location, teacher_overview_data(entry)) for entry in queryset]
+        set_cached_search(cell, filters, rows, versions)
+
+    radius = filters.get('distance') if location is not None else None
+    distances = calculate_distances(location, [entry_location for entry_location, _ in rows])
+    data = []
+    for (_, overview), distance in zip(rows, distances):
+        if radius is not None and (distance is None or distance > radius):
+            continue
+        data.append({**overview, "distance": distance})
+    return data
+
+
+def annotate_job_viewer_fields(queryset, user):
+    """
+    Annotates the job post fields that depend on the viewer, so a page of jobs
+    is rendered without per-row queries:
+    viewer_editable, viewer_is_biddable, viewer_distance and posted_by_name.
+    """
+    queryset = queryset.annotate(
+        viewer_editable=Case(When(posted_by_id=user.id, then=Value(True)), default=Value(False),
+                             output_field=BooleanField()),
+        posted_by_name=Trim(Concat('posted_by__first_name', Value(' '), 'posted_by__last_name',
+                                   output_field=TextField())),
+    )
+
+    teacher = TeacherProfile.objects.filter(user_id=user.id).only('id').first()
+    if teacher is None:
+        queryset = queryset.annotate(viewer_is_biddable=Value(False, output_field=BooleanField()))
+    else:
+        queryset = queryset.annotate(viewer_is_biddable=Case(
+            When(~Q(status='open') | Q(posted_by_id=user.id), then=Value(False)),
+            When(Exists(BidJob.objects.filter(job=OuterRef('pk'), tutor_id=teacher.id)), then=Value(False)),
+            default=Value(True),
+            output_field=BooleanField(),
+        ))
+
+    if user.location is None:
+        return queryset.annotate(viewer_distance=Value(None, output_field=FloatField()))
+    return queryset.annotate(viewer_distance=Distance('posted_by__location', user.location))
+
+
+# --------------------------------------------------
+# USER DASHBOARD COUNTERS
+# --------------------------------------------------
+MAX_PENDING_CONTACT_REQUESTS = 2
+DASHBOARD_COUNTERS = ('total_requests_sent', 'total_requests_received', 'total_pending_requests')
+
+
+def bump_dashboard_counters(user_id, **deltas) -> None:
+    """
+    Adds the deltas to the UserDashboard counters of one user in a single F()
+    UPDATE (never going below 0), creating the dashboard row on first use.
+    Call it inside the transaction of the write it accounts for.
+    """
+    updates = {field: Greatest(F(field) + delta, 0) for field, delta in deltas.items() if delta}
+    if not updates:
+        return
+    if not UserDashboard.objects.filter(user_id=user_id).update(**updates):
+        UserDashboard.objects.get_or_create(user_id=user_id)
+        UserDashboard.objects.filter(user_id=user_id).update(**updates)
+
+
+def bump_dashboard_counter_grouped(field: str, deltas: dict) -> None:
+    """
+    Applies per-user deltas ({user_id: delta}) to one UserDashboard counter in a
+    single UPDATE, with a CASE over the users (never going below 0).
+    """
+    deltas = {user_id: delta for user_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    change = Case(*[When(user_id=user_id, then=Value(delta)) for user_id, delta in deltas.items()],
+                  default=Value(0), output_field=IntegerField())
+    UserDashboard.objects.filter(user_id__in=list(deltas)).update(**{field: Greatest(F(field) + change, 0)})
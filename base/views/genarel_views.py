@@ -8,11 +8,14 @@ from rest_framework import status
 from ..utils import calculate_distance, string_to_point
 from copy  import deepcopy
 from ..models import (TeacherProfile,
-                      Availability, UserDashboard)
-from ..serializer import ( AvailabilitySerializer)
+                      Availability)
+from ..serializer import ( AvailabilitySerializer, AvailabilityScheduleEntrySerializer)
+from ..signals import schedule_availability_refresh
+from ..dashboard import get_user_dashboard
+from django.db import transaction
 from rest_framework.viewsets import ModelViewSet
 from rest_framework import serializers
-from drf_spectacular.utils import extend_schema
+from drf_spectacular.utils import extend_schema, inline_serializer
 
 @extend_schema(exclude=True)
 @api_view(['GET'])
@@ -95,7 +98,7 @@ def set_location(request):
     
     user = request.user
     user.location = location
-    user.save()
+    user.save(update_fields=['location'])
     return Response({"detail": "Location updated successfully."}, status=200)
 
 
@@ -106,30 +109,10 @@ from drf_spectacular.utils import OpenApiExample
     summary="List or create availability slots",
     description=(
         "Retrieve or create availability slots for the authenticated teacher. "
-        "POST accepts a list of objects with 'start', 'end', and 'days' fields. "
-        "Each object will be split into multiple instances, one per day."
+        "POST accepts a list of objects with 'start', 'end', and 'days' fields and replaces the whole "
+        "weekly schedule atomically: each object is split into one slot per day, and the response "
+        "lists the slots that were added, removed (ids) and kept."
     ),
-    responses={200: AvailabilitySerializer(many=True)},
-    request=AvailabilitySerializer(many=True),
-    examples=[
-        OpenApiExample(
-            name="Availability List Example",
-            value=[
-                {
-                    "start": "20:00",
-                    "end": "21:00",
-                    "days": ["MO", "WE", "FR"]
-                },
-                {
-                    "start": "20:00",
-                    "end": "21:00",
-                    "days": ["SA", "SU", "MO"]
-                }
-            ],
-            request_only=True,
-            response_only=False,
-        )
-    ]
 )
 class AvailabilityViewSet(ModelViewSet):
     """
@@ -153,59 +136,93 @@ class AvailabilityViewSet(ModelViewSet):
             return Availability.objects.none()
         return Availability.objects.filter(tutor=teacher)
 
+    @extend_schema(
+        request=AvailabilityScheduleEntrySerializer(many=True),
+        responses={200: inline_serializer(
+            name="AvailabilityScheduleReplace",
+            fields={
+                "added": AvailabilitySerializer(many=True),
+                "removed": serializers.ListField(child=serializers.IntegerField()),
+                "kept": AvailabilitySerializer(many=True),
+            },
+        )},
+        examples=[
+            OpenApiExample(
+                name="Availability List Example",
+                value=[
+                    {
+                        "start": "20:00",
+                        "end": "21:00",
+                        "days": ["MO", "WE", "FR"]
+                    },
+                    {
+                        "start": "20:00",
+                        "end": "21:00",
+                        "days": ["SA", "SU", "MO"]
+                    }
+                ],
+                request_only=True,
+                response_only=False,
+            )
+        ]
+    )
     def create(self, request):
-        teacher = get_object_or_404(TeacherProfile, user=request.user)
+        """
+        Replaces the teacher's weekly schedule with the payload. The whole payload
+        is validated first, then only the difference with the stored slots is
+        written (one delete, one bulk_create) inside a single transaction.
+        """
         data = request.data
         if not isinstance(data, list):
             data = [data]
-        instances = []
-        errors = []
-        
-        # Delete all existing availability entries for this teacher
-        Availability.objects.filter(tutor=teacher).delete()
-        
-        for entry in data:
-            print(entry)
-            if not isinstance(entry, dict):
-                errors.append({'error': 'Each entry must be a dictionary.'})
-                continue
-            start = entry.get('start')
-            end = entry.get('end')
-            days = entry.get('days', [])
-            for day in days:
-                instance_data = {
-                    'start_time': start,
-                    'end_time': end,
-                    'days_of_week': day,
-                }
-                single_serializer = self.get_serializer(data=instance_data)
-                if single_serializer.is_valid():
-                    instances.append(single_serializer.save(tutor=teacher))
-                else:
-                    errors.append(single_serializer.errors)
-        if errors:
-            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
-        serializer = self.get_serializer(instances, many=True)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        payload = AvailabilityScheduleEntrySerializer(data=data, many=True)
+        if not payload.is_valid():
+            return Response(payload.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        wanted = {
+            (day, entry['start'], entry['end'])
+            for entry in payload.validated_data
+            for day in entry['days']
+        }
+
+        with transaction.atomic():
+            # Locks the teacher row so concurrent replaces of the same schedule serialize.
+            teacher = get_object_or_404(TeacherProfile.objects.select_for_update(), user=request.user)
+            current = Availability.objects.filter(tutor=teacher)
+            stored = {(slot.days_of_week, slot.start_time, slot.end_time): slot for slot in current}
+
+            removed = [slot for key, slot in stored.items() if key not in wanted]
+            kept = [slot for key, slot in stored.items() if key in wanted]
+            if removed:
+                Availability.objects.filter(id__in=[slot.id for slot in removed]).delete()
+            added = Availability.objects.bulk_create([
+                Availability(tutor=teacher, days_of_week=day, start_time=start, end_time=end)
+                for day, start, end in sorted(wanted - stored.keys())
+            ])
+            # bulk_create sends no post_save.
+            schedule_availability_refresh([teacher.id])
+
+        return Response({
+            "added": AvailabilitySerializer(added, many=True).data,
+            "removed": [slot.id for slot in removed],
+            "kept": AvailabilitySerializer(kept, many=True).data,
+        }, status=status.HTTP_200_OK)
 
 
     
 
+@extend_schema(
+    summary="User dashboard",
+    description=(
+        "Counts and recent items of the authenticated user's dashboard: open/closed job posts, bids "
+        "received and placed per status, contact requests sent and received per status, the rating "
+        "summary and the latest jobs, bids and contact requests. Cached per user until a related write."
+    ),
+)
 @api_view(['GET'])
 @permission_classes([IsAuthenticatedAndNotBanned])
 def user_dashboard(request):
     """
     Retrieve the dashboard data for the authenticated user.
     """
-    user_dashboard, created = UserDashboard.objects.get_or_create(user=request.user)
-   
-    dashboard_data = {
-        "total_contact_requests_sent": user_dashboard.total_requests_sent,
-        "total_contact_requests_received": user_dashboard.total_requests_received,
-        "total_pending_requests": user_dashboard.total_pending_requests,
-        
-    }
-    return Response(dashboard_data, status=status.HTTP_200_OK)
-
-
-
+    return Response(get_user_dashboard(request.user), status=status.HTTP_200_OK)
@@ -1,18 +1,40 @@
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.throttling import UserRateThrottle, AnonRateThrottle
-from rest_framework import status
+from rest_framework import serializers, status
 from base.custom_permission import IsAuthenticatedAndNotBanned, IsJobOwner
 from base.models import JobPost, BidJob, JobPostAvailability
-from base.serializer import JobPostSerializer, BidJobSerializer, JobPostAvailabilitySerializer
+from base.serializer import (JobPostSerializer, BidJobSerializer, JobPostAvailabilitySerializer,
+                             JobPostScheduleEntrySerializer)
+from base.signals import schedule_job_schedule_refresh, schedule_job_feed_refresh, schedule_dashboard_invalidation
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
-from drf_spectacular.utils import extend_schema, OpenApiExample
+from drf_spectacular.utils import extend_schema, inline_serializer, OpenApiExample
 from drf_spectacular.types import OpenApiTypes
 from rest_framework.exceptions import PermissionDenied
 
 
-from django.db.models import Count
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from base.idempotency import idempotent
+from rest_framework.decorators import action
+from base.matching import match_tutors
+from base.models import TeacherSearchIndex, JobFeedEntry
+from base.pagination import KeysetPagination
+from base.utils import teacher_overview_data, annotate_job_viewer_fields, apply_job_filters, parse_number_param
+from drf_spectacular.utils import OpenApiParameter
+
+MATCHES_DEFAULT = 20
+MATCHES_MAX = 100
+
+# Keyset orderings of the bid listing; id breaks ties in the same direction.
+BID_SORTS = {
+    "created_at": ("created_at", "id"),
+    "-created_at": ("-created_at", "-id"),
+    "proposed_salary": ("proposed_salary", "id"),
+    "-proposed_salary": ("-proposed_salary", "-id"),
+}
 
 class JobPostViewSet(ModelViewSet):
     """
@@ -20,6 +42,8 @@ class JobPostViewSet(ModelViewSet):
     """
     serializer_class = JobPostSerializer
     permission_classes = [IsAuthenticatedAndNotBanned, IsJobOwner]
+    # Newest first, served by the (status, created_at) indexes.
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
 
@@ -33,24 +57,166 @@ class JobPostViewSet(ModelViewSet):
             .prefetch_related(
                 "subject_list",
                 "availabilities",
-                "bids"
-            )
-            .annotate(
-                bids_count=Count("bids")
             )
         )
+        queryset = annotate_job_viewer_fields(queryset, self.request.user)
         dashboard = self.request.query_params.get("dashboard")
         if dashboard == "true":
             queryset = queryset.filter(posted_by=self.request.user)
+        if self.action == "list":
+            queryset = apply_job_filters(queryset, self.request.query_params, self.request.user.location)
 
         return queryset
 
+    @extend_schema(
+        summary="Job board",
+        description="Job posts, newest first, with cursor pagination. All filters are optional.",
+        parameters=[
+            OpenApiParameter(name="dashboard", location="query", required=False, type=bool,
+                             description="Only the requesting user's own job posts."),
+            OpenApiParameter(name="status", location="query", required=False, type=str, enum=["open", "closed"]),
+            OpenApiParameter(name="grade", location="query", required=False, type=int, description="Grade id."),
+            OpenApiParameter(name="medium", location="query", required=False, type=int, description="Medium id."),
+            OpenApiParameter(name="subject", location="query", required=False, type=str,
+                             description="Comma separated subject ids; jobs with any of them match."),
+            OpenApiParameter(name="teaching_mode", location="query", required=False, type=str,
+                             enum=["online", "offline", "any"]),
+            OpenApiParameter(name="gender", location="query", required=False, type=str,
+                             enum=["male", "female", "any"]),
+            OpenApiParameter(name="budget_min", location="query", required=False, type=int),
+            OpenApiParameter(name="budget_max", location="query", required=False, type=int),
+            OpenApiParameter(name="distance", location="query", required=False, type=float,
+                             description="Maximum distance in km between the viewer and the poster."),
+            OpenApiParameter(name="cursor", location="query", required=False, type=str,
+                             description="Cursor returned by the previous page."),
+            OpenApiParameter(name="page_size", location="query", required=False, type=int,
+                             description="Number of jobs per page (default 20, max 100)."),
+        ],
+    )
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         serializer.save(
             posted_by=self.request.user,
             status="open"
         )
 
+    @extend_schema(
+        summary="Personalized job feed for teachers",
+        description=(
+            "Open jobs matching the teacher's subjects, grades and mediums whose poster is within the "
+            "teacher's preferred distance, ranked by match quality and recency. The feed is precomputed "
+            "and kept up to date as jobs and the teacher's profile change."
+        ),
+        parameters=[
+            OpenApiParameter(name="cursor", location="query", required=False, type=str,
+                             description="Cursor returned by the previous page."),
+            OpenApiParameter(name="page_size", location="query", required=False, type=int,
+                             description="Number of jobs per page (default 20, max 100)."),
+        ],
+    )
+    @action(detail=False, methods=["get"], url_path="feed")
+    def feed(self, request):
+        teacher = getattr(request.user, "teacher_profile", None)
+        if teacher is None:
+            return Response({"detail": "Only teachers have a job feed."}, status=status.HTTP_403_FORBIDDEN)
+
+        entries = JobFeedEntry.objects.filter(teacher=teacher, job__status="open").only("job_id", "score", "rank")
+        paginator = KeysetPagination(ordering=("-rank", "-job_id"))
+        page = paginator.paginate_queryset(entries, request, view=self)
+        jobs = self.get_queryset().in_bulk([entry.job_id for entry in page])
+
+        data = []
+        for entry in page:
+            if entry.job_id in jobs:
+                row = JobPostSerializer(jobs[entry.job_id], context=self.get_serializer_context()).data
+                data.append({**row, "match_score": entry.score})
+        return paginator.get_paginated_response(data)
+
+    @extend_schema(
+        summary="Award a job post to one bid",
+        description=(
+            "Accepts the chosen bid, rejects every other bid on the job and closes the job post, "
+            "in one transaction. Only the job owner can award an open job."
+        ),
+        request={"application/json": {"type": "object", "properties": {"bid": {"type": "integer"}},
+                                      "required": ["bid"]}},
+    )
+    @action(detail=True, methods=["post"], url_path="award")
+    def award(self, request, pk=None):
+        try:
+            bid_id = int(request.data.get("bid"))
+        except (TypeError, ValueError):
+            return Response({"detail": "bid must be a bid id."}, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            # Locking the job first serializes concurrent awards and new bids' counter updates.
+            job = get_object_or_404(JobPost.objects.select_for_update(), pk=pk)
+            if job.posted_by_id != request.user.id:
+                raise PermissionDenied("Only the job post owner can award it.")
+            if job.status != "open":
+                return Response({"detail": "This job post is already closed."}, status=status.HTTP_400_BAD_REQUEST)
+            bid = get_object_or_404(BidJob.objects.select_for_update(), pk=bid_id, job=job)
+
+            rejected = (
+                BidJob.objects.filter(job=job)
+                .exclude(pk=bid.pk)
+                .exclude(status__in=["rejected", "closed"])
+                .update(status="rejected")
+            )
+            BidJob.objects.filter(pk=bid.pk).update(status="accepted")
+            JobPost.objects.filter(pk=job.pk).update(status="closed", accepted_bid=bid)
+            # update() sends no post_save: take the closed job out of the teachers' feeds
+            # and refresh the dashboards of the owner and every bidder.
+            schedule_job_feed_refresh([job.pk])
+            schedule_dashboard_invalidation(
+                [job.posted_by_id, *BidJob.objects.filter(job=job).values_list("tutor__user_id", flat=True)]
+            )
+
+        return Response({
+            "job": job.pk,
+            "status": "closed",
+            "accepted_bid": bid.pk,
+            "rejected_bids": rejected,
+        }, status=status.HTTP_200_OK)
+
+    @extend_schema(
+        summary="Ranked tutor matches for a job post",
+        description=(
+            "Returns the tutors that best fit the job (subjects, grade, medium, gender, teaching mode, "
+            "qualification, budget, distance and schedule overlap), best first. Only the job owner can call it."
+        ),
+        parameters=[
+            OpenApiParameter(name="limit", location="query", required=False, type=int,
+                             description=f"Number of tutors to return (default {MATCHES_DEFAULT}, max {MATCHES_MAX})."),
+        ],
+    )
+    @action(detail=True, methods=["get"], url_path="matches")
+    def matches(self, request, pk=None):
+        job = get_object_or_404(
+            JobPost.objects.select_related("posted_by").prefetch_related("subject_list"), pk=pk
+        )
+        if job.posted_by_id != request.user.id:
+            raise PermissionDenied("Only the job post owner can see matching tutors.")
+
+        try:
+            limit = int(request.query_params.get("limit", MATCHES_DEFAULT))
+        except (TypeError, ValueError):
+            return Response({"detail": "limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, MATCHES_MAX))
+
+        matches = match_tutors(job, limit=limit)
+        entries = TeacherSearchIndex.objects.in_bulk([teacher_id for teacher_id, _, _ in matches])
+        data = []
+        for teacher_id, score, distance in matches:
+            if teacher_id not in entries:
+                continue
+            overview = teacher_overview_data(entries[teacher_id])
+            overview.update({"distance": distance, "match_score": score})
+            data.append(overview)
+        return Response(data, status=status.HTTP_200_OK)
+
     
 class BidJobViewSet(ModelViewSet):
     """
@@ -60,19 +226,50 @@ class BidJobViewSet(ModelViewSet):
     permission_classes = [IsAuthenticatedAndNotBanned]
 
     def get_queryset(self):
-        job_id = self.request.query_params.get('job_id')
+        # Only the viewer's own bids and the bids on the viewer's jobs are visible.
+        user = self.request.user
+        queryset = (
+            BidJob.objects
+            .select_related("job__posted_by", "tutor__user")
+            .filter(Q(tutor__user=user) | Q(job__posted_by=user))
+        )
+        job_id = parse_number_param(self.request.query_params, 'job_id')
         dashboard = self.request.query_params.get("dashboard")
-        if job_id:
-            return BidJob.objects.filter(job_id=job_id)
+        if job_id is not None:
+            queryset = queryset.filter(job_id=job_id)
         if dashboard == "true":
-            user = self.request.user
-        
-            return (
-                BidJob.objects.select_related("job", "tutor__user", "job__posted_by")
-                .filter(tutor__user=user)
-            )
-        return BidJob.objects.select_related("job", "tutor__user", "job__posted_by").all()
-        
+            queryset = queryset.filter(tutor__user=user)
+        return queryset
+
+    @extend_schema(
+        summary="List bids",
+        description=(
+            "The requesting user's own bids and the bids on their job posts, with cursor pagination. "
+            "Each bid includes the tutor's name and rating summary."
+        ),
+        parameters=[
+            OpenApiParameter(name="job_id", location="query", required=False, type=int,
+                             description="Only the bids on this job post."),
+            OpenApiParameter(name="dashboard", location="query", required=False, type=bool,
+                             description="Only the requesting user's own bids."),
+            OpenApiParameter(name="sort", location="query", required=False, type=str,
+                             enum=list(BID_SORTS), description="Sort order (default -created_at)."),
+            OpenApiParameter(name="cursor", location="query", required=False, type=str,
+                             description="Cursor returned by the previous page."),
+            OpenApiParameter(name="page_size", location="query", required=False, type=int,
+                             description="Number of bids per page (default 20, max 100)."),
+        ],
+    )
+    def list(self, request, *args, **kwargs):
+        sort = request.query_params.get("sort", "-created_at")
+        if sort not in BID_SORTS:
+            return Response({"detail": f"sort must be one of: {', '.join(BID_SORTS)}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+        self._paginator = KeysetPagination(ordering=BID_SORTS[sort])
+        return super().list(request, *args, **kwargs)
+
+    # Bid writes and the JobPost counters updated by the signal handlers commit together.
+    @transaction.atomic
     def perform_update(self, serializer):
         bid = serializer.instance
         user = self.request.user
@@ -83,6 +280,10 @@ class BidJobViewSet(ModelViewSet):
             serializer.save()
             return
 
+        # Accepting also rejects the other bids and closes the job: only the award action does that.
+        if new_status == "accepted" and bid.status != "accepted":
+            raise ValidationError({"status": f"Accept a bid with POST /job-post/{bid.job_id}/award/."})
+
         # Job owner rules
         if new_status in ["accepted", "rejected"] and user != bid.job.posted_by:
             raise PermissionDenied("Only the job post owner can accept or reject bids.")
@@ -95,11 +296,31 @@ class BidJobViewSet(ModelViewSet):
 
     
     
+    @extend_schema(
+        parameters=[
+            OpenApiParameter(name="Idempotency-Key", location="header", required=False, type=str,
+                             description="Client generated key; retries with the same key replay the first response."),
+        ],
+    )
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
+
     def perform_create(self, serializer):
         tutor = getattr(self.request.user, "teacher_profile", None)
         if not tutor:
             raise PermissionDenied("Only teachers can place bids.")
-        return super().perform_create(serializer.save(tutor=tutor))
+        # The savepoint makes the INSERT behave like ON CONFLICT DO NOTHING: a duplicate
+        # rolls back the bid and its counter update, without a prior exists() read.
+        try:
+            with transaction.atomic():
+                serializer.save(tutor=tutor)
+        except IntegrityError:
+            raise ValidationError({"detail": "You have already placed a bid on this job."})
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        instance.delete()
     
 
 
@@ -111,31 +332,10 @@ class BidJobViewSet(ModelViewSet):
     description=(
         "Retrieve or create availability slots for job posts created by the authenticated user. "
         "POST accepts a list of objects with 'start', 'end', 'days', and 'job_post' fields. "
-        "Each object will be split into multiple instances, one per day."
+        "Each object will be split into multiple instances, one per day. Entries may reference several "
+        "job posts; the schedule of each referenced job is replaced in one transaction and the response "
+        "holds the resulting slots per job."
     ),
-    responses={200: JobPostAvailabilitySerializer(many=True)},
-    request=JobPostAvailabilitySerializer(many=True),
-    examples=[
-        OpenApiExample(
-            name="Job Post Availability List Example",
-            value=[
-                {
-                    "start": "09:00",
-                    "end": "12:00",
-                    "days": ["MO", "WE", "FR"],
-                    "job_post": 1
-                },
-                {
-                    "start": "14:00",
-                    "end": "17:00",
-                    "days": ["TU", "TH"],
-                    "job_post": 1
-                }
-            ],
-            request_only=True,
-            response_only=False,
-        )
-    ]
 )
 class JobPostAvailabilityViewSet(ModelViewSet):
     """
@@ -157,47 +357,87 @@ class JobPostAvailabilityViewSet(ModelViewSet):
         user = self.request.user
         return JobPostAvailability.objects.filter(job_post__posted_by=user)
     
+    @extend_schema(
+        responses={201: inline_serializer(
+            name="JobPostScheduleReplace",
+            fields={
+                "job_post": serializers.IntegerField(),
+                "availability": JobPostAvailabilitySerializer(many=True),
+            },
+            many=True,
+        )},
+        request=JobPostScheduleEntrySerializer(many=True),
+        examples=[
+            OpenApiExample(
+                name="Job Post Availability List Example",
+                value=[
+                    {
+                        "start": "09:00",
+                        "end": "12:00",
+                        "days": ["MO", "WE", "FR"],
+                        "job_post": 1
+                    },
+                    {
+                        "start": "14:00",
+                        "end": "17:00",
+                        "days": ["TU", "TH"],
+                        "job_post": 1
+                    }
+                ],
+                request_only=True,
+                response_only=False,
+            )
+        ]
+    )
     def create(self, request):
+        """
+        Replaces the schedules of every job post referenced by the payload.
+        Entries are grouped by job_post, ownership of all the jobs is checked in
+        one query, and the slots are rewritten with one delete and one
+        bulk_create in a single transaction, whatever the number of jobs.
+        """
         data = request.data
         if not isinstance(data, list):
             data = [data]
-        instances = []
-        errors = []
-        
-        for entry in data:
-            if not isinstance(entry, dict):
-                errors.append({'error': 'Each entry must be a dictionary.'})
-                continue
-            
-            job_post_id = entry.get('job_post')
-            if not job_post_id:
-                errors.append({'error': 'job_post field is required.'})
-                continue
-            
-            try:
-                job_post = JobPost.objects.get(id=job_post_id, posted_by=request.user)
-            except JobPost.DoesNotExist:
-                errors.append({'error': f'JobPost with id {job_post_id} not found or you do not have permission to edit it.'})
-                continue
-            JobPostAvailability.objects.filter(job_post=job_post).delete()
-            start = entry.get('start')
-            end = entry.get('end')
-            days = entry.get('days', [])
-            
-            for day in days:
-                instance_data = {
-                    'start_time': start,
-                    'end_time': end,
-                    'days_of_week': day,
-                    'job_post': job_post_id,
-                }
-                single_serializer = self.get_serializer(data=instance_data)
-                if single_serializer.is_valid():
-                    instances.append(single_serializer.save(job_post=job_post))
-                else:
-                    errors.append(single_serializer.errors)
-        
-        if errors:
-            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
-        serializer = self.get_serializer(instances, many=True)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        payload = JobPostScheduleEntrySerializer(data=data, many=True)
+        if not payload.is_valid():
+            return Response(payload.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        schedules = {}
+        for entry in payload.validated_data:
+            slots = schedules.setdefault(entry['job_post'], set())
+            slots.update((day, entry['start'], entry['end']) for day in entry['days'])
+
+        with transaction.atomic():
+            jobs = (
+                JobPost.objects.select_for_update()
+                .filter(id__in=schedules, posted_by=request.user)
+                .in_bulk()
+            )
+            missing = sorted(set(schedules) - set(jobs))
+            if missing:
+                return Response(
+                    [{'error': f'JobPost with id {job_id} not found or you do not have permission to edit it.'}
+                     for job_id in missing],
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+
+            # Nothing references the slots, so a raw DELETE is safe and skips the
+            # per-row post_delete signals; the refresh below covers each job once.
+            stale = JobPostAvailability.objects.filter(job_post_id__in=list(jobs))
+            stale._raw_delete(stale.db)
+            created = JobPostAvailability.objects.bulk_create([
+                JobPostAvailability(job_post=jobs[job_id], days_of_week=day, start_time=start, end_time=end)
+                for job_id, slots in schedules.items()
+                for day, start, end in sorted(slots)
+            ])
+            # bulk_create sends no post_save either.
+            schedule_job_schedule_refresh(list(jobs))
+
+        results = {job_id: [] for job_id in schedules}
+        for slot in created:
+            results[slot.job_post_id].append(slot)
+        return Response([
+            {"job_post": job_id, "availability": JobPostAvailabilitySerializer(slots, many=True).data}
+            for job_id, slots in results.items()
+        ], status=status.HTTP_201_CREATED)
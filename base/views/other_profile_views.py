@@ -11,8 +11,21 @@ from base.custom_permission import IsAuthenticatedAndNotBanned
 from base.models import AcademicProfile, TeacherProfile, ContactRequest, UserDashboard, TeacherReview
 from base.serializer import AcademicProfileSerializer, TeacherReviewSerializer
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Count, Q
+from drf_spectacular.utils import extend_schema, OpenApiParameter
+from rest_framework.decorators import action
+from base.models import STATUS_CHOICES
+from base.pagination import KeysetPagination
 from rest_framework.exceptions import ValidationError
+from base.utils import MAX_PENDING_CONTACT_REQUESTS, bump_dashboard_counters, bump_dashboard_counter_grouped
+from base.serializer import ContactRequestBulkStatusSerializer
+from base.signals import schedule_dashboard_invalidation
+from django.utils import timezone
+from django.http import HttpResponse
+from base.open_tracking import PIXEL_GIF, read_open_token, record_email_open
+from base.review_pages import (REVIEW_ORDERING, REVIEW_PAGE_SIZE, get_first_review_page, get_review_histogram,
+                               tutor_reviews)
 
 
 class AcademicProfileViewSet(viewsets.ModelViewSet):
@@ -47,6 +60,14 @@ class QualificationViewSet(viewsets.ModelViewSet):
         serializer.save(teacher=teacher)
 
 
+# Inbox tab name -> filter on the requests of that side, given the user and
+# their teacher profile id (None for students).
+INBOX_TABS = {
+    "sent": lambda user, teacher_id: Q(student=user),
+    "received": lambda user, teacher_id: Q(teacher_id=teacher_id) if teacher_id else Q(pk__in=[]),
+}
+
+
 class ContactRequestViewSet(viewsets.ModelViewSet):
     serializer_class = ContactRequestSerializer
     permission_classes = [IsAuthenticatedAndNotBanned]
@@ -54,43 +75,168 @@ class ContactRequestViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         # Return contact requests where the user is either a student or a teacher (both fields are CustomUser)
-        teacher = TeacherProfile.objects.filter(user=self.request.user).first()
-        if teacher is None:
-            return ContactRequest.objects.filter(student=self.request.user)
-        return ContactRequest.objects.filter(
-            Q(student=self.request.user) | Q(teacher=teacher)
-        ).distinct()
+        user = self.request.user
+        return (
+            ContactRequest.objects
+            .select_related("student", "teacher__user")
+            .filter(Q(student=user) | Q(teacher__user=user))
+        )
 
-    def perform_create(self, serializer):
-        user_dashboard, created = UserDashboard.objects.get_or_create(user=self.request.user)
+    @extend_schema(
+        summary="Contact request inbox",
+        description=(
+            "One tab of the requesting user's contact requests, newest first, with cursor pagination. "
+            "'sent' lists the requests the user sent as a student, 'received' the requests received as a "
+            "teacher. The response also holds the tab's count per status and the number of unread "
+            "(pending) received requests."
+        ),
+        parameters=[
+            OpenApiParameter(name="tab", location="query", required=False, type=str, enum=list(INBOX_TABS),
+                             description="Default 'received' for teachers, 'sent' otherwise."),
+            OpenApiParameter(name="status", location="query", required=False, type=str,
+                             enum=[code for code, _ in STATUS_CHOICES]),
+            OpenApiParameter(name="cursor", location="query", required=False, type=str,
+                             description="Cursor returned by the previous page."),
+            OpenApiParameter(name="page_size", location="query", required=False, type=int,
+                             description="Number of requests per page (default 20, max 100)."),
+        ],
+    )
+    @action(detail=False, methods=["get"], url_path="inbox")
+    def inbox(self, request):
+        user = request.user
+        # Filtering on teacher_id directly keeps the received tab on its index, without a join.
+        teacher_id = TeacherProfile.objects.filter(user=user).values_list("id", flat=True).first()
+        tab = request.query_params.get("tab") or ("received" if teacher_id else "sent")
+        if tab not in INBOX_TABS:
+            return Response({"detail": f"tab must be one of: {', '.join(INBOX_TABS)}."},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        # Each tab filters on a single column, served by its own (owner, [status,] created_at) index.
+        tab_requests = ContactRequest.objects.filter(INBOX_TABS[tab](user, teacher_id))
+        counts = tab_requests.aggregate(
+            **{code: Count("id", filter=Q(status=code)) for code, _ in STATUS_CHOICES}
+        )
+        unread = counts["pending"] if tab == "received" else (
+            ContactRequest.objects.filter(INBOX_TABS["received"](user, teacher_id), status="pending").count()
+        )
+
+        queryset = tab_requests.select_related("student", "teacher__user")
+        status_filter = request.query_params.get("status")
+        if status_filter:
+            queryset = queryset.filter(status=status_filter)
+        paginator = KeysetPagination(ordering=("-created_at", "-id"))
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        response = paginator.get_paginated_response(
+            self.get_serializer(page, many=True).data
+        )
+        response.data.update({"tab": tab, "counts": counts, "unread": unread})
+        return response
+
+    @extend_schema(
+        summary="Bulk status transition of received contact requests",
+        description=(
+            "Moves many of the requesting teacher's received contact requests to one status at once, "
+            "either by id or every request created before older_than (optionally only those in "
+            "from_status). Requests already in the target status are left untouched."
+        ),
+        request=ContactRequestBulkStatusSerializer,
+    )
+    @action(detail=False, methods=["post"], url_path="bulk-status")
+    def bulk_status(self, request):
+        payload = ContactRequestBulkStatusSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+        new_status = payload.validated_data["status"]
+
+        with transaction.atomic():
+            targets = (
+                ContactRequest.objects.select_for_update(of=("self",))
+                .filter(teacher__user=request.user)
+                .exclude(status=new_status)
+            )
+            if "ids" in payload.validated_data:
+                targets = targets.filter(id__in=payload.validated_data["ids"])
+            else:
+                targets = targets.filter(created_at__lt=payload.validated_data["older_than"])
+            if payload.validated_data.get("from_status"):
+                targets = targets.filter(status__in=payload.validated_data["from_status"])
+            rows = list(targets.values_list("id", "student_id", "status"))
 
-        if created and user_dashboard.total_pending_requests >= 2:
+            updated_ids = [row[0] for row in rows]
+            if updated_ids:
+                ContactRequest.objects.filter(id__in=updated_ids).update(status=new_status, updated_at=timezone.now())
+
+            # Every transition out of (or into) pending moves the student's pending counter.
+            pending_deltas = {}
+            for _, student_id, old_status in rows:
+                delta = (new_status == "pending") - (old_status == "pending")
+                pending_deltas[student_id] = pending_deltas.get(student_id, 0) + delta
+            bump_dashboard_counter_grouped("total_pending_requests", pending_deltas)
+
+            # update() sends no signals.
+            schedule_dashboard_invalidation([request.user.id, *pending_deltas])
+
+        return Response({"updated": len(updated_ids), "ids": updated_ids}, status=status.HTTP_200_OK)
+
+    # Every write updates the UserDashboard counters in its own transaction, with F() expressions.
+    @transaction.atomic
+    def perform_create(self, serializer):
+        student = self.request.user
+        # Locking the student's dashboard row serializes their concurrent requests, so
+        # the pending limit is checked against a count no other request can change.
+        UserDashboard.objects.get_or_create(user=student)
+        UserDashboard.objects.select_for_update().filter(user=student).first()
+        pending = ContactRequest.objects.filter(student=student, status="pending").count()
+        if pending >= MAX_PENDING_CONTACT_REQUESTS:
             raise ValidationError({
-                "detail": "You cannot have more than 2 pending contact requests."
+                "detail": f"You cannot have more than {MAX_PENDING_CONTACT_REQUESTS} pending contact requests."
             })
 
-        # Save the contact request first
-        serializer.save(student=self.request.user)
-
-        # Then update dashboard counters
-        user_dashboard.total_requests_sent += 1
-        user_dashboard.total_pending_requests += 1
-        user_dashboard.save()
+        instance = serializer.save(student=student)
+        pending_delta = 1 if instance.status == "pending" else 0
+        bump_dashboard_counters(student.id, total_requests_sent=1, total_pending_requests=pending_delta)
+        bump_dashboard_counters(instance.teacher.user_id, total_requests_received=1)
 
+    @transaction.atomic
     def perform_update(self, serializer):
-        # Get the old status before update
-        old_status = serializer.instance.status
-        
-        # Save the updated contact request
+        # Read the stored status under a row lock, so two concurrent transitions
+        # out of "pending" decrement the counter once.
+        old_status = (
+            ContactRequest.objects.select_for_update()
+            .values_list("status", flat=True)
+            .get(pk=serializer.instance.pk)
+        )
         instance = serializer.save()
-        
-        # If status changed from pending, decrement pending counter
-        if old_status == 'pending' and instance.status != 'pending':
-            student = instance.student
-            user_dashboard, created = UserDashboard.objects.get_or_create(user=student)
-            if user_dashboard.total_pending_requests > 0:
-                user_dashboard.total_pending_requests -= 1
-                user_dashboard.save()
+
+        was_pending = old_status == "pending"
+        is_pending = instance.status == "pending"
+        if was_pending != is_pending:
+            bump_dashboard_counters(instance.student_id, total_pending_requests=1 if is_pending else -1)
+
+    @transaction.atomic
+    def perform_destroy(self, instance):
+        was_pending = (
+            ContactRequest.objects.select_for_update()
+            .filter(pk=instance.pk, status="pending")
+            .exists()
+        )
+        student_id, teacher_user_id = instance.student_id, instance.teacher.user_id
+        instance.delete()
+        bump_dashboard_counters(student_id, total_requests_sent=-1, total_pending_requests=-1 if was_pending else 0)
+        bump_dashboard_counters(teacher_user_id, total_requests_received=-1)
+
+
+def email_open_pixel(request, token):
+    """
+    Tracking pixel of the contact request emails. A plain Django view: it only
+    buffers the open, and the flush to email_opened_at happens in the background.
+    Invalid tokens still get the image so mail clients render nothing broken.
+    """
+    contact_request_id = read_open_token(token)
+    if contact_request_id is not None:
+        record_email_open(contact_request_id)
+    response = HttpResponse(PIXEL_GIF, content_type="image/gif")
+    response["Cache-Control"] = "no-store, private"
+    return response
 
 
 class TeacherReviewViewSet(viewsets.ModelViewSet):
@@ -129,20 +275,33 @@ class TeacherReviewViewSet(viewsets.ModelViewSet):
 
 
 
+@extend_schema(
+    summary="Reviews of a tutor",
+    description=(
+        "The tutor's reviews, newest first, with cursor pagination. The first page is cached per tutor. "
+        "Pass histogram=true to also get the number of reviews per rating."
+    ),
+    parameters=[
+        OpenApiParameter(name="cursor", location="query", required=False, type=str,
+                         description="Cursor returned by the previous page."),
+        OpenApiParameter(name="page_size", location="query", required=False, type=int,
+                         description=f"Number of reviews per page (default {REVIEW_PAGE_SIZE}, max 100)."),
+        OpenApiParameter(name="histogram", location="query", required=False, type=bool,
+                         description="Include the rating histogram."),
+    ],
+)
 @api_view(['GET'])
 @permission_classes([IsAuthenticatedAndNotBanned])
 def review_by_tutorId(request, pk):
-    reviews = (
-        TeacherReview.objects
-        .select_related(
-            "contact_request",
-            "contact_request__student",
-            "contact_request__teacher",
-        )
-        .filter(contact_request__teacher_id=pk)
-    )
-
-
-    serializer = TeacherReviewSerializer(reviews, many=True)
-    return Response(serializer.data, status=status.HTTP_200_OK)
+    paginator = KeysetPagination(ordering=REVIEW_ORDERING, page_size=REVIEW_PAGE_SIZE)
+    if not request.query_params.get(paginator.cursor_query_param) and paginator.get_page_size(request) == REVIEW_PAGE_SIZE:
+        page = get_first_review_page(pk)
+        paginator.request, paginator.next_cursor = request, page["cursor"]
+        response = paginator.get_paginated_response(page["results"])
+    else:
+        rows = paginator.paginate_queryset(tutor_reviews(pk), request)
+        response = paginator.get_paginated_response(TeacherReviewSerializer(rows, many=True).data)
 
+    if request.query_params.get("histogram") in ("1", "true", "True"):
+        response.data["histogram"] = get_review_histogram(pk)
+    return response
@@ -3,14 +3,19 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework import status
 from base.models import TeacherProfile, AcademicProfile, Qualification
-from base.utils import get_availability_grouped_by_time, calculate_distance, get_average_review
+from base.utils import (get_availability_grouped_by_time, search_index_queryset, teacher_overview_data,
+                        apply_teacher_filters, cached_teacher_search, SEARCH_CONFIG)
 from base.serializer import TeacherProfileSerializer, AcademicProfileSerializer, QualificationSerializer
-from django.contrib.gis.measure import D
+from django.contrib.gis.db.models.functions import GeometryDistance
+from django.contrib.postgres.search import SearchQuery, SearchRank, TrigramWordSimilarity
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiExample, OpenApiResponse
 from rest_framework import viewsets
 from rest_framework.permissions import IsAuthenticated
 from base.custom_permission import IsAuthenticatedAndNotBanned
-from base.models import TeacherProfile, Availability, ContactRequest,TeacherReview
+from base.pagination import KeysetPagination
+from base.models import TeacherProfile, Availability, ContactRequest,TeacherReview, Subject, TeacherSearchIndex
 from base.serializer import TeacherProfileSerializer, AvailabilitySerializer
 
 
@@ -98,6 +103,20 @@ def get_teacher_full_profile(request, pk):
 
 
 
+# Each sort ends with the primary key so the keyset is unique. Salary, experience
+# and rating are backed by composite indexes on TeacherSearchIndex. Distance is
+# not: it seeks on the ST_Distance annotation, so every page computes the distance
+# of each matching teacher and top-N sorts them. Its cost is bounded by the filters
+# (a `distance` radius narrows it through the GiST index), not by the index order;
+# nearest_teachers is the KNN-served alternative.
+TEACHER_SEARCH_SORTS = {
+    "distance": ("distance", "teacher_id"),
+    "rating": ("-rating_score", "-rating_count", "teacher_id"),
+    "salary": ("min_salary", "teacher_id"),
+    "experience": ("-experience_years", "teacher_id"),
+}
+
+
 @extend_schema(
     operation_id="filterTeachers",
     description="Retrieve a filtered list of teacher profile overviews. Supports filtering by expected salary range, gender, grade id, and optional distance (km) from the requesting user's location (only applied if user has a location).",
@@ -141,6 +160,28 @@ def get_teacher_full_profile(request, pk):
             type=float,
             description="Maximum distance in kilometers from the requesting user's location."
         ),
+        OpenApiParameter(
+            name="sort",
+            location="query",
+            required=False,
+            type=str,
+            enum=list(TEACHER_SEARCH_SORTS),
+            description="Sort order. Passing sort, cursor or page_size switches the response to a paginated page."
+        ),
+        OpenApiParameter(
+            name="cursor",
+            location="query",
+            required=False,
+            type=str,
+            description="Opaque cursor returned by the previous page."
+        ),
+        OpenApiParameter(
+            name="page_size",
+            location="query",
+            required=False,
+            type=int,
+            description="Number of teachers per page (max 100)."
+        ),
     ],
     responses={
         200: OpenApiResponse(
@@ -183,101 +224,187 @@ def filter_teachers(request):
     """
     Retrieve a filtered list of TeacherProfile overviews.
     Filters: min_salary, max_salary, gender, grade, distance (optional).
+    Reads only from the denormalized TeacherSearchIndex, so the response is
+    built from a single query regardless of the result size; the plain list
+    is additionally cached per location cell and filter set.
+    """
+    user_location = getattr(request.user, 'location', None)
+
+    if not any(param in request.GET for param in ('sort', 'cursor', 'page_size')):
+        # Plain list mode is served from the geo-cell cache.
+        data = cached_teacher_search(request.GET, user_location)
+        return Response(data, status=status.HTTP_200_OK)
+
+    queryset = apply_teacher_filters(search_index_queryset(user_location), request.GET, user_location)
+
+    # Paginated mode: seek pagination on a stable sort key, never OFFSET.
+    sort = request.GET.get('sort') or ('distance' if user_location is not None else 'rating')
+    if sort not in TEACHER_SEARCH_SORTS:
+        return Response({"detail": f"sort must be one of: {', '.join(TEACHER_SEARCH_SORTS)}."},
+                        status=status.HTTP_400_BAD_REQUEST)
+    if sort == 'distance':
+        if user_location is None:
+            return Response({"detail": "Location not set."}, status=status.HTTP_400_BAD_REQUEST)
+        queryset = queryset.filter(location__isnull=False)
+
+    paginator = KeysetPagination(ordering=TEACHER_SEARCH_SORTS[sort])
+    page = paginator.paginate_queryset(queryset, request)
+    return paginator.get_paginated_response([teacher_overview_data(teacher) for teacher in page])
+
+
+NEAREST_TEACHERS_DEFAULT = 20
+NEAREST_TEACHERS_MAX = 100
+
+
+@extend_schema(
+    operation_id="nearestTeachers",
+    description=(
+        "Retrieve the k teachers closest to the requesting user's location, nearest first. "
+        "Accepts the same filters as filterTeachers plus subject and medium ids. "
+        "Ordering uses the PostGIS KNN operator against the spatial index of the teacher search index."
+    ),
+    parameters=[
+        OpenApiParameter(name="k", location="query", required=False, type=int,
+                         description=f"Number of teachers to return (default {NEAREST_TEACHERS_DEFAULT}, max {NEAREST_TEACHERS_MAX})."),
+        OpenApiParameter(name="feeRange", location="query", required=False, type=int, description="Maximum expected salary."),
+        OpenApiParameter(name="gender", location="query", required=False, type=str, description="Filter by gender."),
+        OpenApiParameter(name="grade", location="query", required=False, type=int, description="Grade ID."),
+        OpenApiParameter(name="subject", location="query", required=False, type=int, description="Subject ID."),
+        OpenApiParameter(name="medium", location="query", required=False, type=int, description="Medium ID."),
+        OpenApiParameter(name="tuitionType", location="query", required=False, type=str, description="online or offline."),
+        OpenApiParameter(name="distance", location="query", required=False, type=float, description="Maximum distance in kilometers."),
+    ],
+    responses={
+        200: OpenApiResponse(description="List of teacher overview objects ordered by distance."),
+        400: OpenApiResponse(description="The requesting user has no location or k is invalid."),
+    }
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticatedAndNotBanned])
+def nearest_teachers(request):
+    """
+    Retrieve the k nearest TeacherProfile overviews to the authenticated user.
     """
-    # Use select_related and prefetch_related to optimize queries and avoid missing relations
-    queryset = TeacherProfile.objects.select_related('user').prefetch_related('grade_list', 'medium_list').all()
-
-    # serializers = TeacherProfileSerializer(queryset, many=True)
-    # return Response(serializers.data, status=status.HTTP_200_OK)
-
-    max_salary = request.GET.get('feeRange')
-    gender = request.GET.get('gender')
-    grade = request.GET.get('grade')
-    distance = request.GET.get('distance')
-    tuition_type = request.GET.get('tuitionType')
-    
-    # Only apply distance filter if user has a valid location (not None)
-    if distance and hasattr(request.user, 'location') and request.user.location is not None:
-        try:
-            user_location = request.user.location
-            queryset = queryset.filter(user__location__distance_lte=(user_location, D(km=float(distance))))
-        except Exception as e:
-            # Log the error but don't fail the entire request
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.warning(f"Distance filter failed: {e}")
-
-    if max_salary:
-        queryset = queryset.filter(min_salary__lte=max_salary)
-    if gender and gender in ['male', 'female']:
-        queryset = queryset.filter(gender__iexact=gender)
-    if grade:
-        queryset = queryset.filter(grades__id=grade)
-    if tuition_type and tuition_type in ['online', 'offline']:
-        queryset = queryset.filter(teaching_mode__iexact=tuition_type)
-
-    # Only return overview fields
-    data = []
-    import logging
-    logger = logging.getLogger(__name__)
-    
-    for teacher in queryset:
-        try:
-            # Skip teachers without a valid user
-            if not hasattr(teacher, 'user') or teacher.user is None:
-                logger.warning(f"Teacher {teacher.id} has no user associated")
-                continue
-            
-            # Safely calculate distance only if both locations exist and are not None
-            distance_value = None
-            try:
-                if (hasattr(request.user, 'location') and request.user.location is not None and 
-                    hasattr(teacher.user, 'location') and teacher.user.location is not None):
-                    distance_value = calculate_distance(request.user.location, teacher.user.location)
-            except Exception as e:
-                logger.warning(f"Distance calculation failed for teacher {teacher.id}: {e}")
-            
-            # Safely get grade list
-            try:
-                grade_list = teacher.grade_list.all()
-                maximum_grade = max((grade for grade in grade_list), key=lambda g: g.sequence, default=None).name if grade_list else None
-            except Exception as e:
-                logger.warning(f"Grade list access failed for teacher {teacher.id}: {e}")
-                maximum_grade = None
-            
-            # Safely get medium list
-            try:
-                medium_list_str = ", ".join([medium.name for medium in teacher.medium_list.all()])
-            except Exception as e:
-                logger.warning(f"Medium list access failed for teacher {teacher.id}: {e}")
-                medium_list_str = ""
-            
-            # Safely get review data
-            try:
-                reviews_average, reviews_count = get_average_review(teacher)
-            except Exception as e:
-                logger.warning(f"Review calculation failed for teacher {teacher.id}: {e}")
-                reviews_average, reviews_count = None, 0
-            
-            data.append({
-                "id": teacher.id,
-                "name": teacher.user.get_full_name() if teacher.user else "Unknown",
-                "gender": getattr(teacher, 'gender', None),
-                "verified": getattr(teacher, 'verified', False),
-                "highest_qualification": getattr(teacher, 'highest_qualification', None),
-                "medium_list": medium_list_str,
-                "teaching_mode": getattr(teacher, 'teaching_mode', None),
-                "reviews_average": reviews_average,
-                "reviews_count": reviews_count,
-                "distance": distance_value,
-                "expected_salary": getattr(teacher, 'min_salary', None),
-                "maximum_grade": maximum_grade,
-                "profile_picture": teacher.profile_picture.url if hasattr(teacher, 'profile_picture') and teacher.profile_picture else None,
-            })
-        except Exception as e:
-            # Log the full error and skip this teacher
-            logger.error(f"Failed to process teacher {teacher.id}: {str(e)}", exc_info=True)
-            continue
-    
+    user_location = getattr(request.user, 'location', None)
+    if user_location is None:
+        return Response({"detail": "Location not set."}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        k = int(request.GET.get('k', NEAREST_TEACHERS_DEFAULT))
+    except (TypeError, ValueError):
+        return Response({"detail": "k must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+    k = max(1, min(k, NEAREST_TEACHERS_MAX))
+
+    queryset = search_index_queryset(user_location).filter(location__isnull=False)
+    queryset = apply_teacher_filters(queryset, request.GET, user_location)
+    # GeometryDistance compiles to the `<->` operator, which lets PostGIS walk the
+    # GiST index on TeacherSearchIndex.location in distance order and stop after k rows.
+    queryset = queryset.order_by(GeometryDistance('location', user_location))[:k]
+
+    data = [teacher_overview_data(teacher) for teacher in queryset]
     return Response(data, status=status.HTTP_200_OK)
 
+
+SEARCH_QUERY_MIN_LENGTH = 2
+
+
+@extend_schema(
+    operation_id="searchTeachers",
+    description=(
+        "Free-text teacher search over names, subjects, bio, subject descriptions/codes and "
+        "academic/qualification credentials, ranked by relevance. Combines the weighted full-text "
+        "index with trigram matching on names and subjects so misspellings still match. "
+        "Accepts the filterTeachers filters and is cursor paginated."
+    ),
+    parameters=[
+        OpenApiParameter(name="q", location="query", required=True, type=str, description="Search text."),
+        OpenApiParameter(name="cursor", location="query", required=False, type=str, description="Opaque cursor returned by the previous page."),
+        OpenApiParameter(name="page_size", location="query", required=False, type=int, description="Number of teachers per page (max 100)."),
+    ],
+    responses={
+        200: OpenApiResponse(description="Page of teacher overview objects ordered by relevance."),
+        400: OpenApiResponse(description="Missing or too short search text."),
+    }
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticatedAndNotBanned])
+def search_teachers(request):
+    """
+    Ranked free-text search over the teacher search index.
+    """
+    text = (request.GET.get('q') or '').strip()
+    if len(text) < SEARCH_QUERY_MIN_LENGTH:
+        return Response({"detail": f"q must be at least {SEARCH_QUERY_MIN_LENGTH} characters."},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    user_location = getattr(request.user, 'location', None)
+    query = SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+    # Every branch of the OR is served by its own GIN index (tsvector, name and subject trigrams).
+    queryset = (
+        search_index_queryset(user_location)
+        .filter(
+            Q(search_vector=query)
+            | Q(name__trigram_word_similar=text)
+            | Q(subject_names__trigram_word_similar=text)
+        )
+        .annotate(rank=(
+            SearchRank(F('search_vector'), query)
+            + Greatest(TrigramWordSimilarity(text, 'name'), TrigramWordSimilarity(text, 'subject_names'))
+        ))
+    )
+    queryset = apply_teacher_filters(queryset, request.GET, user_location)
+
+    paginator = KeysetPagination(ordering=('-rank', 'teacher_id'))
+    page = paginator.paginate_queryset(queryset, request)
+    return paginator.get_paginated_response([teacher_overview_data(teacher) for teacher in page])
+
+
+AUTOCOMPLETE_LIMIT = 10
+
+
+@extend_schema(
+    operation_id="autocompleteTeachers",
+    description="Typo-tolerant autocomplete of subject and teacher names using trigram similarity.",
+    parameters=[
+        OpenApiParameter(name="q", location="query", required=True, type=str, description="Text typed so far."),
+    ],
+    responses={
+        200: OpenApiResponse(
+            response={
+                "type": "object",
+                "properties": {
+                    "subjects": {"type": "array", "items": {"type": "object"}},
+                    "teachers": {"type": "array", "items": {"type": "object"}},
+                }
+            }
+        ),
+    }
+)
+@api_view(['GET'])
+@permission_classes([IsAuthenticatedAndNotBanned])
+def autocomplete_teachers(request):
+    """
+    Suggest subjects and teachers whose names resemble the typed text.
+    """
+    text = (request.GET.get('q') or '').strip()
+    if len(text) < SEARCH_QUERY_MIN_LENGTH:
+        return Response({"subjects": [], "teachers": []}, status=status.HTTP_200_OK)
+
+    subjects = (
+        Subject.objects
+        .filter(name__trigram_word_similar=text)
+        .annotate(similarity=TrigramWordSimilarity(text, 'name'))
+        .order_by('-similarity', 'id')
+        .values('id', 'name')[:AUTOCOMPLETE_LIMIT]
+    )
+    teachers = (
+        TeacherSearchIndex.objects
+        .filter(name__trigram_word_similar=text)
+        .annotate(similarity=TrigramWordSimilarity(text, 'name'))
+        .order_by('-similarity', 'teacher_id')
+        .values('teacher_id', 'name')[:AUTOCOMPLETE_LIMIT]
+    )
+    return Response({
+        "subjects": list(subjects),
+        "teachers": [{"id": teacher['teacher_id'], "name": teacher['name']} for teacher in teachers],
+    }, status=status.HTTP_200_OK)
@@ -2,6 +2,7 @@ from pathlib import Path
 from dotenv import load_dotenv
 import os
 import dj_database_url
+import logging
 from datetime import timedelta
 
 # --------------------------------------------------
@@ -51,6 +52,7 @@ INSTALLED_APPS = [
     "django.contrib.messages",
     "django.contrib.staticfiles",
     "django.contrib.gis",
+    "django.contrib.postgres",
     "cloudinary",
     "rest_framework",
     "corsheaders",
@@ -145,6 +147,42 @@ else:
         }
     }
 
+# --------------------------------------------------
+# CACHE
+# --------------------------------------------------
+# Production should set REDIS_URL so every gunicorn worker sees the same cache:
+# the version stamps that invalidate the search, dashboard and review caches
+# are per process otherwise, so a worker can serve stale entries until their
+# TTL. Idempotency-Key handling cannot work per process at all and refuses to
+# run without a shared cache outside DEBUG (see base.idempotency).
+SHARED_CACHE = bool(os.environ.get("REDIS_URL"))
+if SHARED_CACHE:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": os.environ.get("REDIS_URL"),
+        }
+    }
+else:
+    if not DEBUG:
+        logging.getLogger(__name__).warning(
+            "REDIS_URL is not set: falling back to a per-process LocMemCache. "
+            "Cache invalidation will not reach other workers."
+        )
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        }
+    }
+
+TEACHER_SEARCH_CACHE_TTL = int(os.environ.get("TEACHER_SEARCH_CACHE_TTL", 300))
+# Replay window of responses to requests sent with an Idempotency-Key header.
+IDEMPOTENCY_KEY_TTL = int(os.environ.get("IDEMPOTENCY_KEY_TTL", 24 * 3600))
+USER_DASHBOARD_CACHE_TTL = int(os.environ.get("USER_DASHBOARD_CACHE_TTL", 300))
+TUTOR_REVIEWS_CACHE_TTL = int(os.environ.get("TUTOR_REVIEWS_CACHE_TTL", 300))
+# Interval of the background flush of tracked email opens; 0 leaves it to explicit flushes.
+EMAIL_OPEN_FLUSH_SECONDS = int(os.environ.get("EMAIL_OPEN_FLUSH_SECONDS", 5))
+
 # --------------------------------------------------
 # STORAGE (CLOUDINARY)
 # --------------------------------------------------